@@ -0,0 +1,245 @@
+import os
+import csv
+import json
+import sqlite3 as sq
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import bcrypt
+import marks_store
+from db_pool import pool
+from write_queue import write_queue
+from db_versions import bump_version
+from schema_migrations import class_schema, stamp_schema
+
+DATABASE = 'logins.db'  # База пользователей
+STUDENTS_DBS_DIR = 'students_dbs'  # Папка для баз данных студентов
+ADMINS_DBS_DIR = 'admins_dbs'  # Папка для баз данных администраторов
+TEACHERS_DBS_DIR = 'teachers_dbs'  # Папка для баз данных учителей
+HASH_WORKERS = os.cpu_count() or 2  # Процессы для хеширования паролей
+PARALLEL_MIN = 8  # Меньше этого числа пароли хешируются в текущем процессе
+CSV_FIELDS = ['role', 'login', 'password', 'surname', 'name', 'patronymic', 'class_name', 'classes']
+
+def hash_password(password):
+    """Хеширует пароль с использованием bcrypt."""
+    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+    return hashed.decode('utf-8')
+
+def hash_passwords(passwords, workers=HASH_WORKERS):
+    """
+    Хеширует список паролей. bcrypt намеренно медленный, поэтому большие наборы
+    распределяются по процессам (spawn: без копирования потоков и соединений сервера).
+    """
+    if len(passwords) < PARALLEL_MIN or workers <= 1:
+        return [hash_password(p) for p in passwords]
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        return list(executor.map(hash_password, passwords, chunksize=max(1, len(passwords) // (workers * 4))))
+
+def create_admin_db(login):
+    """Создает базу данных для администратора."""
+    try:
+        os.makedirs(ADMINS_DBS_DIR, exist_ok=True)
+        db_path = f"{ADMINS_DBS_DIR}/{login}.db"
+        with pool.transaction(db_path) as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS adm (id INTEGER PRIMARY KEY)")  # Простая таблица
+        print(f"База данных для администратора {login} успешно создана.")
+    except sq.Error as e:
+        print(f"Ошибка при создании базы данных администратора: {e}")
+        raise
+
+def create_teacher_db(login, classes):
+    """Создает базу данных для учителя."""
+    try:
+        os.makedirs(TEACHERS_DBS_DIR, exist_ok=True)
+        db_path = f"{TEACHERS_DBS_DIR}/{login}.db"
+        with pool.transaction(db_path) as conn:
+            # Таблица с классами
+            conn.execute("CREATE TABLE IF NOT EXISTS classes (class_name TEXT PRIMARY KEY)")
+            conn.executemany("INSERT OR IGNORE INTO classes (class_name) VALUES (?)", [(c,) for c in classes])
+        print(f"База данных для учителя {login} успешно создана.")
+    except sq.Error as e:
+        print(f"Ошибка при создании базы данных учителя: {e}")
+        raise
+
+def normalize_user(data):
+    """
+    Приводит запись пользователя к общему виду. Принимает и поля формы администратора
+    (student_name, teacher_surname, admin_name...), и короткие поля CSV (name, surname...).
+
+    Returns:
+        tuple: (словарь пользователя, None) или (None, текст ошибки).
+    """
+    if not isinstance(data, dict):
+        return None, "Запись должна быть объектом"
+    role = (data.get('role') or '').strip()
+    login = (data.get('login') or '').strip()
+    password = data.get('password') or ''
+    if not all([role, login, password]):
+        return None, "Отсутствуют обязательные поля"
+    if any(sep in login for sep in ('/', '\\', '..')):
+        return None, "Некорректный логин"
+
+    def field(*names):
+        for name in names:
+            value = data.get(name)
+            if value:
+                return value.strip() if isinstance(value, str) else value
+        return ''
+
+    user = {"role": role, "login": login, "password": password}
+    if role == "admin":
+        name = field('admin_name', 'name')
+        if not name:
+            return None, "Требуется имя администратора"
+        user["info"] = name
+    elif role == "teacher":
+        surname = field('teacher_surname', 'surname')
+        name = field('teacher_name', 'name')
+        patronymic = field('teacher_patronymic', 'patronymic')
+        classes = field('classes')
+        if isinstance(classes, str):
+            classes = [c.strip() for c in classes.split(';') if c.strip()]
+        if not all([surname, name, patronymic, classes]):
+            return None, "Отсутствуют данные учителя"
+        user["classes"] = list(classes)
+        user["info"] = f"{surname},{name},{patronymic}"
+    elif role == "student":
+        class_name = field('class_name')
+        name = field('student_name', 'name')
+        surname = field('student_surname', 'surname')
+        patronymic = field('student_patronymic', 'patronymic')
+        if not all([class_name, name, surname, patronymic]):
+            return None, "Отсутствуют данные студента"
+        user.update(class_name=class_name, name=name, surname=surname, patronymic=patronymic, info=class_name)
+    else:
+        return None, f"Неизвестная роль: {role}"
+    return user, None
+
+def parse_users(stream, content_type):
+    """
+    Читает пользователей из потока: CSV с заголовком (поля CSV_FIELDS, классы учителя через ";")
+    или JSON (список записей либо {"users": [...]}).
+    """
+    if 'csv' in content_type:
+        return list(csv.DictReader(stream))
+    data = json.load(stream)
+    return data.get('users', []) if isinstance(data, dict) else data
+
+def existing_logins(logins, db_path=DATABASE):
+    """Возвращает логины из списка, уже занятые в базе пользователей."""
+    found = set()
+    logins = list(logins)
+    with pool.connection(db_path) as conn:
+        for i in range(0, len(logins), 500):  # Ограничение SQLite на число параметров
+            chunk = logins[i:i + 500]
+            placeholders = ",".join("?" * len(chunk))
+            found.update(row[0] for row in conn.execute(
+                f"SELECT login FROM users WHERE login IN ({placeholders})", chunk))
+    return found
+
+def add_to_class_list(conn, students):
+    """Изменение для очереди записи: добавляет учеников в список класса."""
+    conn.executemany("INSERT INTO class_list(Name, Surname, Patronymic, Login) VALUES (?, ?, ?, ?)",
+                     [(u["name"], u["surname"], u["patronymic"], u["login"]) for u in students])
+    bump_version(conn)
+
+def import_users(records, db_path=DATABASE, students_dir=STUDENTS_DBS_DIR):
+    """
+    Создает пользователей пакетом: проверяет записи, хеширует пароли (параллельно
+    для больших наборов), одной транзакцией добавляет всех в базу пользователей,
+    создает базы добавленных пользователей и одной транзакцией на класс вносит
+    учеников в списки классов.
+
+    Returns:
+        list: Отчет по каждой записи: {row, login, ok, message}.
+    """
+    report = [{"row": i + 1, "login": None, "ok": False, "message": ""} for i in range(len(records))]
+    users = []  # (номер записи, пользователь)
+    seen = set()
+    for i, data in enumerate(records):
+        user, error = normalize_user(data)
+        if user:
+            report[i]["login"] = user["login"]
+            if user["login"] in seen:
+                error = "Логин повторяется в наборе"
+            elif user["role"] == "student" and not os.path.isdir(os.path.join(students_dir, user["class_name"])):
+                error = f"Класс {user['class_name']} не существует"
+            seen.add(user["login"])
+        if error:
+            report[i]["message"] = error
+            continue
+        users.append((i, user))
+
+    taken = existing_logins(u["login"] for _, u in users)
+    for i, user in users:
+        if user["login"] in taken:
+            report[i]["message"] = f"Пользователь с логином {user['login']} уже существует"
+    users = [(i, u) for i, u in users if u["login"] not in taken]
+    if not users:
+        return report
+
+    hashes = hash_passwords([u["password"] for _, u in users])
+
+    # Все пользователи - одной транзакцией. Логин, занятый другим запросом уже после
+    # проверки выше, не срывает весь набор: такая строка просто не вставляется
+    inserted = []
+    with pool.transaction(db_path) as conn:
+        for (i, user), hashed in zip(users, hashes):
+            if conn.execute("INSERT OR IGNORE INTO users (login, password, role, info) VALUES (?, ?, ?, ?)",
+                            (user["login"], hashed, user["role"], user["info"])).rowcount:
+                inserted.append((i, user))
+            else:
+                report[i]["message"] = f"Пользователь с логином {user['login']} уже существует"
+
+    # Базы создаются только для вставленных пользователей, чтобы не тронуть файлы владельца занятого логина;
+    # схема каждого класса читается один раз
+    schemas = {}
+    created, orphans = [], []
+    for i, user in inserted:
+        try:
+            if user["role"] == "admin":
+                create_admin_db(user["login"])
+            elif user["role"] == "teacher":
+                create_teacher_db(user["login"], user["classes"])
+            else:
+                class_name = user["class_name"]
+                if class_name not in schemas:
+                    schemas[class_name] = class_schema(class_name, students_dir)
+                version, lessons = schemas[class_name]
+                student_db_path = os.path.join(students_dir, class_name, f"{user['login']}.db")
+                marks_store.create_student_marks_db(student_db_path, lessons)
+                stamp_schema(student_db_path, version)  # Миграции к новой базе не применяются
+        except (sq.Error, OSError) as e:
+            report[i]["message"] = f"Ошибка при создании базы пользователя: {e}"
+            orphans.append(user["login"])
+            continue
+        created.append((i, user))
+
+    # Пользователь без своей базы не должен остаться в базе пользователей
+    if orphans:
+        with pool.transaction(db_path) as conn:
+            conn.executemany("DELETE FROM users WHERE login = ?", [(login,) for login in orphans])
+
+    # Списки классов - одной транзакцией на класс
+    by_class = {}
+    for i, user in created:
+        if user["role"] == "student":
+            by_class.setdefault(user["class_name"], []).append((i, user))
+    futures = {class_name: write_queue.submit(os.path.join(students_dir, class_name, "class_list.db"),
+                                              add_to_class_list, [u for _, u in students])
+               for class_name, students in by_class.items()}
+    failed = set()
+    for class_name, students in by_class.items():
+        try:
+            futures[class_name].result()
+        except sq.Error as e:
+            print(f"Ошибка при добавлении учеников в список класса {class_name}: {e}")
+            for i, _ in students:
+                failed.add(i)
+                report[i]["message"] = f"Пользователь создан, но не добавлен в список класса: {e}"
+
+    for i, _ in created:
+        if i not in failed:
+            report[i]["ok"] = True
+            report[i]["message"] = "Пользователь успешно добавлен."
+    return report
@@ -2,7 +2,6 @@ import sys
 import sqlite3 as sq
 import requests
 import os
-import zipfile
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QLineEdit, QPushButton, QVBoxLayout, QMessageBox, QFormLayout
 )
@@ -10,8 +9,14 @@ from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
 from stud_menu import StudentInterface  # Импортируем интерфейс студента
 from teach_menu import TeacherInterface  # Импортируем интерфейс учителя
+from bundle_cache import load_versions, save_versions, extract_changed, DBS_DIR  # Локальный манифест версий баз
+from task_runner import get_runner  # Фоновое выполнение запросов
 
-SERVER_URL = "http://127.0.0.1:5000/process"  # URL-адрес сервера для обработки запросов
+LOGIN_URL = "http://127.0.0.1:5000/login"  # URL-адрес для получения токена сессии
+SYNC_URL = "http://127.0.0.1:5000/sync"  # URL-адрес для скачивания только изменившихся файлов
+
+class LoginError(Exception):
+    """Сервер отклонил вход; текст - сообщение сервера."""
 
 class LoginWindow(QWidget):
     """
@@ -24,6 +29,9 @@ class LoginWindow(QWidget):
         super().__init__()
         self.initUI()
         self.login = None  # Добавляем атрибут для хранения логина пользователя
+        self.token = None  # Токен сессии: пароль проверяется сервером только при входе
+        self.role = None  # Роль пользователя, полученная от сервера
+        self.user_info = None  # Класс ученика или данные учителя, полученные от сервера
 
     def initUI(self):
         """
@@ -90,7 +98,7 @@ class LoginWindow(QWidget):
     def on_login(self):
         """
         Обработчик события нажатия кнопки "Войти".
-        Выполняет аутентификацию пользователя и скачивание файлов с сервера.
+        Запускает аутентификацию и скачивание файлов в фоновом потоке, чтобы окно не зависало.
         """
         login = self.login_input.text()  # Получаем логин из поля ввода
         password = self.password_input.text()  # Получаем пароль из поля ввода
@@ -100,66 +108,106 @@ class LoginWindow(QWidget):
             QMessageBox.warning(self, "Ошибка", "Логин и пароль не могут быть пустыми!")  # Выводим сообщение об ошибке, если логин или пароль пустые
             return
 
-        try:
-            print(f"Отправка данных на сервер: логин={login}, пароль={password}")
-            # Отправляем POST-запрос на сервер для аутентификации
-            response = requests.post(
-                SERVER_URL,
-                json={"message": [login, password]},
-                timeout=5  # Устанавливаем тайм-аут для запроса
-            )
-
-            if response.status_code == 200:
-                print("Авторизация успешна. Скачивание файла...")
-
-                # Формируем путь для сохранения скачанного ZIP-архива
-                download_path = os.path.join(os.getcwd(), "dbs", f"{login}_files.zip")
-                os.makedirs(os.path.dirname(download_path), exist_ok=True)  # Создаем директорию для сохранения файла, если она не существует
-
-                # Скачиваем файл с сервера и сохраняем его
-                with open(download_path, "wb") as file:
-                    file.write(response.content)
-                print(f"ZIP-архив успешно скачан и сохранён как {download_path}")
-
-                # Определяем путь для распаковки ZIP-архива
-                extract_to = os.path.join(os.getcwd(), "dbs")
-                os.makedirs(extract_to, exist_ok=True)  # Создаем директорию для распаковки, если она не существует
-
-                # Распаковываем ZIP-архив
-                with zipfile.ZipFile(download_path, 'r') as zip_ref:
-                    zip_ref.extractall(extract_to)
-
-                print(f"Файлы распакованы в {extract_to}")
-
-                # Получаем роль пользователя
-                role = self.get_user_role(login)
-                if role == "student":
-                    # Запускаем интерфейс студента
-                    self.open_student_interface(login)
-                elif role == "teacher":
-                    # Запускаем интерфейс учителя
-                    self.open_teacher_interface(login)
-                elif role == "admin":
-                    # Запускаем интерфейс администратора (если есть)
-                    self.open_admin_interface(login)
-                else:
-                    QMessageBox.warning(self, "Ошибка", "Неизвестная роль пользователя.")
-
-            else:
-                # Получаем сообщение об ошибке из ответа сервера
-                error_message = response.json().get("message", "Неизвестная ошибка")
-                print(f"Ошибка сервера: {error_message}")
-                QMessageBox.warning(self, "Ошибка", f"Ошибка: {error_message}")  # Выводим сообщение об ошибке
-
-        except requests.exceptions.RequestException as e:
+        self.login_button.setEnabled(False)  # Не даем отправить повторный запрос, пока идет вход
+        get_runner().submit(
+            self.fetch_user_files, login, password,
+            key="login",
+            pass_task=True,
+            on_result=self.on_login_success,
+            on_error=self.on_login_error,
+            on_progress=lambda percent, message: self.login_button.setText(message),
+            on_finished=self.on_login_finished
+        )
+
+    def fetch_user_files(self, login, password, task):
+        """
+        Выполняется в фоновом потоке: получает токен сессии и скачивает изменившиеся файлы.
+        Виджеты здесь не используются.
+
+        Returns:
+            dict: Ответ сервера на вход (token, role, info).
+        """
+        print(f"Отправка данных на сервер: логин={login}")
+        task.report(10, "Вход...")
+        # Отправляем POST-запрос на сервер для аутентификации и получения токена
+        response = requests.post(
+            LOGIN_URL,
+            json={"message": [login, password]},
+            timeout=5  # Устанавливаем тайм-аут для запроса
+        )
+        if response.status_code != 200:
+            raise LoginError(response.json().get("message", "Неизвестная ошибка"))
+        session = response.json()
+        task.check_cancelled()
+
+        # Передаем версии уже скачанных файлов: сервер отдаст только изменившиеся
+        task.report(40, "Загрузка данных...")
+        dbs_dir = os.path.join(os.getcwd(), DBS_DIR)
+        response = requests.post(
+            SYNC_URL,
+            headers={"Authorization": f"Bearer {session['token']}"},
+            json={"versions": load_versions(login, dbs_dir)},
+            timeout=5
+        )
+        if response.status_code != 200:
+            raise LoginError(response.json().get("message", "Неизвестная ошибка"))
+        print("Авторизация успешна.")
+
+        if response.headers.get("Content-Type", "").startswith("application/zip"):
+            # Распаковываем изменившиеся файлы прямо из ответа, без промежуточного архива на диске
+            task.report(80, "Распаковка...")
+            versions = extract_changed(response.content, dbs_dir)
+            print(f"Обновленные файлы распакованы в {dbs_dir}")
+        else:
+            versions = response.json().get("versions", {})
+            print("Локальные файлы актуальны, скачивание не требуется")
+        save_versions(login, versions, dbs_dir)
+        return session
+
+    def on_login_success(self, session):
+        """Открывает интерфейс пользователя после успешного входа (в потоке интерфейса)."""
+        self.token = session["token"]
+        self.role = session.get("role")
+        self.user_info = session.get("info")
+
+        # Получаем роль пользователя
+        login = self.login
+        role = self.role or self.get_user_role(login)
+        if role == "student":
+            # Запускаем интерфейс студента
+            self.open_student_interface(login)
+        elif role == "teacher":
+            # Запускаем интерфейс учителя
+            self.open_teacher_interface(login)
+        elif role == "admin":
+            # Запускаем интерфейс администратора (если есть)
+            self.open_admin_interface(login)
+        else:
+            QMessageBox.warning(self, "Ошибка", "Неизвестная роль пользователя.")
+
+    def on_login_error(self, error):
+        """Показывает ошибку входа (в потоке интерфейса)."""
+        if isinstance(error, LoginError):
+            # Сообщение об ошибке из ответа сервера
+            print(f"Ошибка сервера: {error}")
+            QMessageBox.warning(self, "Ошибка", f"Ошибка: {error}")  # Выводим сообщение об ошибке
+        elif isinstance(error, requests.exceptions.RequestException):
             # Обрабатываем исключения, связанные с запросами к серверу
-            print(f"Ошибка подключения к серверу: {e}")
-            QMessageBox.critical(self, "Ошибка", f"Ошибка подключения к серверу: {e}")  # Выводим сообщение об ошибке подключения
+            print(f"Ошибка подключения к серверу: {error}")
+            QMessageBox.critical(self, "Ошибка", f"Ошибка подключения к серверу: {error}")  # Выводим сообщение об ошибке подключения
+        else:
+            QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке данных: {error}")
+
+    def on_login_finished(self):
+        """Возвращает кнопку входа в исходное состояние."""
+        self.login_button.setText('Войти')
+        self.login_button.setEnabled(True)
 
     def get_user_role(self, login):
         """
         Получает роль пользователя из базы данных.
         """
+        conn = None
         try:
             conn = sq.connect('logins.db')
             cur = conn.cursor()
@@ -192,7 +240,7 @@ class LoginWindow(QWidget):
         class_name = self.get_user_class(login)
         if class_name:
             self.close()  # Закрываем окно входа
-            self.teacher_interface = TeacherInterface(login, class_name)  # Создаем экземпляр интерфейса учителя
+            self.teacher_interface = TeacherInterface(login, class_name, self.token)  # Создаем экземпляр интерфейса учителя
             self.teacher_interface.show()  # Отображаем интерфейс учителя
         else:
             QMessageBox.warning(self, "Ошибка", "Не удалось определить класс учителя.")
@@ -208,6 +256,9 @@ class LoginWindow(QWidget):
         """
         Получает класс пользователя из базы данных.
         """
+        if self.user_info:
+            return self.user_info  # Сервер уже сообщил класс при входе
+        conn = None
         try:
             conn = sq.connect('logins.db')
             cur = conn.cursor()
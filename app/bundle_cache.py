@@ -0,0 +1,63 @@
+import os
+import io
+import json
+import zipfile
+
+DBS_DIR = "dbs"  # Папка с локальными копиями баз
+MANIFEST_FILE = "manifest.json"  # Версии файлов, уже лежащих в папке баз
+VERSIONS_MEMBER = "versions.json"  # Служебный файл с версиями в архиве /sync
+
+def _manifest_path(dbs_dir):
+    return os.path.join(dbs_dir, MANIFEST_FILE)
+
+def load_versions(login, dbs_dir=DBS_DIR):
+    """
+    Возвращает версии локальных файлов пользователя для запроса /sync.
+    Если папку баз заполнял другой пользователь или файла уже нет, версия не передается,
+    и сервер отдаст файл заново.
+    """
+    try:
+        with open(_manifest_path(dbs_dir), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(manifest, dict) or manifest.get("login") != login:
+        return {}
+    versions = manifest.get("versions") or {}
+    return {name: ver for name, ver in versions.items() if os.path.exists(os.path.join(dbs_dir, name))}
+
+def save_versions(login, versions, dbs_dir=DBS_DIR):
+    """Сохраняет версии локальных файлов; файл заменяется целиком, чтобы не остаться недописанным."""
+    os.makedirs(dbs_dir, exist_ok=True)
+    path = _manifest_path(dbs_dir)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"login": login, "versions": versions}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def extract_changed(content, dbs_dir=DBS_DIR):
+    """
+    Распаковывает архив /sync из памяти в папку баз.
+    Каждый файл сначала пишется во временный и затем заменяет старый, чтобы прерванная
+    распаковка не оставила испорченную базу с прежней версией в манифесте.
+
+    Returns:
+        dict: Версии файлов из versions.json или пустой словарь.
+    """
+    os.makedirs(dbs_dir, exist_ok=True)
+    versions = {}
+    with zipfile.ZipFile(io.BytesIO(content)) as zipf:
+        for name in zipf.namelist():
+            if name == VERSIONS_MEMBER:
+                versions = json.loads(zipf.read(name))
+                continue
+            target = os.path.join(dbs_dir, os.path.basename(name))
+            tmp_path = target + ".tmp"
+            with zipf.open(name) as src, open(tmp_path, "wb") as dst:
+                while True:
+                    chunk = src.read(64 * 1024)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+            os.replace(tmp_path, target)
+    return versions
@@ -0,0 +1,61 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+
+MAX_DAYS = 64  # Сколько собранных дней хранить в памяти
+
+def files_version(paths):
+    """
+    Метка версии локальных баз по времени изменения и размеру файлов.
+    Файлы обновляются заменой при синхронизации, поэтому любое обновление меняет метку,
+    а проверка не требует открывать базы.
+    """
+    version = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            version.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            version.append((path, None, None))
+    return tuple(version)
+
+class DayCache:
+    """
+    Потокобезопасный LRU-кэш собранных дней (расписание, домашнее задание, оценки).
+    Запись действительна, пока не изменилась версия баз, из которых она собрана,
+    и не истек ее срок (для данных, полученных с сервера).
+    """
+    def __init__(self, max_days=MAX_DAYS):
+        self.max_days = max_days
+        self._lock = threading.Lock()
+        self._days = OrderedDict()  # {ключ: (версия, срок годности или None, данные дня)}
+
+    def get(self, key, version):
+        """Возвращает данные дня или None, если их нет или они устарели."""
+        with self._lock:
+            entry = self._days.get(key)
+            if entry is None:
+                return None
+            entry_version, expires, view = entry
+            if entry_version != version or (expires is not None and expires <= time.monotonic()):
+                del self._days[key]
+                return None
+            self._days.move_to_end(key)
+            return view
+
+    def put(self, key, version, view, ttl=None):
+        """Сохраняет данные дня; ttl - срок годности в секундах."""
+        expires = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._days[key] = (version, expires, view)
+            self._days.move_to_end(key)
+            while len(self._days) > self.max_days:
+                self._days.popitem(last=False)
+
+    def contains(self, key, version):
+        return self.get(key, version) is not None
+
+    def clear(self):
+        with self._lock:
+            self._days.clear()
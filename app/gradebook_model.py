@@ -0,0 +1,134 @@
+import datetime
+import requests
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from task_runner import get_runner
+
+WINDOW_DAYS = 14  # Сколько дат загружается за один запрос
+CACHE_WINDOWS = 12  # Сколько окон дат хранить в памяти
+
+def fetch_gradebook(server_url, token, class_name, lesson=None, start=None, end=None):
+    """
+    Выполняется в фоновом потоке: запрашивает журнал класса у сервера.
+    Без lesson возвращает учеников и предметы, с lesson - оценки за окно дат.
+    """
+    params = {"class_name": class_name}
+    if lesson:
+        params.update(lesson=lesson, start=start.isoformat(), end=end.isoformat())
+    response = requests.get(f"{server_url}/gradebook", params=params,
+                            headers={"Authorization": f"Bearer {token}"}, timeout=5)
+    if response.status_code != 200:
+        raise RuntimeError(response.json().get("message", "Неизвестная ошибка"))
+    return response.json()
+
+def school_year_range(day):
+    """Первый и последний день учебного года (1 сентября - 31 августа), в который входит day."""
+    year = day.year if day.month >= 9 else day.year - 1
+    return datetime.date(year, 9, 1), datetime.date(year + 1, 8, 31)
+
+class GradebookModel(QAbstractTableModel):
+    """
+    Журнал учителя по одному предмету: строки - ученики, столбцы - даты.
+
+    Оценки запрашиваются у сервера окнами по WINDOW_DAYS дат, когда столбцы окна
+    впервые попадают в видимую область; полученные окна кэшируются. Пока окно
+    загружается, его ячейки пусты.
+    """
+    def __init__(self, server_url, token, class_name, lesson, students, start, end, parent=None):
+        super().__init__(parent)
+        self.server_url = server_url
+        self.token = token
+        self.class_name = class_name
+        self.lesson = lesson
+        self.students = students  # [{login, name}]
+        self.start = start
+        self.days = (end - start).days + 1
+        self._windows = OrderedDict()  # {номер окна: {login: {дата: оценка}}}
+        self._pending = {}  # {номер окна: задача}: окна, которые сейчас загружаются
+        self._released = False  # Модель заменена: результаты загрузок больше не нужны
+
+    def column_date(self, column):
+        return self.start + datetime.timedelta(days=column)
+
+    def column_of(self, day):
+        """Номер столбца даты (с ограничением диапазоном журнала)."""
+        return max(0, min(self.days - 1, (day - self.start).days))
+
+    def _window_range(self, number):
+        first = number * WINDOW_DAYS
+        last = min(self.days, first + WINDOW_DAYS) - 1
+        return first, last
+
+    def _request_window(self, number):
+        """Запускает загрузку окна дат, если его еще нет и оно не загружается."""
+        if number in self._pending:
+            return
+        first, last = self._window_range(number)
+        self._pending[number] = get_runner().submit(
+            fetch_gradebook, self.server_url, self.token, self.class_name, self.lesson,
+            self.column_date(first), self.column_date(last),
+            on_result=lambda data, n=number: self._on_window(n, data.get("marks", {})),
+            on_error=lambda e, n=number: self._on_window_error(n, e)
+        )
+
+    def _on_window(self, number, marks):
+        if self._released:
+            return
+        self._pending.pop(number, None)
+        self._windows[number] = marks
+        while len(self._windows) > CACHE_WINDOWS:
+            self._windows.popitem(last=False)
+        if self.students:
+            first, last = self._window_range(number)
+            self.dataChanged.emit(self.index(0, first), self.index(len(self.students) - 1, last))
+
+    def _on_window_error(self, number, error):
+        if self._released:
+            return
+        self._pending.pop(number, None)
+        print(f"Ошибка загрузки журнала: {error}")
+
+    def release(self):
+        """Отменяет загрузки окон перед удалением модели: их результаты больше некуда показывать."""
+        self._released = True
+        for task in self._pending.values():
+            task.cancel()
+        self._pending.clear()
+
+    def invalidate(self):
+        """Сбрасывает загруженные окна: они будут запрошены заново при отображении."""
+        self._windows.clear()
+        if self.students and self.days:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self.students) - 1, self.days - 1))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.students)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.days
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role != Qt.DisplayRole:
+            return None
+        number = index.column() // WINDOW_DAYS
+        window = self._windows.get(number)
+        if window is None:
+            self._request_window(number)
+            return ""
+        self._windows.move_to_end(number)
+        login = self.students[index.row()]["login"]
+        return window.get(login, {}).get(self.column_date(index.column()).isoformat(), "")
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.column_date(section).strftime("%d.%m")
+        return self.students[section]["name"] or self.students[section]["login"]
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable  # Ячейки только для чтения
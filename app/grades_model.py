@@ -0,0 +1,118 @@
+import sqlite3
+from collections import OrderedDict
+from PyQt5.QtCore import Qt, QAbstractTableModel, QModelIndex
+from marks_files import open_marks_db, marks_columns
+
+BATCH_ROWS = 64  # Сколько строк добавляется в модель при прокрутке к концу
+BLOCK_ROWS = 64  # Размер блока строк, читаемого из базы за один запрос
+CACHE_BLOCKS = 8  # Сколько блоков хранить в памяти
+
+class MarksTableModel(QAbstractTableModel):
+    """
+    Модель таблицы оценок ученика поверх локальной базы (таблица marks: Дата и столбцы предметов).
+
+    Строки читаются из базы блоками по мере прокрутки, в памяти держится
+    ограниченное число последних блоков, поэтому открытие вкладки не зависит
+    от числа дней и предметов.
+    """
+    def __init__(self, db_path, parent=None):
+        super().__init__(parent)
+        self.db_path = db_path
+        self._conn = None
+        self._columns = []  # Названия столбцов: Дата и предметы
+        self._total = 0  # Число строк в базе
+        self._loaded = 0  # Сколько строк уже показано в модели
+        self._blocks = OrderedDict()  # {номер блока: [строки]}
+        self._load_meta()
+
+    def _connect(self):
+        if self._conn is None:
+            self._conn = open_marks_db(self.db_path)
+        return self._conn
+
+    def _load_meta(self):
+        """Читает названия столбцов и число строк; сами строки не загружаются."""
+        try:
+            conn = self._connect()
+            self._columns = marks_columns(conn)
+            self._total = conn.execute("SELECT COUNT(*) FROM marks").fetchone()[0] if self._columns else 0
+        except sqlite3.Error as e:
+            print(f"Ошибка базы данных: {e}")
+            self._columns, self._total = [], 0
+        self._loaded = min(self._total, BATCH_ROWS)
+        self._blocks.clear()
+
+    def _block(self, number):
+        """Возвращает блок строк, читая его из базы при промахе кэша."""
+        rows = self._blocks.get(number)
+        if rows is not None:
+            self._blocks.move_to_end(number)
+            return rows
+        try:
+            rows = self._connect().execute("SELECT * FROM marks ORDER BY Дата LIMIT ? OFFSET ?",
+                                           (BLOCK_ROWS, number * BLOCK_ROWS)).fetchall()
+        except sqlite3.Error as e:
+            print(f"Ошибка базы данных: {e}")
+            rows = []
+        self._blocks[number] = rows
+        if len(self._blocks) > CACHE_BLOCKS:
+            self._blocks.popitem(last=False)
+        return rows
+
+    def refresh(self):
+        """Перечитывает базу после ее обновления."""
+        self.beginResetModel()
+        # Синхронизация заменяет файл целиком: старое соединение продолжало бы читать прежний файл
+        self.close()
+        self._load_meta()
+        self.endResetModel()
+
+    def close(self):
+        """Закрывает соединение с базой."""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._loaded < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        """Добавляет в модель следующую порцию строк, когда представление прокручено к концу."""
+        if parent.isValid():
+            return
+        count = min(BATCH_ROWS, self._total - self._loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self._loaded, self._loaded + count - 1)
+        self._loaded += count
+        self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.TextAlignmentRole:
+            return Qt.AlignCenter
+        if role != Qt.DisplayRole:
+            return None
+        rows = self._block(index.row() // BLOCK_ROWS)
+        offset = index.row() % BLOCK_ROWS
+        if offset >= len(rows):
+            return ""
+        value = rows[offset][index.column()]
+        return str(value) if value is not None else ""
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self._columns[section] if section < len(self._columns) else None
+        return str(section + 1)
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable  # Ячейки только для чтения
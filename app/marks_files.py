@@ -0,0 +1,46 @@
+import os
+import sqlite3
+from urllib.request import pathname2url
+
+# Чтение файлов оценок учеников (<класс>/<логин>.db, таблица marks: Дата и столбцы предметов).
+# Клиент только читает эти файлы: обновления приходят заменой файла при синхронизации.
+
+def open_marks_db(db_path):
+    """Открывает файл оценок только для чтения (отсутствующий файл не создается)."""
+    uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+    return sqlite3.connect(uri, uri=True)
+
+def marks_columns(conn):
+    """Возвращает названия столбцов таблицы marks: Дата и предметы."""
+    return [col[1] for col in conn.execute("PRAGMA table_info(marks)")]
+
+def read_marks(db_path, start_date=None, end_date=None):
+    """
+    Читает оценки ученика, при необходимости за диапазон дат (YYYY-MM-DD, включительно).
+
+    Returns:
+        tuple: (предметы, строки), где строка - (дата, значения по предметам).
+    """
+    conn = open_marks_db(db_path)
+    try:
+        columns = marks_columns(conn)
+        if not columns:
+            return [], []
+        query = "SELECT * FROM marks"
+        args = []
+        if start_date and end_date:
+            query += " WHERE Дата BETWEEN ? AND ?"
+            args = [start_date, end_date]
+        return columns[1:], [(row[0], row[1:]) for row in conn.execute(query, args)]
+    finally:
+        conn.close()
+
+def read_class_list(class_list_db):
+    """Возвращает учеников класса: [(логин, "Фамилия Имя Отчество")]."""
+    conn = open_marks_db(class_list_db)
+    try:
+        return [(login, " ".join(part for part in (surname, name, patronymic) if part))
+                for name, surname, patronymic, login in conn.execute(
+                    "SELECT Name, Surname, Patronymic, Login FROM class_list ORDER BY Surname, Name")]
+    finally:
+        conn.close()
@@ -0,0 +1,224 @@
+import os
+import sys
+import csv
+import datetime
+import warnings
+import numpy as np
+from marks_files import read_marks, read_class_list
+
+GRADE_VALUES = {"1": 1, "2": 2, "3": 3, "4": 4, "5": 5}  # Значения ячеек, считающиеся оценками
+ABSENT_MARKS = ("н", "Н", "нб")  # Отметки об отсутствии на уроке
+ROUND_THRESHOLD = 0.5  # Дробная часть среднего, начиная с которой итоговая оценка округляется вверх
+
+def school_year_quarters(year):
+    """Четверти учебного года, начинающегося 1 сентября year: [(название, начало, конец)]."""
+    return [
+        ("I", datetime.date(year, 9, 1), datetime.date(year, 10, 31)),
+        ("II", datetime.date(year, 11, 1), datetime.date(year, 12, 31)),
+        ("III", datetime.date(year + 1, 1, 1), datetime.date(year + 1, 3, 31)),
+        ("IV", datetime.date(year + 1, 4, 1), datetime.date(year + 1, 5, 31)),
+    ]
+
+class MarksCube:
+    """
+    Оценки группы учеников (класса или всей школы) в массивах ученики × дни × предметы:
+    values - числовые оценки (NaN, если оценки нет), absent - отметки об отсутствии.
+    """
+    def __init__(self, start, end, lessons, students):
+        self.start = start
+        self.days = (end - start).days + 1
+        self.lessons = list(lessons)
+        self.lesson_index = {lesson: i for i, lesson in enumerate(self.lessons)}
+        self.logins = [login for login, _, _ in students]
+        self.names = [name for _, name, _ in students]
+        self.classes = [class_name for _, _, class_name in students]
+        # Номер класса каждого ученика: по нему считаются классные места и пропуски
+        self.class_names, self.class_codes = np.unique(np.array(self.classes, dtype=object).astype(str),
+                                                       return_inverse=True)
+        shape = (len(students), self.days, len(self.lessons))
+        self.values = np.full(shape, np.nan, dtype=np.float32)
+        self.absent = np.zeros(shape, dtype=bool)
+
+    def day_range(self, start, end):
+        """Срез оси дней для периода (с ограничением диапазоном массива)."""
+        first = max(0, (start - self.start).days)
+        last = min(self.days, (end - self.start).days + 1)
+        return slice(first, max(first, last))
+
+    def fill(self, student, lessons, rows):
+        """Переносит строки файла ученика (дата, значения по предметам) в массивы."""
+        if not rows or not lessons:
+            return
+        dates = np.array([row[0] for row in rows], dtype="datetime64[D]")
+        offsets = (dates - np.datetime64(self.start, "D")).astype(np.int64)
+        keep = (offsets >= 0) & (offsets < self.days)
+        if not keep.any():
+            return
+        cells = np.array([row[1] for row in rows], dtype=object)[keep].astype(str)
+        values = np.full(cells.shape, np.nan, dtype=np.float32)
+        for text, value in GRADE_VALUES.items():
+            values[cells == text] = value
+        columns = np.array([self.lesson_index[lesson] for lesson in lessons])
+        days = offsets[keep][:, None]
+        self.values[student, days, columns[None, :]] = values
+        self.absent[student, days, columns[None, :]] = np.isin(cells, ABSENT_MARKS)
+
+def load_cube(classes, start, end, lessons=None):
+    """
+    Читает файлы оценок учеников нескольких классов за период.
+
+    Args:
+        classes: Список пар (название класса, папка класса с class_list.db и <логин>.db).
+        start, end: Границы периода (datetime.date).
+        lessons: Порядок предметов; по умолчанию - все предметы в порядке появления.
+
+    Returns:
+        MarksCube
+    """
+    students, files = [], []
+    for class_name, class_dir in classes:
+        for login, name in read_class_list(os.path.join(class_dir, "class_list.db")):
+            db_path = os.path.join(class_dir, f"{login}.db")
+            if not os.path.exists(db_path):
+                print(f"Файл ученика {login} не найден, пропуск")
+                continue
+            students.append((login, name, class_name))
+            files.append(read_marks(db_path, start.isoformat(), end.isoformat()))
+    if lessons is None:
+        lessons = list(dict.fromkeys(lesson for file_lessons, _ in files for lesson in file_lessons))
+    cube = MarksCube(start, end, lessons, students)
+    for student, (file_lessons, rows) in enumerate(files):
+        known = [i for i, lesson in enumerate(file_lessons) if lesson in cube.lesson_index]
+        if len(known) < len(file_lessons):  # Предметы вне заданного списка отбрасываются
+            rows = [(date, [row[i] for i in known]) for date, row in rows]
+        cube.fill(student, [file_lessons[i] for i in known], rows)
+    return cube
+
+def load_class(students_dir, class_name, start, end, lessons=None):
+    """Читает оценки одного класса."""
+    return load_cube([(class_name, os.path.join(students_dir, class_name))], start, end, lessons)
+
+def load_school(students_dir, start, end, lessons=None):
+    """Читает оценки всех классов школы."""
+    classes = [(name, os.path.join(students_dir, name)) for name in sorted(os.listdir(students_dir))
+               if os.path.exists(os.path.join(students_dir, name, "class_list.db"))]
+    return load_cube(classes, start, end, lessons)
+
+def round_marks(averages, threshold=ROUND_THRESHOLD):
+    """Итоговые оценки из средних: вверх, если дробная часть не меньше threshold; NaN сохраняется."""
+    base = np.floor(averages)
+    return base + ((averages - base) >= threshold - 1e-6)
+
+def rank_scores(scores):
+    """
+    Места по убыванию баллов вдоль последней оси (равные баллы делят место: 1, 2, 2, 4).
+    У учеников без баллов место 0.
+    """
+    above = (scores[..., None, :] > scores[..., :, None]).sum(axis=-1)
+    return np.where(np.isnan(scores), 0, above + 1).astype(np.int32)
+
+def build_report(cube, periods, threshold=ROUND_THRESHOLD):
+    """
+    Считает итоги по периодам для всех учеников сразу.
+
+    Returns:
+        dict: Массивы формы периоды × ученики × предметы (averages, counts, marks, absences,
+        missing), периоды × ученики (score, missing_count), годовые оценки из оценок
+        за периоды (year_marks: ученики × предметы, year_score: ученики) и места
+        (class_rank, school_rank: периоды и год × ученики).
+    """
+    shape = (len(periods), len(cube.logins), len(cube.lessons))
+    sums = np.zeros(shape, dtype=np.float64)
+    counts = np.zeros(shape, dtype=np.int32)
+    absences = np.zeros(shape, dtype=np.int32)
+    for p, (_, start, end) in enumerate(periods):
+        days = cube.day_range(start, end)
+        block = cube.values[:, days, :]
+        counts[p] = np.count_nonzero(~np.isnan(block), axis=1)
+        sums[p] = np.nansum(block, axis=1)
+        absences[p] = cube.absent[:, days, :].sum(axis=1)
+    averages = np.divide(sums, counts, out=np.full(shape, np.nan), where=counts > 0)
+    marks = round_marks(averages, threshold)
+
+    # Предмет считается пройденным в периоде, если по нему есть оценки у кого-то из класса;
+    # ученик без оценок по такому предмету не аттестован
+    class_counts = np.zeros((len(periods), len(cube.class_names), len(cube.lessons)), dtype=np.int32)
+    np.add.at(class_counts, (slice(None), cube.class_codes), counts)
+    missing = (class_counts[:, cube.class_codes, :] > 0) & (counts == 0)
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # Среднее пустого среза - NaN, это ожидаемо
+        score = np.nanmean(averages, axis=2) if cube.lessons else np.full(shape[:2], np.nan)
+        # Годовая оценка выводится из оценок за периоды, а не из всех отметок года
+        year_marks = round_marks(np.nanmean(marks, axis=0), threshold)
+        year_score = np.nanmean(score, axis=0)  # Для мест - без округления, чтобы было меньше равных
+
+    # Места считаются по каждому периоду и по году (последняя строка)
+    scores = np.vstack([score, year_score[None, :]])
+    class_rank = np.zeros(scores.shape, dtype=np.int32)
+    for code in range(len(cube.class_names)):
+        members = cube.class_codes == code
+        class_rank[:, members] = rank_scores(scores[:, members])
+    return {
+        "averages": averages, "counts": counts, "marks": marks, "absences": absences,
+        "missing": missing, "missing_count": missing.sum(axis=2),
+        "score": score, "year_marks": year_marks, "year_score": year_score,
+        "class_rank": class_rank, "school_rank": rank_scores(scores),
+    }
+
+def _cell(value):
+    return "" if np.isnan(value) else f"{value:g}"
+
+def write_report_cards(cube, periods, report, out_dir):
+    """
+    Записывает табели всех учеников: по одному CSV на класс, строка - ученик и предмет,
+    затем строка итогов ученика. Кодировка utf-8-sig открывается в Excel без настройки.
+
+    Returns:
+        list: Пути к созданным файлам.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    names = [name for name, _, _ in periods]
+    header = (["Класс", "Ученик", "Предмет"] + [f"{n} среднее" for n in names] + [f"{n} оценка" for n in names]
+              + ["Годовая", "Пропуски", "Не аттестован", "Место в классе", "Место в школе"])
+    paths = []
+    for code, class_name in enumerate(cube.class_names):
+        path = os.path.join(out_dir, f"report_{class_name}.csv")
+        members = np.flatnonzero(cube.class_codes == code)
+        with open(path, "w", newline="", encoding="utf-8-sig") as f:
+            writer = csv.writer(f, delimiter=";")
+            writer.writerow(header)
+            for s in members:
+                student = cube.names[s] or cube.logins[s]
+                for l, lesson in enumerate(cube.lessons):
+                    writer.writerow(
+                        [class_name, student, lesson]
+                        + [f"{report['averages'][p, s, l]:.2f}" if report['counts'][p, s, l] else ""
+                           for p in range(len(periods))]
+                        + [_cell(report['marks'][p, s, l]) for p in range(len(periods))]
+                        + [_cell(report['year_marks'][s, l]), int(report['absences'][:, s, l].sum()),
+                           ", ".join(names[p] for p in range(len(periods)) if report['missing'][p, s, l]), "", ""])
+                writer.writerow(
+                    [class_name, student, "Итого"]
+                    + [_cell(round(float(report['score'][p, s]), 2)) for p in range(len(periods))]
+                    + [""] * len(periods)
+                    + [_cell(round(float(report['year_score'][s]), 2)), int(report['absences'][:, s, :].sum()), int(report['missing_count'][:, s].sum()),
+                       int(report['class_rank'][-1, s]), int(report['school_rank'][-1, s])])
+        paths.append(path)
+    return paths
+
+if __name__ == '__main__':
+    # python report_engine.py <папка students_dbs> <год начала учебного года> <папка табелей> [класс ...]
+    if len(sys.argv) < 4:
+        print("Использование: report_engine.py <students_dbs> <год> <папка табелей> [класс ...]")
+        sys.exit(1)
+    students_dir, year, out_dir = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    quarters = school_year_quarters(year)
+    start, end = quarters[0][1], quarters[-1][2]
+    if len(sys.argv) > 4:
+        cube = load_cube([(name, os.path.join(students_dir, name)) for name in sys.argv[4:]], start, end)
+    else:
+        cube = load_school(students_dir, start, end)
+    report = build_report(cube, quarters)
+    for path in write_report_cards(cube, quarters, report, out_dir):
+        print(f"Табель записан: {path}")
@@ -2,12 +2,15 @@ import sys
 import datetime
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QScrollArea, QFrame,
-    QSizePolicy, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView
+    QSizePolicy, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QTableView
 )
 from PyQt5.QtGui import QFont, QIcon, QColor
 from PyQt5.QtCore import Qt
 import sqlite3
 import os
+from task_runner import get_runner  # Фоновое чтение баз
+from grades_model import MarksTableModel  # Ленивая модель таблицы оценок
+from day_cache import DayCache, files_version  # Кэш собранных дней
 
 class StudentInterface(QWidget):
     """
@@ -25,6 +28,8 @@ class StudentInterface(QWidget):
         self.login = login  # Логин студента (используется для доступа к базе данных с оценками)
         self.class_name = class_name  # Название класса (не используется в текущей реализации, но может быть полезно)
         self.current_date = datetime.date.today()  # Текущая дата, используемая для отображения расписания и ДЗ
+        self.grades_model = None  # Модель таблицы оценок (создается при первом обновлении)
+        self.day_cache = DayCache()  # Собранные дни для мгновенного переключения дат
         self.initUI()  # Инициализация пользовательского интерфейса
         self.update_date_display()  # Обновление отображения даты
         self.update_schedule_homework()  # Объединенное обновление расписания и домашнего задания (вызывается сразу)
@@ -214,12 +219,59 @@ class StudentInterface(QWidget):
     def update_schedule_homework(self):
         """
         Обновляет таблицу расписания и домашнего задания на основе текущей даты.
-        Сочетает расписание и домашнее задание в одной таблице.
-        Также получает и отображает оценки.
+        Данные читаются в фоновом потоке; при быстром переключении дат
+        предыдущая незавершенная загрузка отменяется.
+        """
+        cached = self.day_cache.get(self.current_date, files_version(self.day_files()))
+        if cached is not None:
+            self.show_schedule_homework(cached)  # День уже собран: показываем без обращения к базам
+        else:
+            get_runner().submit(
+                self.load_day, self.current_date,
+                key=(id(self), "day"),
+                on_result=self.show_schedule_homework,
+                on_error=lambda e: print(f"Ошибка загрузки данных дня: {e}")
+            )
+        self.prefetch_neighbours()
+
+    def prefetch_neighbours(self):
+        """Заранее собирает в фоновом потоке предыдущий и следующий день."""
+        for delta in (-1, 1):
+            get_runner().submit(
+                self.load_day, self.current_date + datetime.timedelta(days=delta),
+                key=(id(self), "prefetch", delta),
+                on_error=lambda e: print(f"Ошибка загрузки данных дня: {e}")
+            )
+
+    def day_files(self):
+        """Локальные базы, из которых собирается день."""
+        return ["dbs/time_table.db", "dbs/home_works.db", f"dbs/{self.login}.db"]
+
+    def load_day(self, day):
+        """
+        Возвращает данные дня из кэша, а если их нет или базы изменились - читает и кэширует.
+        Выполняется в фоновом потоке.
+        """
+        version = files_version(self.day_files())
+        view = self.day_cache.get(day, version)
+        if view is None:
+            view = self.read_day(day)
+            self.day_cache.put(day, version, view)
+        return view
+
+    def read_day(self, day):
+        """
+        Читает расписание, домашнее задание и оценки на дату.
+
+        Args:
+            day (datetime.date): Дата.
+
+        Returns:
+            dict: {date, schedule, homework, grades}.
         """
         # Получаем расписание
         days_week =['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        to_day =self.current_date.weekday() # Получаем номер дня недели (0 - понедельник, 6 - воскресенье)
+        to_day =day.weekday() # Получаем номер дня недели (0 - понедельник, 6 - воскресенье)
         way = f"dbs/time_table.db" # Путь к базе данных с расписанием
         con = sqlite3.connect(way) # Подключаемся к базе данных
         cur = con.cursor() # Создаем курсор для выполнения запросов
@@ -230,7 +282,7 @@ class StudentInterface(QWidget):
         con.close() # Закрываем подключение к базе данных
 
         # Получаем домашнее задание
-        date_str = self.current_date.strftime("%Y-%m-%d") # Форматируем дату в строку для запроса
+        date_str = day.strftime("%Y-%m-%d") # Форматируем дату в строку для запроса
         way = f"dbs/home_works.db" # Путь к базе данных с домашними заданиями
         con = sqlite3.connect(way) # Подключаемся к базе данных
         cur = con.cursor() # Создаем курсор
@@ -248,6 +300,16 @@ class StudentInterface(QWidget):
 
         # Получаем оценки
         grades = self.get_grades_for_date(date_str) # Получаем оценки для текущей даты
+        return {"date": day, "schedule": schedule, "homework": homework, "grades": grades}
+
+    def show_schedule_homework(self, data):
+        """
+        Заполняет таблицу расписания, домашнего задания и оценок (в потоке интерфейса).
+        Сочетает расписание и домашнее задание в одной таблице.
+        """
+        if data["date"] != self.current_date:
+            return  # Пользователь уже перешел на другую дату
+        schedule, homework, grades = data["schedule"], data["homework"], data["grades"]
 
         # Объединяем расписание и домашнее задание
         num_rows = len(schedule) # Количество уроков в расписании
@@ -317,7 +379,8 @@ class StudentInterface(QWidget):
             lesson_names = [col[1] for col in columns_info if col[1] != "Дата"]  # Извлекаем названия предметов
 
             # Формируем SQL-запрос для получения оценок
-            select_columns = ", ".join(lesson_names)  # Составляем строку с названиями столбцов для запроса
+            # Названия предметов экранируются: в них бывают пробелы ("Русский язык")
+            select_columns = ", ".join('"' + name.replace('"', '""') + '"' for name in lesson_names)
             query = f"SELECT {select_columns} FROM marks WHERE Дата = ?"  # Формируем SQL-запрос
 
             # Выполняем запрос
@@ -338,33 +401,20 @@ class StudentInterface(QWidget):
     def update_grades(self):
         """
         Обновляет отображение оценок во вкладке "Оценки".
+        Таблица создается один раз; строки читаются моделью из базы по мере прокрутки.
         """
-        # Очищаем старый макет оценок
-        for i in reversed(range(self.grades_layout.count())):
-            widget = self.grades_layout.itemAt(i).widget()  # Получаем виджет
-            if widget is not None:
-                widget.deleteLater()  # Удаляем виджет
+        if self.grades_model is not None:
+            self.grades_model.refresh()  # Перечитываем базу без пересоздания таблицы
+            return
 
-        # Подключаемся к базе данных оценок студента
+        # Модель поверх базы оценок студента
         way = f"dbs/{self.login}.db" # Формируем путь к базе данных
-        con = sqlite3.connect(way)  # Подключаемся к базе данных
-        cur = con.cursor()  # Создаем курсор
-
-        # Получаем все данные об оценках
-        cur.execute("SELECT * FROM marks")  # Выполняем запрос для получения всех оценок
-        grades_data = cur.fetchall() # Получаем все данные об оценках
-        # Получаем названия столбцов (даты и названия предметов)
-        cur.execute("PRAGMA table_info(marks)") # Получаем информацию о столбцах таблицы
-        columns_info = cur.fetchall()  # Получаем информацию о столбцах
-        column_names = [col[1] for col in columns_info] # Получаем названия столбцов
-
-        con.close()  # Закрываем подключение к базе данных
+        self.grades_model = MarksTableModel(way, self)
 
         # Создаем таблицу для отображения оценок
-        grades_table = QTableWidget() # Создаем виджет таблицы
-        grades_table.setColumnCount(len(column_names))  # Устанавливаем количество столбцов
-        grades_table.setRowCount(len(grades_data))  # Устанавливаем количество строк
-        grades_table.setHorizontalHeaderLabels(column_names)  # Устанавливаем заголовки столбцов
+        grades_table = QTableView() # Создаем представление таблицы
+        grades_table.setModel(self.grades_model)
+        grades_table.verticalHeader().setVisible(False)  # Скрываем номера строк
 
         # Применяем стили к заголовкам таблицы
         header = grades_table.horizontalHeader() # Получаем заголовок таблицы
@@ -380,27 +430,18 @@ class StudentInterface(QWidget):
 
         # Применяем стили к самой таблице
         grades_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 background-color: #333333;  /* Темно-серый фон */
                 color: #FFFFFF;  /* Белый текст */
                 border: none; /* Убираем рамку */
                 font-size: 14px; /* Увеличиваем размер шрифта */
             }
         """)
-        # Заполняем таблицу данными
-        for row_index, row_data in enumerate(grades_data): # Перебираем строки с данными об оценках
-            for col_index, cell_data in enumerate(row_data):  # Перебираем ячейки в строке
-                item = QTableWidgetItem(str(cell_data) if cell_data is not None else "")  # Создаем элемент таблицы
-                item.setTextAlignment(Qt.AlignCenter)  # Выравниваем текст по центру
-                item.setFlags(item.flags() & ~Qt.ItemIsEditable)  # Делаем ячейки нередактируемыми
-                grades_table.setItem(row_index, col_index, item)  # Устанавливаем элемент в таблицу
-
-        # Настройка размера столбцов
-        header = grades_table.horizontalHeader() # Получаем заголовок таблицы
+
+        # Настройка размера столбцов: без подгонки по содержимому, чтобы не читать все строки
         header.setSectionResizeMode(QHeaderView.Stretch)  # Автоматическое изменение размера столбцов
 
         self.grades_layout.addWidget(grades_table)  # Добавляем таблицу с оценками в макет
-        grades_table.resizeColumnsToContents() # Подгоняем размер столбцов по содержимому
 
 if __name__ == '__main__':
     app = QApplication(sys.argv) # Создаем экземпляр приложения
@@ -0,0 +1,139 @@
+import threading
+import traceback
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+class TaskCancelled(Exception):
+    """Выбрасывается внутри задачи, если ее отменили, чтобы прервать работу досрочно."""
+
+class TaskSignals(QObject):
+    """
+    Сигналы задачи. Объект создается в потоке интерфейса, поэтому обработчики
+    вызываются в нем же, и из них можно менять виджеты.
+    """
+    result = pyqtSignal(object)  # Результат функции задачи
+    error = pyqtSignal(object)  # Исключение, выброшенное функцией задачи
+    progress = pyqtSignal(int, str)  # Процент выполнения и текст этапа
+    cancelled = pyqtSignal()  # Задача отменена, результат не будет передан
+    finished = pyqtSignal()  # Задача завершена любым способом
+
+class Task(QRunnable):
+    """
+    Задача для пула потоков: вызывает функцию в фоновом потоке и сообщает о результате сигналами.
+    Если функция принимает аргумент task, ей передается сама задача: через него можно
+    сообщать о ходе работы (task.report) и проверять отмену (task.check_cancelled).
+    """
+    def __init__(self, fn, args=(), kwargs=None, pass_task=False):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = dict(kwargs or {})
+        if pass_task:
+            self.kwargs["task"] = self
+        self.signals = TaskSignals()
+        self._cancel_event = threading.Event()
+        self.setAutoDelete(False)  # Задачу держит TaskRunner до получения сигнала finished
+
+    def cancel(self):
+        """Отменяет задачу: результат не будет передан, даже если функция уже выполняется."""
+        self._cancel_event.set()
+
+    def is_cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_cancelled(self):
+        """Прерывает функцию задачи, если задачу отменили."""
+        if self._cancel_event.is_set():
+            raise TaskCancelled()
+
+    def report(self, percent, message=""):
+        """Сообщает о ходе выполнения из функции задачи."""
+        if not self._cancel_event.is_set():
+            self.signals.progress.emit(percent, message)
+
+    def run(self):
+        try:
+            self.check_cancelled()
+            result = self.fn(*self.args, **self.kwargs)
+            self.check_cancelled()
+        except TaskCancelled:
+            self.signals.cancelled.emit()
+        except Exception as e:
+            if self.is_cancelled():
+                self.signals.cancelled.emit()
+            else:
+                traceback.print_exc()
+                self.signals.error.emit(e)
+        else:
+            self.signals.result.emit(result)
+        finally:
+            self.signals.finished.emit()
+
+class TaskRunner(QObject):
+    """
+    Общий исполнитель фоновых задач для окон клиента на основе QThreadPool.
+    Сетевые запросы и обращения к SQLite выполняются вне потока интерфейса,
+    а обработчики результатов вызываются в потоке интерфейса.
+    """
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        if max_threads:
+            self.pool.setMaxThreadCount(max_threads)
+        self._tasks = set()  # Запущенные задачи (иначе их объекты удалит сборщик мусора)
+        self._keyed = {}  # {ключ: задача}: последняя задача с этим ключом
+
+    def submit(self, fn, *args, key=None, pass_task=False, on_result=None, on_error=None,
+               on_progress=None, on_cancelled=None, on_finished=None, **kwargs):
+        """
+        Запускает fn(*args, **kwargs) в фоновом потоке.
+
+        Args:
+            key: Если задан, предыдущая задача с тем же ключом отменяется: например,
+                при быстром переключении дат показывается только последняя.
+            pass_task (bool): Передать функции саму задачу в аргументе task.
+            on_result, on_error, on_progress, on_cancelled, on_finished: Обработчики сигналов.
+
+        Returns:
+            Task: Запущенная задача (ее можно отменить методом cancel).
+        """
+        if key is not None:
+            previous = self._keyed.get(key)
+            if previous is not None:
+                previous.cancel()
+        task = Task(fn, args, kwargs, pass_task)
+        signals = task.signals
+        if on_result:
+            signals.result.connect(on_result)
+        if on_error:
+            signals.error.connect(on_error)
+        if on_progress:
+            signals.progress.connect(on_progress)
+        if on_cancelled:
+            signals.cancelled.connect(on_cancelled)
+        if on_finished:
+            signals.finished.connect(on_finished)
+        signals.finished.connect(lambda: self._forget(task, key))
+        self._tasks.add(task)
+        if key is not None:
+            self._keyed[key] = task
+        self.pool.start(task)
+        return task
+
+    def _forget(self, task, key):
+        self._tasks.discard(task)
+        if key is not None and self._keyed.get(key) is task:
+            del self._keyed[key]
+
+    def cancel_all(self):
+        """Отменяет все запущенные и ожидающие задачи."""
+        for task in list(self._tasks):
+            task.cancel()
+
+_runner = None
+
+def get_runner():
+    """Возвращает общий исполнитель задач (создается при первом вызове в потоке интерфейса)."""
+    global _runner
+    if _runner is None:
+        _runner = TaskRunner()
+    return _runner
@@ -2,7 +2,7 @@ import sys
 import datetime
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QHBoxLayout, QPushButton, QScrollArea, QFrame,
-    QSizePolicy, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QComboBox
+    QSizePolicy, QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView, QComboBox, QTableView
 )
 from PyQt5.QtGui import QFont, QIcon, QColor
 from PyQt5.QtCore import Qt
@@ -10,29 +10,39 @@ import sqlite3
 import os
 import requests
 import json
+from task_runner import get_runner  # Фоновое чтение баз
+from gradebook_model import GradebookModel, fetch_gradebook, school_year_range  # Журнал учителя с загрузкой окнами дат
+from day_cache import DayCache, files_version  # Кэш собранных дней
 
 SERVER_URL = 'http://127.0.0.1:5000'  # Замените на адрес вашего сервера
+DAY_GRADES_TTL = 60  # Оценки класса приходят с сервера: столько секунд собранный день считается свежим
 
 class TeacherInterface(QWidget):
     """
     Класс интерфейса учителя, отображающий расписание и оценки.
     """
-    def __init__(self, login, class_name=None):
+    def __init__(self, login, class_name=None, token=None):
         """
         Инициализация интерфейса учителя.
 
         Args:
             login (str): Логин учителя.
             class_name (str): Название класса.
+            token (str): Токен сессии для запросов к серверу.
         """
         super().__init__()
         self.login = login  # Логин учителя
+        self.token = token  # Токен сессии, полученный при входе
+        self.gradebook_students = []  # Ученики выбранного класса для журнала
+        self.gradebook_model = None  # Модель журнала по выбранному предмету
+        self.day_cache = DayCache()  # Собранные дни для мгновенного переключения дат
         self.class_name = class_name  # Название класса
         self.current_date = datetime.date.today()  # Текущая дата
         self.classes = self.get_teacher_classes()  # Получаем список классов учителя
         self.initUI()  # Инициализация пользовательского интерфейса
         self.update_date_display()  # Обновление отображения даты
         self.update_schedule_homework()  # Обновление расписания и домашнего задания
+        self.update_grades()  # Загрузка журнала выбранного класса
 
     def get_teacher_classes(self):
         """
@@ -192,7 +202,7 @@ class TeacherInterface(QWidget):
         # Grades Tab
         self.grades_tab = QWidget()
         self.grades_layout = QVBoxLayout(self.grades_tab)
-        self.update_grades()
+        self.init_grades_tab()
         self.tab_widget.addTab(self.grades_tab, "Оценки")
 
         main_layout.addWidget(self.tab_widget)
@@ -241,6 +251,7 @@ class TeacherInterface(QWidget):
         self.current_date -= datetime.timedelta(days=1)
         self.update_date_display()
         self.update_schedule_homework()
+        self.follow_school_year()
 
     def next_day(self):
         """
@@ -249,20 +260,66 @@ class TeacherInterface(QWidget):
         self.current_date += datetime.timedelta(days=1)
         self.update_date_display()
         self.update_schedule_homework()
+        self.follow_school_year()
 
     def update_schedule_homework(self):
         """
         Обновляет таблицу расписания и домашнего задания.
+        Данные читаются в фоновом потоке; предыдущая незавершенная загрузка отменяется.
         """
         if not self.class_name:
             self.schedule_homework_table.setRowCount(0)
             self.schedule_homework_table.setColumnCount(0)
             return
 
+        cached = self.day_cache.get((self.class_name, self.current_date), files_version(self.day_files(self.class_name)))
+        if cached is not None:
+            self.show_schedule_homework(cached)  # День уже собран: показываем без запросов
+        else:
+            get_runner().submit(
+                self.load_day, self.class_name, self.current_date,
+                key=(id(self), "day"),
+                on_result=self.show_schedule_homework,
+                on_error=lambda e: print(f"Ошибка загрузки данных дня: {e}")
+            )
+        self.prefetch_neighbours()
+
+    def prefetch_neighbours(self):
+        """Заранее собирает в фоновом потоке предыдущий и следующий день выбранного класса."""
+        for delta in (-1, 1):
+            get_runner().submit(
+                self.load_day, self.class_name, self.current_date + datetime.timedelta(days=delta),
+                key=(id(self), "prefetch", delta),
+                on_error=lambda e: print(f"Ошибка загрузки данных дня: {e}")
+            )
+
+    def day_files(self, class_name):
+        """Локальные базы класса, из которых собирается день."""
+        return [f"dbs/students_dbs/{class_name}/time_table.db", f"dbs/students_dbs/{class_name}/home_works.db"]
+
+    def load_day(self, class_name, day):
+        """
+        Возвращает данные дня класса из кэша, а если их нет или они устарели - собирает и кэширует.
+        Выполняется в фоновом потоке.
+        """
+        version = files_version(self.day_files(class_name))
+        view = self.day_cache.get((class_name, day), version)
+        if view is None:
+            view = self.read_day(class_name, day)
+            self.day_cache.put((class_name, day), version, view, ttl=DAY_GRADES_TTL)
+        return view
+
+    def read_day(self, class_name, day):
+        """
+        Читает расписание, домашнее задание и оценки класса на дату.
+
+        Returns:
+            dict: {class_name, date, schedule, homework, grades}.
+        """
         # Get schedule
         days_week = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        to_day = self.current_date.weekday()
-        way = f"dbs/students_dbs/{self.class_name}/time_table.db"
+        to_day = day.weekday()
+        way = f"dbs/students_dbs/{class_name}/time_table.db"
         con = sqlite3.connect(way)
         cur = con.cursor()
         cur.execute(f"SELECT {days_week[to_day]} FROM time_table")
@@ -272,8 +329,8 @@ class TeacherInterface(QWidget):
         con.close()
 
         # Get homework
-        date_str = self.current_date.strftime("%Y-%m-%d")
-        way = f"dbs/students_dbs/{self.class_name}/home_works.db"
+        date_str = day.strftime("%Y-%m-%d")
+        way = f"dbs/students_dbs/{class_name}/home_works.db"
         con = sqlite3.connect(way)
         cur = con.cursor()
         cur.execute(f"SELECT * FROM home_work WHERE Date = ?", (date_str,))
@@ -289,7 +346,16 @@ class TeacherInterface(QWidget):
                 homework[lesson_name] = homework_data[i] if homework_data[i] else ""
 
         # Get grades
-        grades = self.get_grades_for_class_and_date(self.class_name, date_str)
+        grades = self.get_grades_for_class_and_date(class_name, date_str)
+        return {"class_name": class_name, "date": day, "schedule": schedule, "homework": homework, "grades": grades}
+
+    def show_schedule_homework(self, data):
+        """
+        Заполняет таблицу расписания, домашнего задания и оценок (в потоке интерфейса).
+        """
+        if data["date"] != self.current_date or data["class_name"] != self.class_name:
+            return  # Пользователь уже выбрал другую дату или класс
+        schedule, homework, grades = data["schedule"], data["homework"], data["grades"]
 
         # Combine schedule and homework
         num_rows = len(schedule)
@@ -338,147 +404,117 @@ class TeacherInterface(QWidget):
         self.schedule_homework_table.resizeColumnsToContents()
 
     def get_grades_for_class_and_date(self, class_name, date_str):
-         grades = {}
-         way = f"dbs/students_dbs/{class_name}/class_list.db"
-         try:
-             con = sqlite3.connect(way)
-             cur = con.cursor()
-
-             # Get class list
-             cur.execute("SELECT * FROM class_list")
-             class_list = cur.fetchall()
-
-             # Get student logins
-             student_logins = [row[3] for row in class_list]
-
-             # Get lesson names
-             way = f"dbs/students_dbs/{class_name}/lesson_list.txt"
-             try:
-                 with open(way, "r", encoding="utf-8") as f:
-                     lesson_names = [line.strip() for line in f.readlines()]
-             except FileNotFoundError as e:
-                 print(f"Файл не найден: {e}")
-                 return grades  # Return empty grades if lesson list file is not found
-
-             # Get grades for each lesson from each student's database
-             for login in student_logins:
-                 way = f"dbs/students_dbs/{class_name}/{login}.db"
-                 try:
-                     con2 = sqlite3.connect(way)
-                     cur2 = con2.cursor()
-
-                     # Build query to fetch the specified columns along with the date
-                     select_columns = ", ".join(lesson_names)
-                     query = f"SELECT {select_columns} FROM marks WHERE Дата = ?"
-
-                     # Execute query
-                     cur2.execute(query, (date_str,))
-                     grade_data = cur2.fetchone()  # Fetch results
-
-                     if grade_data:
-                         # Prepare dictionary with lesson names and grades
-                         for i, lesson_name in enumerate(lesson_names):
-                             grades[lesson_name] = grade_data[i] if grade_data[i] is not None else ""
-
-                     con2.close()
-
-                 except sqlite3.Error as e:
-                     print(f"Database error: {e}")
-                 except Exception as e:
-                     print(f"Error while processing grades for student {login}: {e}")
-
-         except sqlite3.Error as e:
-             print(f"Database error: {e}")
-         finally:
-             if con:
-                 con.close()
-         return grades
+        """
+        Получает оценки класса за день одним запросом к серверу вместо чтения базы каждого ученика.
+
+        Returns:
+            dict: {урок: оценка} по всем ученикам класса.
+        """
+        grades = {}
+        try:
+            response = requests.get(
+                f"{SERVER_URL}/class_marks",
+                params={"class_name": class_name, "date": date_str},
+                headers={"Authorization": f"Bearer {self.token}"},
+                timeout=5
+            )
+            if response.status_code != 200:
+                print(f"Ошибка сервера: {response.json().get('message', 'Неизвестная ошибка')}")
+                return grades
+            for student_marks in response.json()["marks"].values():
+                grades.update(student_marks)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            print(f"Ошибка при получении оценок класса: {e}")
+        return grades
+
+    def init_grades_tab(self):
+        """
+        Создает вкладку журнала: выбор предмета и таблица ученики x даты.
+        Данные загружаются моделью с сервера по мере прокрутки.
+        """
+        lesson_layout = QHBoxLayout()
+        lesson_layout.addWidget(QLabel("Предмет:", self))
+        self.lesson_combo = QComboBox(self)
+        self.lesson_combo.currentIndexChanged.connect(self.on_lesson_changed)  # Новый предмет - новая модель журнала
+        lesson_layout.addWidget(self.lesson_combo)
+        self.grades_layout.addLayout(lesson_layout)
+
+        self.grades_table = QTableView()
+        # Apply style to the header
+        self.grades_table.horizontalHeader().setStyleSheet("""
+            QHeaderView::section {
+                background-color: #444444;
+                color: #FFFFFF;
+                border: none;
+                padding: 5px;
+                font-size: 14px; /* Increase font size */
+            }
+        """)
+        # Apply style to the table itself
+        self.grades_table.setStyleSheet("""
+            QTableView {
+                background-color: #333333;
+                color: #FFFFFF;
+                border: none;
+                font-size: 14px; /* Increase font size */
+            }
+        """)
+        self.grades_layout.addWidget(self.grades_table)
 
     def update_grades(self):
             """
-            Обновляет отображение оценок в таблице.
+            Загружает список учеников и предметов выбранного класса в фоновом потоке;
+            оценки затем запрашиваются моделью журнала окнами дат.
             """
-            # Clear existing grades layout
-            for i in reversed(range(self.grades_layout.count())):
-                widget = self.grades_layout.itemAt(i).widget()
-                if widget is not None:
-                    widget.deleteLater()
-
-            # Connect to the database of students
             if self.class_name is None:
+                 self.set_gradebook_model(None)
                  return
-            way = f"dbs/students_dbs/{self.class_name}/class_list.db"
-            con = sqlite3.connect(way)
-            cur = con.cursor()
-
-            # Fetch all students
-            cur.execute("SELECT * FROM class_list")
-            students = cur.fetchall()
-
-            # Get column names from the first student's database
-            if students:
-                student_db_path = f"dbs/students_dbs/{self.class_name}/{students[0][3]}.db"
-                con2 = sqlite3.connect(student_db_path)
-                cur2 = con2.cursor()
-                cur2.execute("PRAGMA table_info(marks)")
-                columns_info = cur2.fetchall()
-                column_names = [col[1] for col in columns_info]
-                con2.close()
-            else:
-                column_names = []
-
-            con.close()
-
-            # Create a table to display grades
-            grades_table = QTableWidget()
-            grades_table.setColumnCount(len(column_names))
-            grades_table.setRowCount(len(students))
-            grades_table.setHorizontalHeaderLabels(column_names)
-
-            # Apply style to the header
-            header = grades_table.horizontalHeader()
-            header.setStyleSheet("""
-                QHeaderView::section {
-                    background-color: #444444;
-                    color: #FFFFFF;
-                    border: none;
-                    padding: 5px;
-                    font-size: 14px; /* Increase font size */
-                }
-            """)
-            # Apply style to the table itself
-            grades_table.setStyleSheet("""
-                QTableWidget {
-                    background-color: #333333;
-                    color: #FFFFFF;
-                    border: none;
-                    font-size: 14px; /* Increase font size */
-                }
-            """)
-
-            # Fill the table with data
-            for row_index, student in enumerate(students):
-                student_db_path = f"dbs/students_dbs/{self.class_name}/{student[3]}.db"
-                con2 = sqlite3.connect(student_db_path)
-                cur2 = con2.cursor()
-
-                cur2.execute("SELECT * FROM marks")
-                grades_data = cur2.fetchall()
-
-                if grades_data:
-                    for col_index, col in enumerate(grades_data[0]):
-                        item = QTableWidgetItem(str(col) if col is not None else "")  # Replace None
-                        item.setTextAlignment(Qt.AlignCenter)
-                        item.setFlags(item.flags() & ~Qt.ItemIsEditable)  # Make cells non-editable
-                        grades_table.setItem(row_index, col_index, item)
-                con2.close()
-
-            # Set the stretch property of the horizontal header
-            header = grades_table.horizontalHeader()
-            header.setSectionResizeMode(QHeaderView.Stretch)
-
-            self.grades_layout.addWidget(grades_table)
-            grades_table.resizeColumnsToContents()
+            get_runner().submit(
+                fetch_gradebook, SERVER_URL, self.token, self.class_name,
+                key=(id(self), "gradebook"),
+                on_result=lambda data, class_name=self.class_name: self.on_gradebook_loaded(class_name, data),
+                on_error=lambda e: print(f"Ошибка загрузки журнала: {e}")
+            )
+
+    def on_gradebook_loaded(self, class_name, data):
+        """Заполняет список предметов и создает модель журнала (в потоке интерфейса)."""
+        if class_name != self.class_name:
+            return  # Пока шла загрузка, выбран другой класс
+        self.gradebook_students = data.get("students", [])
+        current = self.lesson_combo.currentText()
+        self.lesson_combo.blockSignals(True)
+        self.lesson_combo.clear()
+        self.lesson_combo.addItems(data.get("lessons", []))
+        if current:
+            self.lesson_combo.setCurrentText(current)  # Оставляем предмет учителя при смене класса
+        self.lesson_combo.blockSignals(False)
+        self.on_lesson_changed()
+
+    def on_lesson_changed(self):
+        """Создает модель журнала для выбранного класса и предмета."""
+        lesson = self.lesson_combo.currentText()
+        if not lesson or not self.class_name:
+            self.set_gradebook_model(None)
+            return
+        start, end = school_year_range(self.current_date)
+        self.set_gradebook_model(GradebookModel(
+            SERVER_URL, self.token, self.class_name, lesson, self.gradebook_students, start, end, self))
+        # Показываем окно дат вокруг текущего дня: загрузятся только видимые столбцы
+        self.grades_table.scrollTo(self.gradebook_model.index(0, self.gradebook_model.column_of(self.current_date)))
+
+    def set_gradebook_model(self, model):
+        """Показывает новую модель журнала (или никакую) и освобождает предыдущую."""
+        old_model = self.gradebook_model
+        self.gradebook_model = model
+        self.grades_table.setModel(model)
+        if old_model is not None:
+            old_model.release()
+            old_model.deleteLater()  # Модели создаются с родителем-окном и иначе копятся до его закрытия
+
+    def follow_school_year(self):
+        """Пересоздает журнал, если выбранный день перешел в другой учебный год."""
+        if self.gradebook_model is not None and school_year_range(self.current_date)[0] != self.gradebook_model.start:
+            self.on_lesson_changed()
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
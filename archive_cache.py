@@ -0,0 +1,132 @@
+import os
+import time
+import zlib
+import struct
+import hashlib
+import threading
+from collections import OrderedDict
+from db_versions import file_version, snapshot
+
+CACHE_MAX_BYTES = 64 * 1024 * 1024  # Наибольший суммарный размер готовых частей в памяти
+PART_MAX_BYTES = 16 * 1024 * 1024  # Файлы крупнее не кэшируются и отдаются обычным потоком
+
+# Форматы заголовков ZIP (те же, что в модуле zipfile)
+_LOCAL_HEADER = struct.Struct("<4s2B4HL2L2H")
+_CENTRAL_DIR = struct.Struct("<4s4B4HL2L5H2L")
+_END_OF_DIR = struct.Struct("<4s4H2LH")
+
+_STORED = 0
+_DEFLATED = 8
+_UTF8_FLAG = 0x800  # Имя файла в UTF-8 (логины могут быть на кириллице)
+
+class ArchivePart:
+    """Готовый элемент ZIP-архива: локальный заголовок и данные, а также сведения для оглавления."""
+    __slots__ = ("name", "method", "dos_time", "dos_date", "crc", "compress_size", "file_size",
+                 "external_attr", "body")
+
+    def __init__(self, name, content, method, mtime, mode=0o100644):
+        self.name = name.encode("utf-8")
+        self.method = method
+        t = time.localtime(mtime)
+        year = max(t.tm_year, 1980)
+        self.dos_time = (t.tm_hour << 11) | (t.tm_min << 5) | (t.tm_sec // 2)
+        self.dos_date = ((year - 1980) << 9) | (t.tm_mon << 5) | t.tm_mday
+        self.crc = zlib.crc32(content) & 0xFFFFFFFF
+        self.file_size = len(content)
+        if method == _DEFLATED:
+            compressor = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+            data = compressor.compress(content) + compressor.flush()
+        else:
+            data = content
+        self.compress_size = len(data)
+        self.external_attr = (mode & 0xFFFF) << 16
+        header = _LOCAL_HEADER.pack(b"PK\003\004", 20, 0, self._flags(), method, self.dos_time,
+                                    self.dos_date, self.crc, self.compress_size, self.file_size,
+                                    len(self.name), 0)
+        self.body = header + self.name + data
+
+    def _flags(self):
+        try:
+            self.name.decode("ascii")
+            return 0
+        except UnicodeDecodeError:
+            return _UTF8_FLAG
+
+    def central_dir_entry(self, offset):
+        """Запись оглавления для элемента, начинающегося со смещения offset."""
+        return _CENTRAL_DIR.pack(b"PK\001\002", 20, 3, 20, 0, self._flags(), self.method, self.dos_time,
+                                 self.dos_date, self.crc, self.compress_size, self.file_size,
+                                 len(self.name), 0, 0, 0, 0, self.external_attr, offset) + self.name
+
+def _method(compression):
+    return _DEFLATED if compression == "deflate" else _STORED
+
+def part_from_bytes(name, content, compression):
+    """Собирает элемент архива из данных в памяти (для небольших служебных файлов)."""
+    return ArchivePart(name, content, _method(compression), time.time())
+
+class ArchiveCache:
+    """
+    Ограниченный по размеру LRU-кэш готовых элементов архива.
+    Ключ - путь, метка версии базы и способ сжатия: любое изменение базы дает новый
+    ключ, а старая запись вытесняется со временем. Элемент собирается из копии базы,
+    метка которой прочитана из той же копии.
+    """
+    def __init__(self, max_bytes=CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._parts = OrderedDict()  # {ключ: ArchivePart}
+        self._size = 0
+
+    def part_key(self, path, compression):
+        """Ключ элемента для базы в ее текущем состоянии: путь, метка версии и способ сжатия."""
+        return (os.path.abspath(path), file_version(path), compression)
+
+    def get_part(self, key):
+        """
+        Возвращает (ключ, элемент). При промахе снимает копию базы; ключ тогда берется
+        из копии и может быть новее запрошенного, если база успела измениться.
+        """
+        with self._lock:
+            part = self._parts.get(key)
+            if part is not None:
+                self._parts.move_to_end(key)
+                return key, part
+        path, _, compression = key
+        version, content = snapshot(path)  # Метка и байты - из одного состояния базы
+        key = (path, version, compression)
+        part = ArchivePart(os.path.basename(path), content, _method(compression), time.time(),
+                           os.stat(path).st_mode)
+        with self._lock:
+            cached = self._parts.get(key)
+            if cached is not None:
+                return key, cached
+            self._parts[key] = part
+            self._size += len(part.body)
+            while self._size > self.max_bytes and len(self._parts) > 1:
+                _, old = self._parts.popitem(last=False)
+                self._size -= len(old.body)
+        return key, part
+
+    def clear(self):
+        """Очищает кэш."""
+        with self._lock:
+            self._parts.clear()
+            self._size = 0
+
+def bundle_etag(keys):
+    """ETag набора файлов: меняется при изменении любого из них."""
+    return hashlib.sha1(repr(sorted(keys)).encode("utf-8")).hexdigest()
+
+def stream_parts(parts):
+    """Генератор: отдает архив из готовых элементов, затем оглавление."""
+    offset = 0
+    directory = []
+    for part in parts:
+        directory.append(part.central_dir_entry(offset))
+        yield part.body
+        offset += len(part.body)
+    central = b"".join(directory)
+    yield central + _END_OF_DIR.pack(b"PK\005\006", 0, 0, len(parts), len(parts), len(central), offset, 0)
+
+archive_cache = ArchiveCache()  # Общий кэш процесса
@@ -0,0 +1,199 @@
+import os
+import io
+import sys
+import asyncio
+from urllib.parse import unquote
+from concurrent.futures import ThreadPoolExecutor
+from server import app, init_storage
+
+HOST = '127.0.0.1'
+PORT = 5000
+DB_WORKERS = 16  # Потоки для обработчиков с запросами к SQLite
+AUTH_WORKERS = os.cpu_count() or 2  # Потоки для обработчиков с bcrypt: по числу ядер
+AUTH_ROUTES = {'/login', '/add_user'}  # Маршруты, где хешируется или проверяется пароль
+MAX_CONNECTIONS = 1000  # Наибольшее число одновременно открытых соединений
+MAX_HEADER_SIZE = 64 * 1024  # Наибольший размер строки запроса и заголовков
+MAX_BODY_SIZE = 16 * 1024 * 1024  # Наибольший размер тела запроса
+READ_TIMEOUT = 30  # Сколько секунд ждать следующий запрос по открытому соединению
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix='db')
+_auth_executor = ThreadPoolExecutor(max_workers=AUTH_WORKERS, thread_name_prefix='auth')
+
+class BadRequest(Exception):
+    """Некорректный HTTP-запрос."""
+
+def _executor_for(path):
+    """Обработчики с bcrypt выполняются отдельно, чтобы не занимать потоки остальных запросов."""
+    return _auth_executor if path in AUTH_ROUTES else _db_executor
+
+async def read_request(reader):
+    """
+    Читает один HTTP-запрос.
+
+    Returns:
+        tuple: (метод, путь, строка запроса, версия протокола, {заголовок: значение}, тело)
+        или None, если клиент закрыл соединение.
+    """
+    try:
+        head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), READ_TIMEOUT)
+    except asyncio.IncompleteReadError as e:
+        if e.partial.strip():
+            raise BadRequest("Неполный запрос")
+        return None
+    except asyncio.LimitOverrunError:
+        raise BadRequest("Слишком длинные заголовки")
+    lines = head.decode('latin-1').split('\r\n')
+    try:
+        method, target, version = lines[0].split(' ')
+    except ValueError:
+        raise BadRequest("Некорректная строка запроса")
+    headers = {}
+    for line in lines[1:]:
+        if not line:
+            continue
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    if 'chunked' in headers.get('transfer-encoding', '').lower():
+        raise BadRequest("Тело запроса по частям не поддерживается")
+    try:
+        length = int(headers.get('content-length', 0))
+    except ValueError:
+        raise BadRequest("Некорректный Content-Length")
+    if length < 0 or length > MAX_BODY_SIZE:
+        raise BadRequest("Слишком большое тело запроса")
+    body = await asyncio.wait_for(reader.readexactly(length), READ_TIMEOUT) if length else b''
+    path, _, query = target.partition('?')
+    return method, path, query, version, headers, body
+
+def make_environ(method, path, query, version, headers, body, peer, sockname):
+    """Формирует окружение WSGI для приложения Flask."""
+    environ = {
+        'REQUEST_METHOD': method,
+        'SCRIPT_NAME': '',
+        'PATH_INFO': unquote(path, encoding='latin-1'),
+        'QUERY_STRING': query,
+        'SERVER_NAME': sockname[0] if sockname else HOST,
+        'SERVER_PORT': str(sockname[1]) if sockname else str(PORT),
+        'SERVER_PROTOCOL': version,
+        'REMOTE_ADDR': peer[0] if peer else '',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    for name, value in headers.items():
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            environ['HTTP_' + name.upper().replace('-', '_')] = value
+    return environ
+
+def call_app(environ):
+    """Вызывает приложение Flask в потоке исполнителя; тело ответа остается итератором."""
+    response = {}
+
+    def start_response(status, headers, exc_info=None):
+        response['status'] = status
+        response['headers'] = headers
+
+    result = app(environ, start_response)
+    return response['status'], response['headers'], result
+
+async def send_response(writer, executor, status, headers, result, keep_alive, head_only, http11):
+    """
+    Отправляет ответ клиенту. Куски тела берутся из итератора в потоке исполнителя,
+    а запись ждет освобождения буфера сокета: медленный клиент не держит поток.
+
+    Returns:
+        bool: Можно ли обрабатывать следующий запрос по этому соединению.
+    """
+    loop = asyncio.get_running_loop()
+    names = {name.lower() for name, _ in headers}
+    unsized = 'content-length' not in names and not head_only and not status.startswith(('204', '304'))
+    chunked = unsized and http11
+    if unsized and not http11:
+        keep_alive = False  # Для HTTP/1.0 конец тела обозначается закрытием соединения
+    lines = [f"HTTP/1.1 {status}"] + [f"{name}: {value}" for name, value in headers]
+    if chunked:
+        lines.append("Transfer-Encoding: chunked")
+    lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+    iterator = iter(result)
+    try:
+        while True:
+            chunk = await loop.run_in_executor(executor, next, iterator, None)
+            if chunk is None:
+                break
+            if not chunk or head_only:
+                continue
+            writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk) if chunked else chunk)
+            await writer.drain()
+        if chunked:
+            writer.write(b"0\r\n\r\n")
+        await writer.drain()
+    finally:
+        if hasattr(result, 'close'):
+            await loop.run_in_executor(executor, result.close)
+    return keep_alive
+
+async def handle_connection(reader, writer, limiter):
+    """Обслуживает одно соединение; запросы по нему обрабатываются по очереди."""
+    peer = writer.get_extra_info('peername')
+    sockname = writer.get_extra_info('sockname')
+    async with limiter:
+        try:
+            while True:
+                try:
+                    request = await read_request(reader)
+                except BadRequest as e:
+                    message = str(e).encode('utf-8')
+                    writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Type: text/plain; charset=utf-8\r\n"
+                                 b"Content-Length: %d\r\nConnection: close\r\n\r\n%s" % (len(message), message))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                method, path, query, version, headers, body = request
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' if version == 'HTTP/1.1' else connection == 'keep-alive'
+                executor = _executor_for(path)
+                environ = make_environ(method, path, query, version, headers, body, peer, sockname)
+                loop = asyncio.get_running_loop()
+                status, response_headers, result = await loop.run_in_executor(executor, call_app, environ)
+                keep_alive = await send_response(writer, executor, status, response_headers, result,
+                                                 keep_alive, method == 'HEAD', version == 'HTTP/1.1')
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, ConnectionError, asyncio.IncompleteReadError):
+            pass  # Клиент молчит или отключился
+        except Exception as e:
+            print(f"Ошибка обработки соединения: {e}")
+        finally:
+            writer.close()
+
+async def serve(host=HOST, port=PORT):
+    """Запускает асинхронный сервер и обслуживает соединения до остановки."""
+    limiter = asyncio.Semaphore(MAX_CONNECTIONS)
+    server = await asyncio.start_server(lambda r, w: handle_connection(r, w, limiter), host, port,
+                                        limit=MAX_HEADER_SIZE)
+    print(f"Асинхронный сервер запущен на http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+if __name__ == '__main__':
+    # python async_server.py [host] [port]
+    init_storage()
+    host = sys.argv[1] if len(sys.argv) > 1 else HOST
+    port = int(sys.argv[2]) if len(sys.argv) > 2 else PORT
+    try:
+        asyncio.run(serve(host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        _db_executor.shutdown(wait=False)
+        _auth_executor.shutdown(wait=False)
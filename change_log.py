@@ -0,0 +1,73 @@
+import os
+import json
+from datetime import datetime
+from db_pool import pool
+from write_queue import write_queue
+
+STUDENTS_DBS_DIR = 'students_dbs'  # Папка с базами классов
+CHANGES_DB = 'changes.db'  # Журнал изменений внутри папки класса
+MAX_CHANGES = 1000  # Наибольшее число записей за один запрос
+
+def changes_db_path(class_name, students_dir=STUDENTS_DBS_DIR):
+    """Возвращает путь к журналу изменений класса."""
+    return os.path.join(students_dir, class_name, CHANGES_DB)
+
+def _init(conn):
+    # AUTOINCREMENT гарантирует, что номера не используются повторно даже после удаления строк
+    conn.execute("""CREATE TABLE IF NOT EXISTS changes(
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        ts TEXT NOT NULL,
+        source TEXT NOT NULL,
+        key TEXT NOT NULL,
+        payload TEXT)
+        """)
+
+def _append(conn, rows):
+    """Изменение для очереди записи: добавляет записи в журнал и возвращает номер последней."""
+    _init(conn)
+    conn.executemany("INSERT INTO changes (ts, source, key, payload) VALUES (?, ?, ?, ?)", rows)
+    return conn.execute("SELECT MAX(seq) FROM changes").fetchone()[0]
+
+def record_changes(class_name, entries, students_dir=STUDENTS_DBS_DIR):
+    """
+    Добавляет записи в журнал изменений класса одной транзакцией. Журнал пишется
+    при каждой оценке и правке класса, поэтому запись идет через очередь его файла
+    и фиксируется вместе с одновременными записями.
+
+    Args:
+        class_name (str): Название класса.
+        entries: Список кортежей (source, key, payload), где source - "time_table",
+            "home_work" или "marks", key - строка с ключом измененной строки,
+            payload - словарь с новыми значениями.
+
+    Returns:
+        int: Номер последней добавленной записи.
+    """
+    if not entries:
+        return None
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    rows = [(now, source, key, json.dumps(payload, ensure_ascii=False)) for source, key, payload in entries]
+    return write_queue.write(changes_db_path(class_name, students_dir), _append, rows)
+
+def record_change(class_name, source, key, payload, students_dir=STUDENTS_DBS_DIR):
+    """Добавляет одну запись в журнал изменений класса."""
+    return record_changes(class_name, [(source, key, payload)], students_dir)
+
+def get_changes(class_name, since=0, limit=MAX_CHANGES, students_dir=STUDENTS_DBS_DIR):
+    """
+    Возвращает записи журнала с номером больше since в порядке возрастания.
+
+    Returns:
+        list: Список словарей {seq, ts, source, key, payload}.
+    """
+    path = changes_db_path(class_name, students_dir)
+    if not os.path.exists(path):
+        return []
+    with pool.connection(path) as conn:
+        _init(conn)
+        rows = conn.execute(
+            "SELECT seq, ts, source, key, payload FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+            (since, min(limit, MAX_CHANGES))).fetchall()
+    return [{"seq": seq, "ts": ts, "source": source, "key": key,
+             "payload": json.loads(payload) if payload else None}
+            for seq, ts, source, key, payload in rows]
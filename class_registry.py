@@ -0,0 +1,130 @@
+import threading
+import sqlite3 as sq
+from datetime import datetime
+from db_pool import pool
+
+REGISTRY_DB = 'classes.db'  # Общий список классов всех процессов сервера
+CLASSES_FILE = 'classes.txt'  # Старый список классов, переносится в базу один раз
+
+# Каждый процесс держит копию списка классов и перед использованием сверяет ее
+# со счетчиком версии в базе: это один запрос по первичному ключу, а список
+# перечитывается только после добавления класса любым процессом.
+
+_lock = threading.Lock()
+_cache = {}  # {путь к базе: (версия, кортеж классов, множество классов)}
+_initialized = set()  # Базы, в которых таблицы уже проверены этим процессом
+
+def init_registry(conn, classes_file=CLASSES_FILE):
+    """Создает таблицы реестра; пустой реестр заполняется из classes.txt."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute("CREATE TABLE IF NOT EXISTS classes (name TEXT PRIMARY KEY, created TEXT)")
+        conn.execute("""CREATE TABLE IF NOT EXISTS registry_version(
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            version INTEGER NOT NULL)
+            """)
+        if conn.execute("SELECT 1 FROM registry_version").fetchone() is None:
+            conn.execute("INSERT INTO registry_version (id, version) VALUES (1, 0)")
+            legacy = read_classes_file(classes_file)
+            if legacy:
+                _insert(conn, legacy)
+        conn.commit()
+    except sq.Error:
+        conn.rollback()
+        raise
+
+def read_classes_file(classes_file=CLASSES_FILE):
+    """Читает старый classes.txt (пустой список, если файла нет)."""
+    try:
+        with open(classes_file, 'rb') as f:
+            data = f.read()
+    except FileNotFoundError:
+        return []
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        text = data.decode('cp1251')  # Файл записывался в кодировке Windows по умолчанию
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+def _insert(conn, names):
+    """Добавляет классы в рамках текущей транзакции и увеличивает версию, если что-то добавлено."""
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    added = 0
+    for name in names:
+        added += conn.execute("INSERT OR IGNORE INTO classes (name, created) VALUES (?, ?)", (name, now)).rowcount
+    if added:
+        conn.execute("UPDATE registry_version SET version = version + 1 WHERE id = 1")
+    return added
+
+def _acquire(db_path):
+    conn = pool.acquire(db_path)
+    if db_path not in _initialized:
+        try:
+            init_registry(conn)
+        except sq.Error:
+            pool.release(db_path)
+            raise
+        _initialized.add(db_path)
+    return conn
+
+def registry_version(db_path=REGISTRY_DB):
+    """Возвращает текущую версию реестра."""
+    conn = _acquire(db_path)
+    try:
+        return conn.execute("SELECT version FROM registry_version WHERE id = 1").fetchone()[0]
+    finally:
+        pool.release(db_path)
+
+def _snapshot(db_path):
+    """Возвращает (версия, классы, множество классов), перечитывая список только при смене версии."""
+    conn = _acquire(db_path)
+    try:
+        version = conn.execute("SELECT version FROM registry_version WHERE id = 1").fetchone()[0]
+        with _lock:
+            cached = _cache.get(db_path)
+        if cached is not None and cached[0] == version:
+            return cached
+        # Список и версия читаются одной транзакцией чтения, чтобы они соответствовали друг другу
+        conn.execute("BEGIN")
+        try:
+            version = conn.execute("SELECT version FROM registry_version WHERE id = 1").fetchone()[0]
+            names = tuple(row[0] for row in conn.execute("SELECT name FROM classes ORDER BY rowid"))
+        finally:
+            conn.rollback()
+    finally:
+        pool.release(db_path)
+    snapshot = (version, names, frozenset(names))
+    with _lock:
+        cached = _cache.get(db_path)
+        if cached is None or cached[0] < version:
+            _cache[db_path] = snapshot
+    return snapshot
+
+def list_classes(db_path=REGISTRY_DB):
+    """Возвращает список классов в порядке добавления."""
+    return list(_snapshot(db_path)[1])
+
+def class_exists(class_name, db_path=REGISTRY_DB):
+    """Проверяет, зарегистрирован ли класс."""
+    return class_name in _snapshot(db_path)[2]
+
+def register_class(class_name, db_path=REGISTRY_DB):
+    """
+    Регистрирует класс. Одновременные добавления из разных процессов не теряются:
+    запись идет под блокировкой базы, а повтор уже существующего класса ничего не меняет.
+
+    Returns:
+        bool: True, если класс добавлен, False, если он уже был.
+    """
+    conn = _acquire(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            added = _insert(conn, [class_name])
+            conn.commit()
+        except sq.Error:
+            conn.rollback()
+            raise
+    finally:
+        pool.release(db_path)
+    return bool(added)
@@ -1,3 +1,4 @@
+import os
 import sys
 import requests
 import json
@@ -8,9 +9,39 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QFont
 from PyQt5.QtCore import Qt
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "app"))
+from task_runner import get_runner  # Общий исполнитель фоновых задач клиентов
+
 # URL сервера Flask
 SERVER_URL = "http://127.0.0.1:5000"  # Измените, если ваш сервер работает на другом адресе
 
+class ServerError(Exception):
+    """Сервер вернул ошибку; текст - сообщение сервера."""
+
+def request_json(method, path, data=None):
+    """
+    Выполняется в фоновом потоке: отправляет запрос серверу Flask и возвращает ответ JSON.
+    При ответе с ошибкой выбрасывает ServerError с сообщением сервера.
+    """
+    response = requests.request(method, f"{SERVER_URL}{path}", json=data)
+    if response.status_code >= 400:
+        try:
+            message = response.json().get("message", "Неизвестная ошибка")
+        except ValueError:
+            message = f"HTTP {response.status_code}"
+        raise ServerError(message)
+    return response.json()
+
+def show_request_error(parent, error, fallback="Ошибка"):
+    """Показывает ошибку фонового запроса (в потоке интерфейса)."""
+    if isinstance(error, ServerError):
+        print(f"Ошибка сервера: {error}")
+        QMessageBox.warning(parent, "Ошибка", f"Ошибка: {error}")
+    elif isinstance(error, requests.exceptions.RequestException):
+        QMessageBox.critical(parent, "Ошибка", f"Ошибка подключения к серверу: {error}")
+    else:
+        QMessageBox.critical(parent, "Ошибка", f"{fallback}: {error}")
+
 class AddTimetableGUI(QWidget):
     def __init__(self):
         super().__init__()
@@ -51,17 +82,13 @@ class AddTimetableGUI(QWidget):
         self.setLayout(main_layout)
 
     def load_classes(self):
-        """Загружает доступные классы с сервера и заполняет выпадающий список."""
-        try:
-            response = requests.get(f"{SERVER_URL}/classes")
-            response.raise_for_status()  # Проверяем на ошибки HTTP
-            classes = response.json()
-            self.class_name_combo.addItems(classes)
-
-        except requests.exceptions.RequestException as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка подключения к серверу: {e}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке классов: {e}")
+        """Загружает доступные классы с сервера в фоновом потоке и заполняет выпадающий список."""
+        get_runner().submit(
+            request_json, "GET", "/classes",
+            key=(id(self), "classes"),
+            on_result=self.class_name_combo.addItems,
+            on_error=lambda e: show_request_error(self, e, "Ошибка при загрузке классов")
+        )
 
     def add_timetable_entry(self):
         """Добавляет запись в расписание, отправляя запрос на сервер Flask."""
@@ -89,19 +116,15 @@ class AddTimetableGUI(QWidget):
             "lesson_name": lesson_name
         }
 
-        # Отправляем запрос на сервер
-        try:
-            response = requests.post(f"{SERVER_URL}/time_table_add", json=timetable_data)
-            response.raise_for_status()  # Проверяем на ошибки HTTP
-            result = response.json()
-            QMessageBox.information(self, "Успех", result.get("message", "Расписание успешно добавлено."))
-
-        except requests.exceptions.RequestException as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка подключения к серверу: {e}")
-        except requests.exceptions.HTTPError as e:
-            error_message = response.json().get("message", "Неизвестная ошибка")
-            print(f"Ошибка сервера: {error_message}")
-            QMessageBox.warning(self, "Ошибка", f"Ошибка: {error_message}")
+        # Отправляем запрос на сервер в фоновом потоке
+        self.add_timetable_button.setEnabled(False)
+        get_runner().submit(
+            request_json, "POST", "/time_table_add", timetable_data,
+            on_result=lambda result: QMessageBox.information(
+                self, "Успех", result.get("message", "Расписание успешно добавлено.")),
+            on_error=lambda e: show_request_error(self, e),
+            on_finished=lambda: self.add_timetable_button.setEnabled(True)
+        )
 
 class AddClassGUI(QWidget):
     def __init__(self):
@@ -134,22 +157,21 @@ class AddClassGUI(QWidget):
             QMessageBox.warning(self, "Ошибка", "Пожалуйста, введите название класса.")
             return
 
-        # Отправляем запрос на сервер Flask
-        try:
-            response = requests.post(f"{SERVER_URL}/add_class", json={"class_name": class_name})
-            response.raise_for_status()
-            result = response.json()
-            QMessageBox.information(self, "Успех", result.get("message", "Класс успешно добавлен."))
-            # После успешного добавления класса обновляем списки классов в других вкладках
-            self.parent().add_user_tab.load_classes()
-            self.parent().add_timetable_tab.load_classes()
-
-        except requests.exceptions.RequestException as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка подключения к серверу: {e}")
-        except requests.exceptions.HTTPError as e:
-            error_message = response.json().get("message", "Неизвестная ошибка")
-            print(f"Ошибка сервера: {error_message}")
-            QMessageBox.warning(self, "Ошибка", f"Ошибка: {error_message}")
+        # Отправляем запрос на сервер Flask в фоновом потоке
+        self.add_class_button.setEnabled(False)
+        get_runner().submit(
+            request_json, "POST", "/add_class", {"class_name": class_name},
+            on_result=self.on_class_added,
+            on_error=lambda e: show_request_error(self, e),
+            on_finished=lambda: self.add_class_button.setEnabled(True)
+        )
+
+    def on_class_added(self, result):
+        """Сообщает об успешном добавлении класса (в потоке интерфейса)."""
+        QMessageBox.information(self, "Успех", result.get("message", "Класс успешно добавлен."))
+        # После успешного добавления класса обновляем списки классов в других вкладках
+        self.parent().add_user_tab.load_classes()
+        self.parent().add_timetable_tab.load_classes()
 
 class MainGUI(QWidget):
     def __init__(self):
@@ -253,36 +275,36 @@ class AddUserGUI(QWidget):
         self.setLayout(main_layout)
 
     def load_classes_teacher(self):
-        """Загружает доступные классы с сервера для списка классов во вкладке учителя."""
-        try:
-            response = requests.get(f"{SERVER_URL}/classes")
-            response.raise_for_status()
-            classes = response.json()
-            self.teacher_classes.clear()  # Очищаем предыдущие элементы
-            for class_name in classes:
-                item = QListWidgetItem(class_name)
-                item.setFlags(item.flags() | Qt.ItemIsUserCheckable)  # Делаем элемент выбираемым
-                item.setCheckState(Qt.Unchecked)  # По умолчанию не выбран
-                self.teacher_classes.addItem(item)
-
-        except requests.exceptions.RequestException as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка подключения к серверу: {e}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке классов: {e}")
+        """Загружает доступные классы с сервера в фоновом потоке для списка классов во вкладке учителя."""
+        get_runner().submit(
+            request_json, "GET", "/classes",
+            key=(id(self), "teacher_classes"),
+            on_result=self.fill_teacher_classes,
+            on_error=lambda e: show_request_error(self, e, "Ошибка при загрузке классов")
+        )
+
+    def fill_teacher_classes(self, classes):
+        """Заполняет список классов во вкладке учителя."""
+        self.teacher_classes.clear()  # Очищаем предыдущие элементы
+        for class_name in classes:
+            item = QListWidgetItem(class_name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)  # Делаем элемент выбираемым
+            item.setCheckState(Qt.Unchecked)  # По умолчанию не выбран
+            self.teacher_classes.addItem(item)
 
     def load_classes(self):
-        """Загружает доступные классы с сервера и заполняет выпадающий список для вкладки ученика."""
-        try:
-            response = requests.get(f"{SERVER_URL}/classes")
-            response.raise_for_status()  # Проверяем на ошибки HTTP
-            classes = response.json()
-            self.student_class.clear()  # Очищаем предыдущие элементы
-            self.student_class.addItems(classes)
-
-        except requests.exceptions.RequestException as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка подключения к серверу: {e}")
-        except Exception as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка при загрузке классов: {e}")
+        """Загружает доступные классы с сервера в фоновом потоке и заполняет выпадающий список для вкладки ученика."""
+        get_runner().submit(
+            request_json, "GET", "/classes",
+            key=(id(self), "student_classes"),
+            on_result=self.fill_student_classes,
+            on_error=lambda e: show_request_error(self, e, "Ошибка при загрузке классов")
+        )
+
+    def fill_student_classes(self, classes):
+        """Заполняет выпадающий список классов во вкладке ученика."""
+        self.student_class.clear()  # Очищаем предыдущие элементы
+        self.student_class.addItems(classes)
 
     def add_user(self):
         """
@@ -327,20 +349,15 @@ class AddUserGUI(QWidget):
             QMessageBox.warning(self, "Ошибка", "Выберите роль пользователя.")
             return
 
-        try:
-            response = requests.post(f"{SERVER_URL}/add_user", json=user_data)
-            response.raise_for_status()  # Вызываем HTTPError для плохих ответов (4xx или 5xx)
-            result = response.json()
-
-            QMessageBox.information(self, "Успех", result.get("message", "Пользователь успешно добавлен."))
-            # После успешного добавления класса обновляем списки классов в других вкладках
-
-        except requests.exceptions.RequestException as e:
-            QMessageBox.critical(self, "Ошибка", f"Ошибка подключения к серверу: {e}")
-        except requests.exceptions.HTTPError as e:
-            error_message = response.json().get("message", "Неизвестная ошибка")
-            print(f"Ошибка сервера: {error_message}")
-            QMessageBox.warning(self, "Ошибка", f"Ошибка: {error_message}")
+        # Отправляем запрос в фоновом потоке: хеширование пароля на сервере занимает время
+        self.add_button.setEnabled(False)
+        get_runner().submit(
+            request_json, "POST", "/add_user", user_data,
+            on_result=lambda result: QMessageBox.information(
+                self, "Успех", result.get("message", "Пользователь успешно добавлен.")),
+            on_error=lambda e: show_request_error(self, e),
+            on_finished=lambda: self.add_button.setEnabled(True)
+        )
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
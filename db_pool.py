@@ -0,0 +1,123 @@
+import os
+import time
+import threading
+import sqlite3 as sq
+from contextlib import contextmanager
+
+BUSY_TIMEOUT = 5.0  # Сколько секунд ждать освобождения блокировки
+CACHE_SIZE_KB = 8192  # Размер кэша страниц на одно соединение
+MAX_IDLE = 8  # Сколько свободных соединений хранить на один файл
+CHECKPOINT_RETRIES = 3  # Сколько раз повторять контрольную точку, если журнал WAL занят читателями
+CHECKPOINT_DELAY = 0.05  # Пауза перед первым повтором в секундах (затем удваивается)
+
+class ConnectionPool:
+    """
+    Потокобезопасный пул соединений SQLite с ключом по пути к файлу.
+
+    Поток, уже держащий соединение с файлом, получает его же повторно (вложенные вызовы
+    не открывают новых соединений). Освобожденные соединения возвращаются в список
+    свободных и используются следующими запросами.
+    """
+    def __init__(self, busy_timeout=BUSY_TIMEOUT, cache_size_kb=CACHE_SIZE_KB, max_idle=MAX_IDLE):
+        self.busy_timeout = busy_timeout
+        self.cache_size_kb = cache_size_kb
+        self.max_idle = max_idle
+        self._lock = threading.Lock()
+        self._idle = {}  # {путь: [свободные соединения]}
+        self._local = threading.local()  # {путь: [соединение, счетчик вложенности]} текущего потока
+
+    def _open(self, key):
+        """Открывает новое соединение и настраивает его."""
+        conn = sq.connect(key, timeout=self.busy_timeout, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")  # Читатели не блокируют писателя
+        conn.execute("PRAGMA synchronous = NORMAL")  # В режиме WAL этого достаточно для надежности
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout * 1000)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        return conn
+
+    def _held(self):
+        if not hasattr(self._local, "held"):
+            self._local.held = {}
+        return self._local.held
+
+    def acquire(self, db_path):
+        """Выдает соединение с файлом db_path текущему потоку."""
+        key = os.path.abspath(db_path)
+        held = self._held()
+        if key in held:
+            held[key][1] += 1
+            return held[key][0]
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is None:
+            conn = self._open(key)
+        conn.row_factory = None
+        held[key] = [conn, 1]
+        return conn
+
+    def release(self, db_path):
+        """Возвращает соединение текущего потока в пул."""
+        key = os.path.abspath(db_path)
+        held = self._held()
+        entry = held.get(key)
+        if entry is None:
+            return
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del held[key]
+        conn = entry[0]
+        if conn.in_transaction:
+            conn.rollback()  # Незавершенная транзакция не должна достаться следующему потоку
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.max_idle:
+                idle.append(conn)
+                return
+        conn.close()
+
+    @contextmanager
+    def connection(self, db_path):
+        """Контекстный менеджер: соединение с файлом на время блока."""
+        conn = self.acquire(db_path)
+        try:
+            yield conn
+        finally:
+            self.release(db_path)
+
+    @contextmanager
+    def transaction(self, db_path):
+        """Контекстный менеджер: соединение с фиксацией при успехе и откатом при ошибке."""
+        with self.connection(db_path) as conn:
+            with conn:
+                yield conn
+
+    def checkpoint(self, db_path, retries=CHECKPOINT_RETRIES, delay=CHECKPOINT_DELAY):
+        """
+        Переносит журнал WAL в основной файл, чтобы файл можно было отдать целиком.
+        Пока журнал держат читатели, SQLite не переносит его до конца и не сообщает
+        об ошибке, а только выставляет признак занятости; тогда попытка повторяется.
+
+        Returns:
+            bool: True, если журнал перенесен полностью.
+        """
+        with self.connection(db_path) as conn:
+            for attempt in range(retries + 1):
+                busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+                if not busy:
+                    return True
+                if attempt < retries:
+                    time.sleep(delay * 2 ** attempt)
+        print(f"Журнал WAL {db_path} занят, файл не перенесен целиком")
+        return False
+
+    def close_all(self):
+        """Закрывает все свободные соединения."""
+        with self._lock:
+            idle, self._idle = self._idle, {}
+        for conns in idle.values():
+            for conn in conns:
+                conn.close()
+
+pool = ConnectionPool()  # Общий пул процесса
@@ -0,0 +1,72 @@
+import os
+import hashlib
+import tempfile
+import sqlite3 as sq
+from datetime import datetime
+from db_pool import pool
+
+def read_version(conn):
+    """Возвращает номер версии из таблицы version или None, если таблицы нет."""
+    try:
+        row = conn.execute("SELECT Version FROM version;").fetchone()
+    except sq.OperationalError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    return int(row[0])
+
+def bump_version(conn):
+    """
+    Увеличивает версию базы в рамках текущей транзакции вызывающего кода.
+
+    Returns:
+        int: Новая версия.
+    """
+    conn.execute("CREATE TABLE IF NOT EXISTS version (Date TEXT, Version INTEGER);")
+    now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    ver = (read_version(conn) or 0) + 1
+    if conn.execute("UPDATE version SET Date = ?, Version = ?;", (now, ver)).rowcount == 0:
+        conn.execute("INSERT INTO version (Date, Version) VALUES (?, ?);", (now, ver))
+    return ver
+
+def _label(ver, content):
+    """Метка версии: номер из таблицы version, а для баз без нее - хеш содержимого."""
+    if ver is not None:
+        return f"v{ver}"
+    return "h" + hashlib.sha1(content).hexdigest()[:16]
+
+def snapshot(db_path):
+    """
+    Снимает копию базы вместе с изменениями из журнала WAL (SQLite backup за один шаг:
+    копия соответствует одному моменту). Метка версии читается из самой копии,
+    поэтому она всегда описывает именно эти байты.
+
+    Returns:
+        tuple: (метка версии, содержимое файла).
+    """
+    fd, copy_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    try:
+        copy = sq.connect(copy_path)
+        try:
+            with pool.connection(db_path) as conn:
+                conn.backup(copy)
+            ver = read_version(copy)
+        finally:
+            copy.close()
+        with open(copy_path, "rb") as f:
+            content = f.read()
+    finally:
+        os.remove(copy_path)
+    return _label(ver, content), content
+
+def file_version(db_path):
+    """
+    Возвращает строковую метку версии базы для сравнения с клиентской: номер из таблицы
+    version с учетом журнала WAL. Для баз без таблицы version метка считается по копии базы.
+    """
+    with pool.connection(db_path) as conn:
+        ver = read_version(conn)
+    if ver is not None:
+        return f"v{ver}"
+    return snapshot(db_path)[0]
@@ -0,0 +1,223 @@
+import os
+import re
+import sqlite3 as sq
+from contextlib import contextmanager
+from db_pool import pool
+from write_queue import write_queue
+
+HOMEWORK_DB = 'homework.db'  # Общая база домашних заданий всех классов
+STUDENTS_DBS_DIR = 'students_dbs'  # Папка с базами классов
+MAX_RESULTS = 100  # Наибольшее число результатов поиска
+
+_initialized = set()  # Базы, в которых таблицы уже проверены этим процессом
+
+@contextmanager
+def homework_connection(db_path=HOMEWORK_DB):
+    """Выдает соединение с общей базой домашних заданий из пула."""
+    with pool.connection(db_path) as conn:
+        if db_path not in _initialized:
+            init_homework_store(conn)
+            _initialized.add(db_path)
+        yield conn
+
+# Одна строка - одно задание; предметы - значения, а не столбцы.
+# Явный id: полнотекстовый индекс ссылается на него, а неявный rowid может измениться при VACUUM
+HOMEWORK_TABLE = """CREATE TABLE IF NOT EXISTS homework(
+    id INTEGER PRIMARY KEY,
+    class TEXT NOT NULL,
+    date TEXT NOT NULL,
+    lesson TEXT NOT NULL,
+    text TEXT NOT NULL,
+    UNIQUE (class, date, lesson))
+    """
+
+def _has_id(conn):
+    """Есть ли у таблицы заданий явный столбец id (базы до его появления нужно перенести)."""
+    columns = [col[1] for col in conn.execute("PRAGMA table_info(homework)")]
+    return not columns or "id" in columns
+
+def migrate_homework_id(conn):
+    """
+    Переносит задания из таблицы без явного id в новую таблицу одной транзакцией.
+    Полнотекстовый индекс и его триггеры удаляются: init_homework_store создаст их заново.
+
+    Returns:
+        bool: True, если перенос выполнен этим вызовом.
+    """
+    conn.execute("BEGIN IMMEDIATE")  # Другой процесс мог начать тот же перенос
+    with conn:
+        if _has_id(conn):
+            return False
+        for trigger in ("homework_ai", "homework_ad", "homework_au"):
+            conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        conn.execute("DROP TABLE IF EXISTS homework_fts")
+        conn.execute("ALTER TABLE homework RENAME TO homework_old")
+        conn.execute(HOMEWORK_TABLE)
+        conn.execute("""INSERT INTO homework (class, date, lesson, text)
+                        SELECT class, date, lesson, text FROM homework_old ORDER BY rowid""")
+        conn.execute("DROP TABLE homework_old")  # Вместе со старым индексом
+    return True
+
+def init_homework_store(conn):
+    """Создает таблицу заданий, индекс по датам и полнотекстовый индекс, если их нет."""
+    migrated = not _has_id(conn) and migrate_homework_id(conn)
+    cur = conn.cursor()
+    cur.execute(HOMEWORK_TABLE)
+    # Индекс для выборок по классу за период с фильтром по предмету
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_homework_class_lesson_date ON homework(class, lesson, date)")
+    # Полнотекстовый индекс поверх таблицы homework (текст не дублируется)
+    cur.execute("""CREATE VIRTUAL TABLE IF NOT EXISTS homework_fts USING fts5(
+        text, lesson,
+        content='homework', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2')
+        """)
+    # Триггеры поддерживают полнотекстовый индекс при любых изменениях
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS homework_ai AFTER INSERT ON homework BEGIN
+        INSERT INTO homework_fts(rowid, text, lesson) VALUES (new.id, new.text, new.lesson);
+        END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS homework_ad AFTER DELETE ON homework BEGIN
+        INSERT INTO homework_fts(homework_fts, rowid, text, lesson) VALUES ('delete', old.id, old.text, old.lesson);
+        END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS homework_au AFTER UPDATE ON homework BEGIN
+        INSERT INTO homework_fts(homework_fts, rowid, text, lesson) VALUES ('delete', old.id, old.text, old.lesson);
+        INSERT INTO homework_fts(rowid, text, lesson) VALUES (new.id, new.text, new.lesson);
+        END""")
+    if migrated:
+        # Перенесенные строки вставлены без триггеров: строим индекс по всей таблице
+        cur.execute("INSERT INTO homework_fts(homework_fts) VALUES ('rebuild')")
+    conn.commit()
+    cur.close()
+
+def write_homework(conn, entries):
+    """
+    Записывает задания без фиксации транзакции.
+
+    Args:
+        conn: Соединение с общей базой заданий.
+        entries: Список кортежей (class, date, lesson, text). Пустой текст удаляет задание.
+    """
+    upserts = [e for e in entries if e[3] not in (None, "")]
+    deletes = [e[:3] for e in entries if e[3] in (None, "")]
+    if upserts:
+        conn.executemany(
+            """INSERT INTO homework (class, date, lesson, text) VALUES (?, ?, ?, ?)
+               ON CONFLICT(class, date, lesson) DO UPDATE SET text = excluded.text""",
+            [(e[0], e[1], e[2], str(e[3])) for e in upserts])
+    if deletes:
+        conn.executemany("DELETE FROM homework WHERE class = ? AND date = ? AND lesson = ?", deletes)
+
+def set_homework(entries, db_path=HOMEWORK_DB):
+    """Записывает набор заданий одной транзакцией."""
+    try:
+        with homework_connection(db_path) as conn:
+            with conn:
+                write_homework(conn, entries)
+    except sq.Error as e:
+        print(f"Ошибка базы заданий: {e}")
+        raise
+
+def get_homework(class_name, start_date, end_date, lesson=None, db_path=HOMEWORK_DB):
+    """
+    Возвращает задания класса за диапазон дат (включительно), при необходимости по одному предмету.
+
+    Returns:
+        list: [{date, lesson, text}] по возрастанию даты.
+    """
+    query = "SELECT date, lesson, text FROM homework WHERE class = ? AND date BETWEEN ? AND ?"
+    args = [class_name, start_date, end_date]
+    if lesson:
+        query = "SELECT date, lesson, text FROM homework WHERE class = ? AND lesson = ? AND date BETWEEN ? AND ?"
+        args = [class_name, lesson, start_date, end_date]
+    with homework_connection(db_path) as conn:
+        return [{"date": d, "lesson": l, "text": t} for d, l, t in conn.execute(query + " ORDER BY date, lesson", args)]
+
+def match_query(text):
+    """
+    Строит запрос FTS5 из слов пользователя: все слова должны встретиться, каждое -
+    как начало слова (так "дроб" находит и "дроби", и "дробей"). Служебный синтаксис
+    FTS5 в тексте пользователя не интерпретируется.
+    """
+    words = re.findall(r"\w+", text.lower())
+    return " AND ".join(f'"{word}"*' for word in words)
+
+def search_homework(class_name, text, start_date=None, end_date=None, lesson=None,
+                    limit=MAX_RESULTS, db_path=HOMEWORK_DB):
+    """
+    Ищет задания класса по словам текста (и названия предмета), лучшие совпадения первыми.
+
+    Returns:
+        list: [{date, lesson, text, snippet}].
+    """
+    match = match_query(text)
+    if not match:
+        return []
+    query = """SELECT h.date, h.lesson, h.text, snippet(homework_fts, 0, '[', ']', '...', 12)
+               FROM homework_fts JOIN homework h ON h.id = homework_fts.rowid
+               WHERE homework_fts MATCH ? AND h.class = ?"""
+    args = [match, class_name]
+    if start_date:
+        query += " AND h.date >= ?"
+        args.append(start_date)
+    if end_date:
+        query += " AND h.date <= ?"
+        args.append(end_date)
+    if lesson:
+        query += " AND h.lesson = ?"
+        args.append(lesson)
+    query += " ORDER BY bm25(homework_fts), h.date DESC LIMIT ?"
+    args.append(int(limit))
+    with homework_connection(db_path) as conn:
+        return [{"date": d, "lesson": l, "text": t, "snippet": s} for d, l, t, s in conn.execute(query, args)]
+
+def _index_home_work(conn):
+    """Изменение для очереди записи: индекс по дате в файле заданий класса."""
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_home_work_date ON home_work(Date)")
+
+def import_class_homework(conn, home_work_db, class_name):
+    """
+    Переносит задания из файла класса (широкая таблица home_work) в общую базу.
+
+    Returns:
+        int: Количество перенесенных заданий.
+    """
+    # Старые файлы классов создавались без индекса по дате, а клиенты читают их по одной дате
+    write_queue.write(home_work_db, _index_home_work)
+    src = sq.connect(home_work_db)
+    try:
+        cur = src.execute("SELECT * FROM home_work")
+        column_names = [col[0] for col in cur.description]
+        entries = []
+        for row in cur:
+            date_val = row[0]  # Первый столбец - "Date"
+            for lesson, text in zip(column_names[1:], row[1:]):
+                if text not in (None, ""):
+                    entries.append((class_name, date_val, lesson, text))
+    finally:
+        src.close()
+    write_homework(conn, entries)
+    return len(entries)
+
+def migrate_home_works(students_dir=STUDENTS_DBS_DIR, db_path=HOMEWORK_DB):
+    """
+    Импортирует задания всех классов в общую базу.
+    Повторный запуск безопасен: задания перезаписываются, а не дублируются.
+    """
+    total = 0
+    with homework_connection(db_path) as conn:
+        for class_name in sorted(os.listdir(students_dir)):
+            home_work_db = os.path.join(students_dir, class_name, "home_works.db")
+            if not os.path.exists(home_work_db):
+                continue
+            try:
+                with conn:  # Одна транзакция на класс
+                    count = import_class_homework(conn, home_work_db, class_name)
+                total += count
+                print(f"{class_name}: перенесено заданий {count}")
+            except sq.Error as e:
+                print(f"Ошибка при переносе {home_work_db}: {e}")
+    print(f"Всего перенесено заданий: {total}")
+    return total
+
+if __name__ == '__main__':
+    # python homework_store.py - перенос заданий из файлов классов
+    migrate_home_works()
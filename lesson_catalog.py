@@ -0,0 +1,171 @@
+import os
+import threading
+import sqlite3 as sq
+from db_pool import pool
+
+CATALOG_DB = 'lessons.db'  # Каталог предметов всех классов
+STUDENTS_DBS_DIR = 'students_dbs'  # Папка с базами классов и учеников
+
+# Номер предмета в каталоге класса одновременно является номером миграции схемы,
+# которая добавляет его столбец в базы класса (см. schema_migrations.py).
+#
+# Каждый процесс держит копию каталога класса и перед использованием сверяет ее
+# со счетчиком версии класса в базе (как реестр классов): предмет, добавленный
+# другим процессом сервера, виден сразу, а список перечитывается только после записи.
+
+_lock = threading.Lock()
+_cache = {}  # {(каталог, класс): (версия, кортеж предметов по порядку, множество предметов)}
+_initialized = set()  # Каталоги, в которых таблица уже проверена этим процессом
+
+def init_catalog(conn):
+    """Создает таблицу каталога, если ее нет."""
+    conn.execute("""CREATE TABLE IF NOT EXISTS lessons(
+        class TEXT NOT NULL,
+        position INTEGER NOT NULL,
+        lesson TEXT NOT NULL,
+        PRIMARY KEY (class, position),
+        UNIQUE (class, lesson))
+        """)
+    conn.execute("""CREATE TABLE IF NOT EXISTS catalog_version(
+        class TEXT PRIMARY KEY,
+        version INTEGER NOT NULL)
+        """)
+    conn.commit()
+
+def _connection(db_path):
+    """Соединение с каталогом из пула; таблица создается при первом обращении."""
+    conn = pool.acquire(db_path)
+    if db_path not in _initialized:
+        init_catalog(conn)
+        _initialized.add(db_path)
+    return conn
+
+def read_lesson_list(class_name, students_dir=STUDENTS_DBS_DIR):
+    """Читает старый lesson_list.txt класса (пустой список, если файла нет)."""
+    lesson_list_file = os.path.join(students_dir, class_name, 'lesson_list.txt')
+    try:
+        with open(lesson_list_file, "r", encoding="utf-8") as f:
+            return [line.strip() for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+def _version(conn, class_name):
+    """Текущая версия каталога класса (0, если в него еще ничего не записано)."""
+    row = conn.execute("SELECT version FROM catalog_version WHERE class = ?", (class_name,)).fetchone()
+    return row[0] if row else 0
+
+def _load(class_name, students_dir, db_path):
+    """
+    Читает предметы класса и версию каталога одной транзакцией чтения;
+    класс без записей один раз переносится из lesson_list.txt.
+
+    Returns:
+        tuple: (версия, [предметы]).
+    """
+    conn = _connection(db_path)
+    try:
+        conn.execute("BEGIN")
+        try:
+            version = _version(conn, class_name)
+            rows = conn.execute("SELECT lesson FROM lessons WHERE class = ? ORDER BY position",
+                                (class_name,)).fetchall()
+        finally:
+            conn.rollback()
+    finally:
+        pool.release(db_path)
+    lessons = [row[0] for row in rows]
+    if not lessons:
+        legacy = read_lesson_list(class_name, students_dir)
+        if legacy:
+            return _insert(class_name, legacy, db_path)
+    return version, lessons
+
+def _insert(class_name, lessons, db_path):
+    """
+    Добавляет предметы, которых еще нет в каталоге класса, и увеличивает версию каталога.
+    BEGIN IMMEDIATE сериализует одновременные записи: номера не пересекаются.
+
+    Returns:
+        tuple: (версия, [все предметы класса]).
+    """
+    conn = _connection(db_path)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            known = {row[0] for row in conn.execute("SELECT lesson FROM lessons WHERE class = ?", (class_name,))}
+            position = conn.execute("SELECT COALESCE(MAX(position), 0) FROM lessons WHERE class = ?",
+                                    (class_name,)).fetchone()[0]
+            added = 0
+            for lesson in lessons:
+                if lesson and lesson not in known:
+                    position += 1
+                    conn.execute("INSERT INTO lessons (class, position, lesson) VALUES (?, ?, ?)",
+                                 (class_name, position, lesson))
+                    known.add(lesson)
+                    added += 1
+            if added:
+                conn.execute("""INSERT INTO catalog_version (class, version) VALUES (?, 1)
+                    ON CONFLICT(class) DO UPDATE SET version = version + 1""", (class_name,))
+            version = _version(conn, class_name)
+            rows = conn.execute("SELECT lesson FROM lessons WHERE class = ? ORDER BY position",
+                                (class_name,)).fetchall()
+            conn.commit()
+        except sq.Error:
+            conn.rollback()
+            raise
+    finally:
+        pool.release(db_path)
+    return version, [row[0] for row in rows]
+
+def _store(key, version, lessons):
+    """Кладет каталог в кэш, если он не старше уже сохраненного, и возвращает (предметы, множество)."""
+    entry = (version, tuple(lessons), frozenset(lessons))
+    with _lock:
+        cached = _cache.get(key)
+        if cached is None or cached[0] <= version:
+            _cache[key] = entry
+    return entry[1:]
+
+def _entry(class_name, students_dir, db_path):
+    """
+    Возвращает (предметы, множество предметов) класса. Копия в кэше используется, пока
+    версия каталога в базе не изменилась: проверка - один запрос по первичному ключу.
+    """
+    key = (db_path, class_name)
+    with _lock:
+        cached = _cache.get(key)
+    if cached is not None:
+        conn = _connection(db_path)
+        try:
+            version = _version(conn, class_name)
+        finally:
+            pool.release(db_path)
+        if cached[0] == version:
+            return cached[1:]
+    return _store(key, *_load(class_name, students_dir, db_path))
+
+def class_lessons(class_name, students_dir=STUDENTS_DBS_DIR, db_path=CATALOG_DB):
+    """Возвращает список предметов класса в порядке добавления."""
+    return list(_entry(class_name, students_dir, db_path)[0])
+
+def has_lesson(class_name, lesson, students_dir=STUDENTS_DBS_DIR, db_path=CATALOG_DB):
+    """Проверяет, есть ли предмет у класса (при актуальном кэше - только сверка версии)."""
+    return lesson in _entry(class_name, students_dir, db_path)[1]
+
+def add_lessons(class_name, lessons, students_dir=STUDENTS_DBS_DIR, db_path=CATALOG_DB):
+    """
+    Добавляет предметы в каталог класса. Кэш всех процессов обновится по новой версии каталога.
+
+    Returns:
+        list: Все предметы класса в порядке добавления.
+    """
+    known = _entry(class_name, students_dir, db_path)[1]  # Перенос из lesson_list.txt идет до новых предметов
+    if all(lesson in known for lesson in lessons if lesson):
+        return class_lessons(class_name, students_dir, db_path)
+    return list(_store((db_path, class_name), *_insert(class_name, lessons, db_path))[0])
+
+def invalidate(class_name=None):
+    """Сбрасывает кэш каталога класса (или всех классов)."""
+    with _lock:
+        for key in [k for k in _cache if class_name is None or k[1] == class_name]:
+            del _cache[key]
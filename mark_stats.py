@@ -0,0 +1,109 @@
+GRADES = ('2', '3', '4', '5')  # Оценки, которые учитываются в статистике
+
+# Статистика хранится по паре (ученик, предмет) рядом с таблицей marks общей базы
+# и обновляется триггерами в той же транзакции, что и сама оценка. Итоги по классу,
+# предмету или школе - сумма нескольких сотен таких строк, а не разбор всех оценок.
+
+_HISTOGRAM = ", ".join(f"n{g}" for g in GRADES)
+_IS_GRADE = "GLOB '[2-5]'"
+
+def _add(row):
+    """Тело триггера: учесть оценку строки row (new или old)."""
+    flags = ", ".join(f"{row}.value = '{g}'" for g in GRADES)
+    increments = ", ".join(f"n{g} = n{g} + excluded.n{g}" for g in GRADES)
+    return f"""INSERT INTO mark_stats (student, class, lesson, count, total, {_HISTOGRAM})
+        VALUES ({row}.student, {row}.class, {row}.lesson, 1, CAST({row}.value AS INTEGER), {flags})
+        ON CONFLICT(student, lesson) DO UPDATE SET class = excluded.class,
+            count = count + 1, total = total + excluded.total, {increments};"""
+
+def _remove(row):
+    """Тело триггера: убрать оценку строки row."""
+    decrements = ", ".join(f"n{g} = n{g} - ({row}.value = '{g}')" for g in GRADES)
+    return f"""UPDATE mark_stats SET count = count - 1, total = total - CAST({row}.value AS INTEGER), {decrements}
+        WHERE student = {row}.student AND lesson = {row}.lesson;"""
+
+def init_stats(conn):
+    """
+    Создает таблицу статистики и триггеры на таблице marks. Если таблицы еще не было,
+    заполняет ее по уже записанным оценкам.
+    """
+    created = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'mark_stats'").fetchone() is None
+    conn.execute(f"""CREATE TABLE IF NOT EXISTS mark_stats(
+        student TEXT NOT NULL,
+        class TEXT NOT NULL,
+        lesson TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        total INTEGER NOT NULL DEFAULT 0,
+        {", ".join(f"n{g} INTEGER NOT NULL DEFAULT 0" for g in GRADES)},
+        PRIMARY KEY (student, lesson))
+        """)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_mark_stats_class ON mark_stats(class, lesson)")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS mark_stats_ai AFTER INSERT ON marks
+        WHEN new.value {_IS_GRADE} BEGIN {_add('new')} END""")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS mark_stats_ad AFTER DELETE ON marks
+        WHEN old.value {_IS_GRADE} BEGIN {_remove('old')} END""")
+    # Изменение оценки: сначала убираем старую, затем учитываем новую
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS mark_stats_au_old AFTER UPDATE ON marks
+        WHEN old.value {_IS_GRADE} BEGIN {_remove('old')} END""")
+    conn.execute(f"""CREATE TRIGGER IF NOT EXISTS mark_stats_au_new AFTER UPDATE ON marks
+        WHEN new.value {_IS_GRADE} BEGIN {_add('new')} END""")
+    if created:
+        rebuild_stats(conn)
+    conn.commit()
+
+def rebuild_stats(conn):
+    """Пересчитывает статистику по всем оценкам (без фиксации транзакции)."""
+    conn.execute("DELETE FROM mark_stats")
+    conn.execute(f"""INSERT INTO mark_stats (student, class, lesson, count, total, {_HISTOGRAM})
+        SELECT student, MAX(class), lesson, COUNT(*), SUM(CAST(value AS INTEGER)),
+               {", ".join(f"SUM(value = '{g}')" for g in GRADES)}
+        FROM marks WHERE value {_IS_GRADE} GROUP BY student, lesson""")
+
+def _summary(count, total, *histogram):
+    count = count or 0
+    total = total or 0
+    return {
+        "count": count,
+        "sum": total,
+        "mean": round(total / count, 2) if count else None,
+        "histogram": {g: n or 0 for g, n in zip(GRADES, histogram)},
+    }
+
+def _grouped(conn, key, where, args):
+    """Итоги по столбцу key (или по всем строкам, если key None) среди строк, подходящих под where."""
+    columns = f"SUM(count), SUM(total), {', '.join(f'SUM(n{g})' for g in GRADES)}"
+    if key is None:
+        row = conn.execute(f"SELECT {columns} FROM mark_stats WHERE {where}", args).fetchone()
+        return _summary(*row)
+    rows = conn.execute(f"SELECT {key}, {columns} FROM mark_stats WHERE {where} GROUP BY {key} ORDER BY {key}", args)
+    return {row[0]: _summary(*row[1:]) for row in rows}
+
+def student_stats(conn, student, lesson=None, class_name=None):
+    """Статистика ученика: итог и разбивка по предметам (с class_name - только если он учится в этом классе)."""
+    where, args = "student = ?", [student]
+    if class_name:
+        where, args = where + " AND class = ?", args + [class_name]
+    if lesson:
+        where, args = where + " AND lesson = ?", args + [lesson]
+    return {"overall": _grouped(conn, None, where, args), "lessons": _grouped(conn, "lesson", where, args)}
+
+def class_stats(conn, class_name, lesson=None):
+    """Статистика класса: итог, разбивка по предметам и по ученикам."""
+    where, args = "class = ?", [class_name]
+    if lesson:
+        where, args = where + " AND lesson = ?", args + [lesson]
+    return {
+        "overall": _grouped(conn, None, where, args),
+        "lessons": _grouped(conn, "lesson", where, args),
+        "students": _grouped(conn, "student", where, args),
+    }
+
+def school_stats(conn, lesson=None):
+    """Статистика всей школы: итог, разбивка по классам и по предметам."""
+    where, args = ("lesson = ?", [lesson]) if lesson else ("1", [])
+    return {
+        "overall": _grouped(conn, None, where, args),
+        "classes": _grouped(conn, "class", where, args),
+        "lessons": _grouped(conn, "lesson", where, args),
+    }
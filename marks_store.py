@@ -0,0 +1,344 @@
+import os
+import sys
+import sqlite3 as sq
+from contextlib import contextmanager
+from db_pool import pool
+from write_queue import write_queue
+from db_versions import bump_version
+from change_log import record_changes
+from mark_stats import init_stats, student_stats, class_stats, school_stats
+from schema_migrations import quote_column
+
+MARKS_DB = 'marks.db'  # Общая база оценок всех учеников
+STUDENTS_DBS_DIR = 'students_dbs'  # Папка с базами классов и учеников
+
+def get_marks_connection(db_path=MARKS_DB):
+    """Открывает соединение с общей базой оценок и создает таблицы при необходимости."""
+    conn = sq.connect(db_path)
+    init_marks_store(conn)
+    return conn
+
+_initialized = set()  # Базы, в которых таблицы уже проверены этим процессом
+
+@contextmanager
+def marks_connection(db_path=MARKS_DB):
+    """Выдает соединение с общей базой оценок из пула."""
+    with pool.connection(db_path) as conn:
+        if db_path not in _initialized:
+            init_marks_store(conn)
+            _initialized.add(db_path)
+        yield conn
+
+def init_marks_store(conn):
+    """Создает таблицу оценок и индексы, если их нет."""
+    cur = conn.cursor()
+    # Одна строка - одна оценка; пустые ячейки не хранятся
+    cur.execute("""CREATE TABLE IF NOT EXISTS marks(
+        student TEXT NOT NULL,
+        class TEXT NOT NULL,
+        date TEXT NOT NULL,
+        lesson TEXT NOT NULL,
+        value TEXT NOT NULL,
+        PRIMARY KEY (student, date, lesson))
+        """)
+    # Индекс для выборок по всему классу за день или период
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_marks_class_date ON marks(class, date, lesson)")
+    conn.commit()
+    cur.close()
+    init_stats(conn)  # Статистика обновляется триггерами вместе с каждой оценкой
+
+def write_marks(conn, entries):
+    """
+    Записывает оценки в общую базу без фиксации транзакции.
+
+    Args:
+        conn: Соединение с общей базой оценок.
+        entries: Список кортежей (student, class, date, lesson, value).
+            Пустое значение удаляет оценку.
+    """
+    upserts = [e for e in entries if e[4] not in (None, "")]
+    deletes = [(e[0], e[2], e[3]) for e in entries if e[4] in (None, "")]
+    if upserts:
+        conn.executemany(
+            """INSERT INTO marks (student, class, date, lesson, value) VALUES (?, ?, ?, ?, ?)
+               ON CONFLICT(student, date, lesson) DO UPDATE SET class = excluded.class, value = excluded.value""",
+            [(e[0], e[1], e[2], e[3], str(e[4])) for e in upserts])
+    if deletes:
+        conn.executemany("DELETE FROM marks WHERE student = ? AND date = ? AND lesson = ?", deletes)
+
+def set_marks(entries, db_path=MARKS_DB):
+    """Записывает набор оценок в общую базу одной транзакцией."""
+    try:
+        with marks_connection(db_path) as conn:
+            with conn:
+                write_marks(conn, entries)
+    except sq.Error as e:
+        print(f"Ошибка базы оценок: {e}")
+        raise
+    # Журнал изменений ведется по классам
+    by_class = {}
+    for student, class_name, date_str, lesson, value in entries:
+        by_class.setdefault(class_name, []).append(
+            ("marks", f"{student}:{date_str}:{lesson}",
+             {"student": student, "date": date_str, "lesson": lesson, "value": value}))
+    for class_name, changes in by_class.items():
+        record_changes(class_name, changes)
+
+def set_mark(student, class_name, date_str, lesson, value, db_path=MARKS_DB):
+    """Записывает одну оценку в общую базу."""
+    set_marks([(student, class_name, date_str, lesson, value)], db_path)
+
+def get_student_marks(student, date_str=None, db_path=MARKS_DB):
+    """
+    Возвращает оценки ученика.
+
+    Returns:
+        dict: {lesson: value} за дату, если она указана, иначе {date: {lesson: value}}.
+    """
+    with marks_connection(db_path) as conn:
+        if date_str is not None:
+            rows = conn.execute("SELECT lesson, value FROM marks WHERE student = ? AND date = ?",
+                                (student, date_str)).fetchall()
+            return dict(rows)
+        marks = {}
+        for date_val, lesson, value in conn.execute(
+                "SELECT date, lesson, value FROM marks WHERE student = ? ORDER BY date", (student,)):
+            marks.setdefault(date_val, {})[lesson] = value
+        return marks
+
+def get_class_marks(class_name, date_str, db_path=MARKS_DB):
+    """Возвращает оценки всего класса за день в виде {student: {lesson: value}} одним запросом."""
+    with marks_connection(db_path) as conn:
+        marks = {}
+        for student, lesson, value in conn.execute(
+                "SELECT student, lesson, value FROM marks WHERE class = ? AND date = ?", (class_name, date_str)):
+            marks.setdefault(student, {})[lesson] = value
+        return marks
+
+def get_lesson_marks(class_name, lesson, start_date, end_date, db_path=MARKS_DB):
+    """
+    Возвращает оценки класса по одному предмету за диапазон дат (включительно)
+    в виде {student: {date: value}}. Запрос идет по индексу (class, date, lesson).
+    """
+    with marks_connection(db_path) as conn:
+        marks = {}
+        for student, date_val, value in conn.execute(
+                "SELECT student, date, value FROM marks WHERE class = ? AND date BETWEEN ? AND ? AND lesson = ?",
+                (class_name, start_date, end_date, lesson)):
+            marks.setdefault(student, {})[date_val] = value
+        return marks
+
+def get_stats(class_name=None, student=None, lesson=None, db_path=MARKS_DB):
+    """
+    Возвращает готовую статистику оценок: ученика (student), класса (class_name)
+    или всей школы, если не указано ни то, ни другое. lesson сужает ее до одного предмета.
+    """
+    with marks_connection(db_path) as conn:
+        if student:
+            return student_stats(conn, student, lesson, class_name)
+        if class_name:
+            return class_stats(conn, class_name, lesson)
+        return school_stats(conn, lesson)
+
+def _create_marks_table(conn, columns):
+    """Изменение для очереди записи: создает таблицу оценок ученика."""
+    conn.execute(f"CREATE TABLE IF NOT EXISTS marks({columns});")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_marks_date ON marks(Дата)")
+    bump_version(conn)
+
+def create_student_marks_db(student_db_path, lessons_list):
+    """
+    Создает файл оценок ученика в разреженном виде: таблица marks без заготовленных строк.
+    Строка за дату появляется только при выставлении первой оценки.
+    """
+    # Названия предметов могут содержать пробелы ("Русский язык"), поэтому экранируются
+    columns = ", ".join(["Дата TEXT"] + [f"{quote_column(lesson)} TEXT" for lesson in lessons_list])
+    write_queue.write(student_db_path, _create_marks_table, columns)
+
+def write_student_mark(conn, lesson, date_str, value, bump=True):
+    """
+    Записывает оценку в файл ученика, добавляя строку за дату только при необходимости.
+    При пакетной записи версия увеличивается один раз после всех оценок (bump=False).
+    """
+    column = quote_column(lesson)
+    cur = conn.execute(f"UPDATE marks SET {column} = ? WHERE Дата = ?;", (value, date_str))
+    if cur.rowcount == 0 and value not in (None, ""):
+        conn.execute(f"INSERT INTO marks (Дата, {column}) VALUES (?, ?);", (date_str, value))
+    if bump:
+        bump_version(conn)
+
+def _write_student_entries(conn, entries):
+    """
+    Изменение для очереди записи: оценки одного ученика.
+
+    Returns:
+        list: Для каждой записи None при успехе или текст ошибки.
+    """
+    lessons = {col[1] for col in conn.execute("PRAGMA table_info(marks)")} - {"Дата"}
+    errors = []
+    for _, _, date_str, lesson, value in entries:
+        if lesson not in lessons:
+            errors.append(f"Предмет {lesson} отсутствует в базе ученика")
+            continue
+        write_student_mark(conn, lesson, date_str, value, bump=False)
+        errors.append(None)
+    if any(error is None for error in errors):
+        bump_version(conn)  # Одна новая версия файла на весь пакет
+    return errors
+
+def write_marks_batch(entries, students_dir=STUDENTS_DBS_DIR, db_path=MARKS_DB):
+    """
+    Записывает набор оценок: записи группируются по файлу ученика, и каждый файл
+    обновляется одной транзакцией через очередь записи этого файла. Затем успешно
+    записанные оценки одной транзакцией дублируются в общую базу.
+
+    Args:
+        entries: Список кортежей (student, class_name, date, lesson, value).
+
+    Returns:
+        list: Результат для каждой записи в исходном порядке: None при успехе или текст ошибки.
+    """
+    results = [None] * len(entries)
+    by_file = {}  # {путь к файлу ученика: [номера записей]}
+    for i, (student, class_name, date_str, lesson, value) in enumerate(entries):
+        path = os.path.join(students_dir, class_name, f"{student}.db")
+        if not os.path.exists(path):
+            results[i] = f"База ученика {student} в классе {class_name} не найдена"
+            continue
+        by_file.setdefault(path, []).append(i)
+
+    # Файлы пишутся параллельно своими писателями; изменения одного файла - одной транзакцией
+    futures = {path: write_queue.submit(path, _write_student_entries, [entries[i] for i in indexes])
+               for path, indexes in by_file.items()}
+    written = []
+    for path, indexes in by_file.items():
+        try:
+            errors = futures[path].result()
+        except sq.Error as e:
+            print(f"Ошибка базы данных {path}: {e}")
+            for i in indexes:
+                results[i] = f"Ошибка базы данных: {e}"
+            continue
+        for i, error in zip(indexes, errors):
+            if error:
+                results[i] = error
+            else:
+                written.append(entries[i])
+
+    if written:
+        set_marks(written, db_path)
+    return results
+
+def compact_student_db(student_db_path):
+    """
+    Удаляет из файла ученика строки без единой оценки и сжимает файл.
+
+    Returns:
+        int: Количество удаленных строк.
+    """
+    conn = sq.connect(student_db_path)
+    try:
+        column_names = [col[1] for col in conn.execute("PRAGMA table_info(marks)")]
+        lesson_names = [name for name in column_names if name != "Дата"]
+        empty = " AND ".join(f"COALESCE({quote_column(lesson)}, '') = ''" for lesson in lesson_names) or "1"
+        with conn:
+            removed = conn.execute(f"DELETE FROM marks WHERE {empty}").rowcount
+            # Повторные строки за одну дату (остаются от старого заполнения) тоже не нужны,
+            # но сначала их оценки переносятся в первую строку даты: пустая ячейка первой
+            # строки получает первое непустое значение из повторов
+            for lesson in lesson_names:
+                column = quote_column(lesson)
+                conn.execute(f"""UPDATE marks SET {column} = (
+                        SELECT d.{column} FROM marks d
+                        WHERE d.Дата = marks.Дата AND COALESCE(d.{column}, '') <> ''
+                        ORDER BY d.rowid LIMIT 1)
+                    WHERE COALESCE({column}, '') = ''
+                      AND rowid IN (SELECT MIN(rowid) FROM marks GROUP BY Дата HAVING COUNT(*) > 1)""")
+            removed += conn.execute(
+                "DELETE FROM marks WHERE rowid NOT IN (SELECT MIN(rowid) FROM marks GROUP BY Дата)").rowcount
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_marks_date ON marks(Дата)")
+        conn.execute("VACUUM")  # Возвращаем освободившееся место на диске
+        return removed
+    finally:
+        conn.close()
+
+def compact_students_dbs(students_dir=STUDENTS_DBS_DIR):
+    """Переводит все существующие файлы учеников в разреженный вид."""
+    total = 0
+    for class_name, login, student_db_path in iter_student_dbs(students_dir):
+        try:
+            removed = compact_student_db(student_db_path)
+            total += removed
+            print(f"{class_name}/{login}: удалено пустых строк {removed}")
+        except sq.Error as e:
+            print(f"Ошибка при сжатии {student_db_path}: {e}")
+    print(f"Всего удалено пустых строк: {total}")
+    return total
+
+def iter_student_dbs(students_dir=STUDENTS_DBS_DIR):
+    """Перебирает файлы учеников всех классов по спискам class_list.db: (class_name, login, path)."""
+    for class_name in sorted(os.listdir(students_dir)):
+        class_list_db = os.path.join(students_dir, class_name, "class_list.db")
+        if not os.path.exists(class_list_db):
+            continue
+        src = sq.connect(class_list_db)
+        try:
+            logins = [row[0] for row in src.execute("SELECT Login FROM class_list")]
+        finally:
+            src.close()
+        for login in logins:
+            student_db_path = os.path.join(students_dir, class_name, f"{login}.db")
+            if not os.path.exists(student_db_path):
+                print(f"Файл ученика {login} не найден, пропуск")
+                continue
+            yield class_name, login, student_db_path
+
+def import_student_db(conn, student_db_path, class_name, login):
+    """
+    Переносит оценки из файла ученика (широкая таблица marks) в общую базу.
+
+    Returns:
+        int: Количество перенесенных оценок.
+    """
+    src = sq.connect(student_db_path)
+    try:
+        cur = src.execute("SELECT * FROM marks")
+        column_names = [col[0] for col in cur.description]
+        entries = []
+        for row in cur:
+            date_val = row[0]  # Первый столбец - "Дата"
+            for lesson, value in zip(column_names[1:], row[1:]):
+                if value not in (None, ""):
+                    entries.append((login, class_name, date_val, lesson, value))
+    finally:
+        src.close()
+    write_marks(conn, entries)
+    return len(entries)
+
+def migrate_students_dbs(students_dir=STUDENTS_DBS_DIR, db_path=MARKS_DB):
+    """
+    Импортирует все существующие файлы учеников в общую базу оценок.
+    Повторный запуск безопасен: оценки перезаписываются, а не дублируются.
+    """
+    conn = get_marks_connection(db_path)
+    total = 0
+    try:
+        for class_name, login, student_db_path in iter_student_dbs(students_dir):
+            try:
+                with conn:  # Одна транзакция на ученика
+                    count = import_student_db(conn, student_db_path, class_name, login)
+                total += count
+                print(f"{class_name}/{login}: перенесено оценок {count}")
+            except sq.Error as e:
+                print(f"Ошибка при переносе {student_db_path}: {e}")
+    finally:
+        conn.close()
+    print(f"Всего перенесено оценок: {total}")
+    return total
+
+if __name__ == '__main__':
+    # python marks_store.py [migrate|compact]
+    if len(sys.argv) > 1 and sys.argv[1] == "compact":
+        compact_students_dbs()
+    else:
+        migrate_students_dbs()
@@ -0,0 +1,112 @@
+import os
+import time
+import sqlite3 as sq
+from datetime import date, datetime, timedelta
+from db_versions import bump_version
+
+STUDENTS_DBS_DIR = 'students_dbs'  # Папка для баз данных классов
+LESSONS_PER_DAY = 15  # Количество строк в расписании
+
+TIME_TABLE_SQL = """CREATE TABLE IF NOT EXISTS main.time_table(
+    id INTEGER PRIMARY KEY,
+    Monday TEXT,
+    Tuesday TEXT,
+    Wednesday TEXT,
+    Thursday TEXT,
+    Friday TEXT,
+    Saturday TEXT,
+    Sunday TEXT);"""
+
+CLASS_LIST_SQL = """CREATE TABLE IF NOT EXISTS class_list.class_list(
+    Name TEXT,
+    Surname TEXT,
+    Patronymic TEXT,
+    Login TEXT);"""
+
+HOME_WORK_SQL = """CREATE TABLE IF NOT EXISTS home_works.home_work(Date TEXT);"""
+HOME_WORK_INDEX_SQL = """CREATE INDEX IF NOT EXISTS home_works.idx_home_work_date ON home_work(Date);"""
+
+def _is_empty(conn, table):
+    """Проверяет, что таблица не содержит строк."""
+    return conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone() is None
+
+def write_time_table(conn, day, lesson_number, lesson_name):
+    """Изменение для очереди записи: ставит урок в расписание. Возвращает число обновленных строк."""
+    updated = conn.execute(f"UPDATE time_table SET {day} = ? WHERE id = ?;", (lesson_name, lesson_number)).rowcount
+    if updated:
+        bump_version(conn)  # Клиенты узнают об изменении расписания при синхронизации
+    return updated
+
+def provision_class(class_dir, year=None):
+    """
+    Создает три базы класса (расписание, список класса, домашние задания) одной транзакцией.
+    Уже заполненные таблицы не трогаются, поэтому повторный вызов безопасен.
+
+    Returns:
+        float: Время создания в секундах.
+    """
+    started = time.perf_counter()
+    year = year or date.today().year
+    os.makedirs(class_dir, exist_ok=True)
+    files = {"main": "time_table.db", "class_list": "class_list.db", "home_works": "home_works.db"}
+    # Файлы, которых еще не было: только для них можно ослабить надежность записи
+    new_files = [schema for schema, name in files.items() if not os.path.exists(os.path.join(class_dir, name))]
+
+    # isolation_level=None: транзакцией управляем сами, чтобы охватить все три файла
+    conn = sq.connect(os.path.join(class_dir, "time_table.db"), isolation_level=None)
+    try:
+        conn.execute("ATTACH DATABASE ? AS class_list", (os.path.join(class_dir, "class_list.db"),))
+        conn.execute("ATTACH DATABASE ? AS home_works", (os.path.join(class_dir, "home_works.db"),))
+        for schema in new_files:
+            # Новый файл: журнал держим в памяти и не ждем fsync на каждом шаге.
+            # Режим журнала существующих баз (WAL) не меняется
+            conn.execute(f"PRAGMA {schema}.journal_mode = MEMORY")
+            conn.execute(f"PRAGMA {schema}.synchronous = OFF")
+
+        conn.execute("BEGIN")
+        try:
+            conn.execute(TIME_TABLE_SQL)
+            conn.execute(CLASS_LIST_SQL)
+            conn.execute(HOME_WORK_SQL)
+            conn.execute(HOME_WORK_INDEX_SQL)  # Клиенты ищут задания по одной дате
+
+            if _is_empty(conn, "main.time_table"):
+                conn.executemany(
+                    "INSERT INTO main.time_table (Monday, Tuesday, Wednesday, Thursday, Friday, Saturday, Sunday) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(None,) * 7] * LESSONS_PER_DAY)
+
+            if _is_empty(conn, "home_works.home_work"):
+                start_date = date(year, 1, 1)
+                days = (date(year, 12, 31) - start_date).days + 1
+                conn.executemany("INSERT INTO home_works.home_work (Date) VALUES (?)",
+                                 [((start_date + timedelta(days=i)).strftime("%Y-%m-%d"),) for i in range(days)])
+
+            now = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            for schema in ("main", "class_list", "home_works"):
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {schema}.version (Date TEXT, Version INTEGER);")
+                if _is_empty(conn, f"{schema}.version"):
+                    conn.execute(f"INSERT INTO {schema}.version (Date, Version) VALUES (?, ?);", (now, 1))
+            conn.execute("COMMIT")
+        except sq.Error:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
+    return time.perf_counter() - started
+
+def provision_classes(classes_list, students_dir=STUDENTS_DBS_DIR):
+    """
+    Создает базы для списка классов и печатает время создания каждого.
+
+    Returns:
+        dict: {class_name: время в секундах}.
+    """
+    os.makedirs(students_dir, exist_ok=True)
+    timings = {}
+    started = time.perf_counter()
+    for class_name in classes_list:
+        elapsed = provision_class(os.path.join(students_dir, class_name))
+        timings[class_name] = elapsed
+        print(f"Созданы базы класса {class_name} за {elapsed * 1000:.1f} мс")
+    print(f"Создано классов: {len(timings)} за {(time.perf_counter() - started) * 1000:.1f} мс")
+    return timings
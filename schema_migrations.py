@@ -0,0 +1,145 @@
+import os
+import sys
+import sqlite3 as sq
+from db_pool import pool, BUSY_TIMEOUT
+from write_queue import write_queue
+from db_versions import bump_version
+from lesson_catalog import class_lessons, has_lesson, add_lessons
+
+STUDENTS_DBS_DIR = 'students_dbs'  # Папка с базами классов и учеников
+
+# Миграция класса с номером N добавляет N-й предмет каталога столбцом во все базы класса.
+# Номер последней примененной миграции хранится в самой базе (PRAGMA user_version),
+# поэтому прерванный прогон продолжается с тех файлов, которые не успели обновиться.
+
+def quote_column(name):
+    """Экранирует название предмета для использования в качестве имени столбца."""
+    return '"' + name.replace('"', '""') + '"'
+
+def class_migrations(class_name, students_dir=STUDENTS_DBS_DIR):
+    """Возвращает миграции класса по порядку: [(version, lesson)]."""
+    return list(enumerate(class_lessons(class_name, students_dir), 1))
+
+def class_targets(class_name, students_dir=STUDENTS_DBS_DIR):
+    """
+    Перечисляет базы класса, схема которых зависит от списка предметов:
+    [(путь, таблица)] - домашние задания и файлы оценок всех учеников класса.
+    """
+    class_dir = os.path.join(students_dir, class_name)
+    targets = [(os.path.join(class_dir, "home_works.db"), "home_work")]
+    class_list_db = os.path.join(class_dir, "class_list.db")
+    if os.path.exists(class_list_db):
+        with pool.connection(class_list_db) as conn:
+            logins = [row[0] for row in conn.execute("SELECT Login FROM class_list")]
+        targets.extend((os.path.join(class_dir, f"{login}.db"), "marks") for login in logins)
+    return [(path, table) for path, table in targets if os.path.exists(path)]
+
+def schema_version(db_path):
+    """Возвращает номер последней примененной к базе миграции."""
+    conn = sq.connect(db_path, timeout=BUSY_TIMEOUT)
+    try:
+        return conn.execute("PRAGMA user_version").fetchone()[0]
+    finally:
+        conn.close()
+
+def _apply(conn, table, migrations):
+    """Изменение для очереди записи: добавляет недостающие столбцы и записывает номер миграции."""
+    current = conn.execute("PRAGMA user_version").fetchone()[0]
+    pending = [(version, lesson) for version, lesson in migrations if version > current]
+    if not pending:
+        return 0
+    columns = {col[1] for col in conn.execute(f"PRAGMA table_info({table})")}
+    for _, lesson in pending:
+        # Столбец мог появиться раньше, чем появился журнал миграций
+        if lesson not in columns:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {quote_column(lesson)} TEXT")
+            columns.add(lesson)
+    conn.execute(f"PRAGMA user_version = {int(migrations[-1][0])}")
+    bump_version(conn)  # Клиенты получат обновленный файл при синхронизации
+    return len(pending)
+
+def submit_migrations(db_path, table, migrations):
+    """Ставит миграции базы в очередь ее писателя; результат - Future с числом примененных миграций."""
+    return write_queue.submit(db_path, _apply, table, migrations)
+
+def apply_migrations(db_path, table, migrations):
+    """
+    Применяет к базе недостающие миграции одной транзакцией: добавляет отсутствующие
+    столбцы предметов и записывает номер последней миграции.
+
+    Returns:
+        int: Количество примененных миграций (0, если база уже актуальна).
+    """
+    if not migrations:
+        return 0
+    return submit_migrations(db_path, table, migrations).result()
+
+def class_schema(class_name, students_dir=STUDENTS_DBS_DIR):
+    """Возвращает актуальную схему класса для создания новых баз: (версия, [предметы])."""
+    lessons = class_lessons(class_name, students_dir)
+    return len(lessons), lessons
+
+def _stamp(conn, version):
+    """Изменение для очереди записи: записывает номер миграции."""
+    conn.execute(f"PRAGMA user_version = {int(version)}")
+
+def stamp_schema(target_path, version):
+    """Отмечает только что созданную базу как актуальную: ее столбцы уже соответствуют версии."""
+    write_queue.write(target_path, _stamp, version)
+
+def migrate_class(class_name, students_dir=STUDENTS_DBS_DIR):
+    """
+    Приводит все базы класса к последней миграции. Каждый файл обновляется своей
+    транзакцией; ошибка в одном файле не останавливает остальные, а повторный
+    запуск пропускает уже обновленные файлы.
+
+    Returns:
+        dict: {"version", "migrated", "failed": [пути]}.
+    """
+    migrations = class_migrations(class_name, students_dir)
+    version = len(migrations)
+    migrated, failed = 0, []
+    if not migrations:
+        return {"version": version, "migrated": migrated, "failed": failed}
+    # Файлы обновляются параллельно, каждый - своим писателем
+    futures = [(path, submit_migrations(path, table, migrations))
+               for path, table in class_targets(class_name, students_dir)]
+    for path, future in futures:
+        try:
+            if future.result():
+                migrated += 1
+        except sq.Error as e:
+            print(f"Ошибка миграции {path}: {e}")
+            failed.append(path)
+    if migrated or failed:
+        print(f"Миграция класса {class_name} до версии {version}: обновлено файлов {migrated}, ошибок {len(failed)}")
+    return {"version": version, "migrated": migrated, "failed": failed}
+
+def add_lesson(class_name, lesson, students_dir=STUDENTS_DBS_DIR):
+    """
+    Добавляет предмет классу: записывает его в каталог и применяет новую миграцию
+    ко всем базам класса. Для уже известного предмета базы не открываются.
+
+    Returns:
+        dict: Результат migrate_class или None, если предмет уже был.
+    """
+    if has_lesson(class_name, lesson, students_dir):
+        return None
+    add_lessons(class_name, [lesson], students_dir)
+    return migrate_class(class_name, students_dir)
+
+def migrate_all(students_dir=STUDENTS_DBS_DIR):
+    """Применяет недостающие миграции ко всем классам."""
+    results = {}
+    for class_name in sorted(os.listdir(students_dir)):
+        if os.path.isdir(os.path.join(students_dir, class_name)):
+            results[class_name] = migrate_class(class_name, students_dir)
+    return results
+
+if __name__ == '__main__':
+    # python schema_migrations.py [класс ...] - без аргументов обновляются все классы
+    if len(sys.argv) > 1:
+        for name in sys.argv[1:]:
+            migrate_class(name)
+    else:
+        migrate_all()
@@ -1,12 +1,27 @@
-from flask import Flask, request, send_file, jsonify
+from flask import Flask, request, jsonify, Response
 import sqlite3 as sq
 import os
-import zipfile
-from io import BytesIO
-from datetime import datetime, date, timedelta
+import io
+import time
+from contextlib import contextmanager
+from datetime import datetime
 import requests  # Для отправки данных на сервер
 import json  # Для сериализации данных
 import bcrypt  # Для хеширования паролей
+import marks_store  # Общая база оценок
+import homework_store  # Общая база домашних заданий с полнотекстовым поиском
+from db_pool import pool  # Пул соединений SQLite
+from write_queue import write_queue  # Единственный писатель на файл с групповой фиксацией
+from db_versions import bump_version, file_version  # Версии баз для синхронизации
+from change_log import record_change, get_changes, MAX_CHANGES  # Журнал изменений классов
+from sessions import issue_token, verify_token, revoke_token, sessions_connection  # Токены сессий
+from zip_stream import stream_zip, attachment_headers, COMPRESSION, DEFAULT_COMPRESSION  # Потоковая отдача архивов
+from archive_cache import archive_cache, bundle_etag, stream_parts, part_from_bytes, PART_MAX_BYTES  # Кэш готовых частей архивов
+from provisioning import provision_classes, write_time_table  # Базы классов
+from accounts import import_users, parse_users  # Создание пользователей
+from class_registry import list_classes, class_exists, register_class, registry_version  # Общий список классов
+from lesson_catalog import class_lessons, has_lesson  # Каталог предметов классов
+from schema_migrations import add_lesson, quote_column  # Столбцы предметов в базах классов
 
 app = Flask(__name__)
 
@@ -14,241 +29,51 @@ DATABASE = 'logins.db'  # Путь к базе данных logins.db
 STUDENTS_DBS_DIR = 'students_dbs'  # Папка для баз данных студентов
 ADMINS_DBS_DIR = 'admins_dbs'  # Папка для баз данных администраторов
 TEACHERS_DBS_DIR = 'teachers_dbs'  # Папка для баз данных учителей
-CLASSES_FILE = 'classes.txt'  # Файл для хранения списка классов
 
 # Замените на адрес вашего сервера
 SERVER_URL = 'http://your_server_address:5000'
 
 # Вспомогательные функции
 
+@contextmanager
 def get_db_connection():
-    """Устанавливает соединение с базой данных."""
-    conn = None
+    """Выдает соединение с базой данных logins.db из пула."""
     try:
-        conn = sq.connect(DATABASE)
-        conn.row_factory = sq.Row  # Возвращает строки в виде словарей
-        return conn
+        with pool.connection(DATABASE) as conn:
+            conn.row_factory = sq.Row  # Возвращает строки в виде словарей
+            yield conn
     except sq.Error as e:
-        print(f"Ошибка подключения к базе данных: {e}")
-        if conn:
-            conn.close()
+        print(f"Ошибка базы данных: {e}")
         raise  # Повторно вызывает исключение для обработки на уровне выше
 
 def execute_query(query, args=()):
     """Выполняет запрос к базе данных."""
-    conn = get_db_connection()
-    cur = None
-    try:
+    with get_db_connection() as conn:
         cur = conn.cursor()
-        cur.execute(query, args)
-        conn.commit()
-        if cur.description:  # Проверяет, является ли запрос SELECT
-            return [dict(zip([col[0] for col in cur.description], row)) for row in cur.fetchall()]
-        return None
-    except sq.Error as e:
-        print(f"Ошибка базы данных: {e}")
-        if conn:
+        try:
+            cur.execute(query, args)
+            conn.commit()
+            if cur.description:  # Проверяет, является ли запрос SELECT
+                return [dict(zip([col[0] for col in cur.description], row)) for row in cur.fetchall()]
+            return None
+        except sq.Error:
             conn.rollback()
-        raise
-    finally:
-        if cur:
+            raise
+        finally:
             cur.close()
-        if conn:
-            conn.close()
 
-def update_db_version(db_path):
-    """Обновляет версию базы данных."""
-    conn = None
-    cur = None
+def add_data_bases(classes_list):
+    """Создает базы данных и таблицы для классов (по одной транзакции на класс)."""
     try:
-        conn = sq.connect(db_path)
-        cur = conn.cursor()
-        cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='version';")
-        if cur.fetchone() is None:
-            cur.execute("CREATE TABLE version (Date TEXT, Version INTEGER);")
-            cur.execute("INSERT INTO version (Date, Version) VALUES (?, ?);", (datetime.now(), 1))
-            conn.commit()
-            conn.close()
-            return
-        query = "SELECT Date, Version FROM version;"
-        cur.execute(query)
-        rows = cur.fetchone()
-        if rows:
-            date_val, version_val = rows
-            if version_val is None:
-                ver = 1
-            else:
-                ver = int(version_val) + 1
-        else:
-            cur.execute("INSERT INTO version (Date, Version) VALUES (?, ?);", (datetime.now(), ver))
-        query = "UPDATE version SET Date = ?, Version = ?;"
-        cur.execute(query, (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), ver))
-        conn.commit()
-        conn.close()
+        provision_classes(classes_list, STUDENTS_DBS_DIR)
     except sq.Error as e:
         print(f"Ошибка базы данных: {e}")
         raise
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
-
-def create_admin_db(login):
-    """Создает базу данных для администратора."""
-    conn = None
-    cur = None
-    try:
-        os.makedirs("admins_dbs", exist_ok=True)
-        db_path = f"admins_dbs/{login}.db"
-        conn = sq.connect(db_path)
-        cur = conn.cursor()
-        cur.execute("CREATE TABLE IF NOT EXISTS adm (id INTEGER PRIMARY KEY)")  # Простая таблица
-        conn.commit()
-        print(f"База данных для администратора {login} успешно создана.")
-    except sq.Error as e:
-        print(f"Ошибка при создании базы данных администратора: {e}")
-        raise
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
-
-def create_teacher_db(login, classes):
-    """Создает базу данных для учителя."""
-    conn = None
-    cur = None
-    try:
-        os.makedirs("teachers_dbs", exist_ok=True)
-        db_path = f"teachers_dbs/{login}.db"
-        conn = sq.connect(db_path)
-        cur = conn.cursor()
-
-        # Таблица с классами
-        cur.execute("CREATE TABLE IF NOT EXISTS classes (class_name TEXT PRIMARY KEY)")
-        for class_name in classes:
-            cur.execute("INSERT INTO classes (class_name) VALUES (?)", (class_name,))
-
-        conn.commit()
-        print(f"База данных для учителя {login} успешно создана.")
-    except sq.Error as e:
-        print(f"Ошибка при создании базы данных учителя: {e}")
-        raise
-    finally:
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
-
-def add_data_bases(classes_list):
-    """Создает базы данных и таблицы для классов."""
-    conn = None
-    cur = None
-    try:
-        os.makedirs(STUDENTS_DBS_DIR, exist_ok=True)
-        print("Создана главная папка")
-    except FileExistsError:
-        print("Главная папка уже существует")
-
-    for item in classes_list:
-        class_dir = f"students_dbs/{item}"
-        try:
-            os.mkdir(class_dir)
-            print(f"Создана папка для {item}")
-        except FileExistsError:
-            print(f"Папка для {item} уже существует")
-
-        timetable_db = f"{class_dir}/time_table.db"
-
-        try:
-            conn = sq.connect(timetable_db)
-            cur = conn.cursor()
-            cur.execute("""CREATE TABLE IF NOT EXISTS time_table(
-                id INTEGER PRIMARY KEY,
-                Monday TEXT,
-                Tuesday TEXT,
-                Wednesday TEXT,
-                Thursday TEXT,
-                Friday TEXT,
-                Saturday TEXT,
-                Sunday TEXT);
-                """)
-
-            for i in range(15):
-                cur.execute("INSERT INTO time_table (Monday, Tuesday, Wednesday, Thursday, Friday, Saturday, Sunday) VALUES (?, ?, ?, ?, ?, ?, ?)",
-                            (None, None, None, None, None, None, None))
-            conn.commit()
-            conn.close()
-            print(f"Создано расписание для {item}")
-
-        except sq.Error as e:
-            print(f"Ошибка базы данных: {e}")
-            raise
-
-        class_list_db = f"{class_dir}/class_list.db"
-
-        try:
-            conn = sq.connect(class_list_db)
-            cur = conn.cursor()
-            cur.execute("""CREATE TABLE IF NOT EXISTS class_list(
-                Name TEXT,
-                Surname TEXT,
-                Patronymic TEXT,
-                Login TEXT);
-                """)
-            conn.commit()
-            conn.close()
-            print(f"Создан список класса {item}")
-
-        except sq.Error as e:
-            print(f"Ошибка базы данных: {e}")
-            raise
-
-        home_work_db = f"{class_dir}/home_works.db"
-
-        try:
-            conn = sq.connect(home_work_db)
-            cur = conn.cursor()
-            cur.execute("""CREATE TABLE IF NOT EXISTS home_work(Date TEXT);""")
-            start_date = date(date.today().year, 1, 1)
-            end_date = date(date.today().year, 12, 31)
-            val2 = ""
-            current_date = start_date
-            while current_date <= end_date:
-                val2 = current_date.strftime("%Y-%m-%d")
-                current_date += timedelta(days=1)
-                cur.execute("""INSERT INTO home_work (Date) VALUES (?)""", (val2,))
-            conn.commit()
-            conn.close()
-
-        except sq.Error as e:
-            print(f"Ошибка базы данных: {e}")
-            raise
-
-def load_classes():
-    """Загружает список классов из файла."""
-    try:
-        with open(CLASSES_FILE, 'r') as f:
-            return [line.strip() for line in f.readlines()]
-    except FileNotFoundError:
-        return []
-
-def save_classes(classes):
-    """Сохраняет список классов в файл."""
-    try:
-        with open(CLASSES_FILE, 'w') as f:
-            for cls in classes:
-                f.write(f"{cls}\n")
-    except Exception as e:
-        print(f"Ошибка при сохранении классов в файл: {e}")
-
-existing_classes = load_classes()
 
 @app.route('/classes', methods=['GET'])
 def get_classes():
     """Возвращает список существующих классов."""
-    return jsonify(existing_classes)
+    return jsonify(list_classes())
 
 @app.route('/add_class', methods=['POST'])
 def add_class_route():
@@ -258,13 +83,14 @@ def add_class_route():
         return jsonify({"message": "Отсутствует название класса"}), 400
 
     class_name = data['class_name']
-    if class_name in existing_classes:
+    if class_exists(class_name):
         return jsonify({"message": f"Класс {class_name} уже существует."}), 409
 
     try:
-        add_data_bases([class_name])
-        existing_classes.append(class_name)
-        save_classes(existing_classes)
+        add_data_bases([class_name])  # Повторное создание баз безопасно
+        # Класс появляется в списке только после создания баз; из двух одновременных добавлений успешно одно
+        if not register_class(class_name):
+            return jsonify({"message": f"Класс {class_name} уже существует."}), 409
         return jsonify({"message": f"Класс {class_name} успешно добавлен."}), 201
     except Exception as e:
         print(f"Ошибка при добавлении класса: {e}")
@@ -289,52 +115,105 @@ def time_table_add_route():
         if not os.path.exists(timetable_db):
             return jsonify({"message": f"База данных расписания для класса {class_name} не существует."}), 404
 
-        # Подключаемся к базе данных
-        conn = sq.connect(timetable_db)
-        cur = conn.cursor()
+        # Проверяем номер урока
+        if not isinstance(lesson_number, int) or lesson_number < 1 or lesson_number > 15:
+            return jsonify({"message": "Некорректный номер урока. Должен быть от 1 до 15."}), 400
 
         try:
-            # Проверяем номер урока
-            if not isinstance(lesson_number, int) or lesson_number < 1 or lesson_number > 15:
-                return jsonify({"message": "Некорректный номер урока. Должен быть от 1 до 15."}), 400
-
-            # Обновляем запрос
-            update_query = f"UPDATE time_table SET {day} = ? WHERE id = ?;"
-            cur.execute(update_query, (lesson_name, lesson_number))
-
-            if cur.rowcount == 0:
-                conn.rollback()
+            # Запись идет через очередь файла расписания и фиксируется вместе с одновременными правками
+            updated = write_queue.write(timetable_db, write_time_table, day, lesson_number, lesson_name)
+            if updated == 0:
                 return jsonify({"message": "Нет обновленных строк. Номер урока может быть некорректным."}), 400
 
-            conn.commit()
+            record_change(class_name, "time_table", f"{day}:{lesson_number}",
+                          {"day": day, "lesson_number": lesson_number, "lesson_name": lesson_name})
 
-            # Функция для обновления списка уроков
-            lesson_list_file = os.path.join(STUDENTS_DBS_DIR, class_name, 'lesson_list.txt')
-            with open(lesson_list_file, 'r+', encoding='utf-8') as f:
-                lessons = [line.strip() for line in f]
-                if lesson_name not in lessons:
-                    f.write(lesson_name + '\n')
+            # Новый предмет добавляется столбцом во все базы класса
+            add_lesson(class_name, lesson_name)
 
             # Успешный ответ
             return jsonify({"message": "Запись в расписание успешно добавлена."}), 200
 
         except sq.Error as e:
             print(f"Ошибка базы данных: {e}")
-            conn.rollback()
             return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
 
-        finally:
-            cur.close()
-            conn.close()
-
     except Exception as e:
         print(f"Общая ошибка: {e}")
         return jsonify({"message": f"Общая ошибка сервера: {e}"}), 500
 
-def hash_password(password):
-    """Хеширует пароль с использованием bcrypt."""
-    hashed = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-    return hashed.decode('utf-8')
+def write_home_work(conn, date_str, lesson_name, text):
+    """Изменение для очереди записи: сохраняет домашнее задание по предмету на дату."""
+    column = quote_column(lesson_name)
+    cur = conn.execute(f"UPDATE home_work SET {column} = ? WHERE Date = ?;", (text, date_str))
+    if cur.rowcount == 0:
+        conn.execute(f"INSERT INTO home_work (Date, {column}) VALUES (?, ?);", (date_str, text))
+    bump_version(conn)
+
+@app.route('/home_work_add', methods=['POST'])
+def home_work_add_route():
+    """Записывает домашнее задание по предмету на дату."""
+    data = request.json
+    if not data or not all(k in data for k in ('class_name', 'date', 'lesson_name', 'text')):
+        return jsonify({"message": "Отсутствуют обязательные поля"}), 400
+
+    class_name = data['class_name']
+    date_str = data['date']
+    lesson_name = data['lesson_name']
+    text = data['text']
+
+    home_work_db = os.path.join(STUDENTS_DBS_DIR, class_name, 'home_works.db')
+    if not os.path.exists(home_work_db):
+        return jsonify({"message": f"База домашних заданий для класса {class_name} не существует."}), 404
+
+    try:
+        user, error = check_class_access(class_name)
+        if error:
+            return error
+        if not has_lesson(class_name, lesson_name):
+            return jsonify({"message": f"Предмет {lesson_name} отсутствует в расписании класса."}), 400
+        write_queue.write(home_work_db, write_home_work, date_str, lesson_name, text)
+        homework_store.set_homework([(class_name, date_str, lesson_name, text)])  # Дублируем в общую базу
+        record_change(class_name, "home_work", f"{date_str}:{lesson_name}",
+                      {"date": date_str, "lesson_name": lesson_name, "text": text})
+        return jsonify({"message": "Домашнее задание сохранено."}), 200
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+
+@app.route('/changes', methods=['GET'])
+def changes_route():
+    """
+    Возвращает записи журнала изменений класса с номером больше since.
+    Учителю класса и администратору - все записи; ученику класса - расписание, задания
+    и только собственные оценки.
+    """
+    class_name = request.args.get('class_name')
+    if not class_name:
+        return jsonify({"message": "Отсутствует название класса"}), 400
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args.get('limit', MAX_CHANGES))
+    except ValueError:
+        return jsonify({"message": "since и limit должны быть числами"}), 400
+    if not os.path.isdir(os.path.join(STUDENTS_DBS_DIR, class_name)):
+        return jsonify({"message": f"Класс {class_name} не существует."}), 404
+
+    try:
+        user, error = check_class_access(class_name, students=True)
+        if error:
+            return error
+        changes = get_changes(class_name, since, limit)
+    except sq.Error as e:
+        print(f"Ошибка журнала изменений: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    # Клиент передает last_seq в следующем запросе; если записей нет, курсор не меняется.
+    # Курсор считается до фильтрации, чтобы скрытые записи не запрашивались повторно
+    last_seq = changes[-1]["seq"] if changes else since
+    login, role, _ = user
+    if role == "student":
+        changes = [c for c in changes if c["source"] != "marks" or (c["payload"] or {}).get("student") == login]
+    return jsonify({"changes": changes, "last_seq": last_seq}), 200
 
 def check_password(password, hashed_password):
     """Проверяет, соответствует ли пароль хешу."""
@@ -343,260 +222,501 @@ def check_password(password, hashed_password):
 @app.route('/add_user', methods=['POST'])
 def add_user_route():
     """Добавляет нового пользователя в базу данных."""
-    conn = None
-    cur = None
-
     data = request.json
     if not data:
         return jsonify({"message": "Данные не предоставлены"}), 400
 
     try:
-        role = data.get('role')
-        login = data.get('login')
-        password = data.get('password')
-
-        if not all([role, login, password]):
-            return jsonify({"message": "Отсутствуют обязательные поля"}), 400
-
-        info = ""
-        if role == "admin":
-            admin_name = data.get('admin_name')
-            if not admin_name:
-                return jsonify({"message": "Требуется имя администратора"}), 400
-            info = admin_name
-            create_admin_db(login)
-
-        elif role == "teacher":
-            teacher_surname = data.get('teacher_surname')
-            teacher_name = data.get('teacher_name')
-            teacher_patronymic = data.get('teacher_patronymic')
-            classes = data.get('classes')
-
-            if not all([teacher_surname, teacher_name, teacher_patronymic, classes]):
-                return jsonify({"message": "Отсутствуют данные учителя"}), 400
-
-            info = f"{teacher_surname},{teacher_name},{teacher_patronymic}"
-            create_teacher_db(login, classes)
-
-        elif role == "student":
-            class_name = data.get('class_name')
-            student_name = data.get('student_name')
-            student_surname = data.get('student_surname')
-            student_patronymic = data.get('student_patronymic')
-            if not all([class_name, student_name, student_surname, student_patronymic]):
-                return jsonify({"message": "Отсутствуют данные студента"}), 400
-            info = class_name
-
-            # ------------------------ Операции с базой данных для студентов ------------------------
-            conn = None # Инициализируем conn
-            cur = None  # Инициализируем cur
-            conn2 = None # Инициализируем conn2
-            cur2 = None  # Инициализируем cur2
-            conn3 = None # Инициализируем conn3
-            cur3 = None  # Инициализируем cur3
-            try:
-                conn = get_db_connection() # Используем функцию для получения соединения
-                cur = conn.cursor()
-
-                lesson_list_file = os.path.join(STUDENTS_DBS_DIR, class_name, 'lesson_list.txt')
-                try: #Оборачиваем в try except чтение файла.
-                    with open(lesson_list_file, "r", encoding="utf-8") as f:
-                        lessons_list = [line.strip() for line in f.readlines()]
-                except FileNotFoundError as e:
-                    return jsonify({"message": f"Файл не найден: {e}"}), 500
-                except Exception as e: # Добавляем обработку других возможных ошибок чтения файла
-                     return jsonify({"message": f"Ошибка при чтении файла: {e}"}), 500
-
-
-                val = "?, "
-                strs = "Дата TEXT, \n"
-                strs2 = "Дата, "
-                val2 = ["01.01"]
-                for item in lessons_list:
-                    strs += f"{item} TEXT,\n"
-                    strs2 += f"{item}, "
-                    val += "?, "
-                    val2.append(None)
-
-                strs = strs[:-2]
-                strs2 = strs2[:-2]
-                val = val[:-2]
-                ins = f"""INSERT INTO marks ({strs2}) VALUES ({val})"""
-                e = f"""CREATE TABLE IF NOT EXISTS marks({strs});"""
-
-                student_db_path = os.path.join(STUDENTS_DBS_DIR, class_name, f"{login}.db")
-
-                try: # Оборачиваем работу с базой в try except
-                    conn2 = sq.connect(student_db_path)
-                    cur2 = conn2.cursor()
-                    cur2.execute(e)
-                    conn2.commit()
-
-                    start_date = date(date.today().year, 1, 1)
-                    end_date = date(date.today().year, 12, 31)
-
-                    current_date = start_date
-                    while current_date <= end_date:
-                        val2[0] = current_date.strftime("%Y-%m-%d")
-                        current_date += timedelta(days=1)
-                        cur2.execute(ins, tuple(val2))  # Передаем val2 как кортеж
-
-                    conn2.commit()
-
-                except sq.Error as e:
-                    print(f"Ошибка базы данных: {e}")
-                    return jsonify({"message": "Ошибка базы данных при настройке студента"}), 500
-                except Exception as e:
-                    return jsonify({"message": f"Ошибка при работе с базой данных ученика: {e}"}), 500
-
-                try: # оборачиваем создание записи о студенте в try except
-                    class_list_db_path = os.path.join(STUDENTS_DBS_DIR, class_name, "class_list.db")
-                    conn3 = sq.connect(class_list_db_path)
-                    cur3 = conn3.cursor()
-                    cur3.execute(f"""INSERT INTO class_list(Name, Surname, Patronymic, Login) VALUES (?, ?, ?, ?)""",
-                                 (student_name, student_surname, student_patronymic, login))
-                    conn3.commit()
-
-                except sq.Error as e:
-                    print(f"Ошибка базы данных: {e}")
-                    return jsonify({"message": "Ошибка при добавлении студента в список класса"}), 500
-                except Exception as e:
-                    return jsonify({"message": f"Ошибка при добавлении ученика в список класса: {e}"}), 500
-
-
-            except FileNotFoundError as e:
-                return jsonify({"message": f"Файл не найден: {e}"}), 500
-            except sq.Error as e:
-                print(f"Ошибка базы данных: {e}")
-                return jsonify({"message": "Ошибка базы данных при настройке студента"}), 500
-            except Exception as e:
-                print(f"Неожиданная ошибка: {e}")
-                return jsonify({"message": "Неожиданная ошибка при настройке студента"}), 500
-    finally:
-        if cur2:  # Проверяем, что cur2 существует
-                cur2.close()
-        if conn2: # Проверяем, что conn2 существует
-                conn2.close()
-        if cur3:  # Проверяем, что cur3 существует
-                cur3.close()
-        if conn3: # Проверяем, что conn3 существует
-                conn3.close()
-        if cur:  # Проверяем, что cur существует
-                cur.close()
-        if conn: # Проверяем, что conn существует
-                conn.close()
+        result = import_users([data], DATABASE, STUDENTS_DBS_DIR)[0]
+    except sq.Error as e:  # Соединения возвращаются в пул автоматически
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    if result["ok"]:
+        return jsonify({"message": result["message"]}), 200
+    status = 409 if "уже существует" in result["message"] else 400
+    return jsonify({"message": result["message"]}), status
+
+@app.route('/users/import', methods=['POST'])
+def import_users_route():
+    """
+    Массовое добавление пользователей из CSV (Content-Type: text/csv, заголовок: role, login,
+    password, surname, name, patronymic, class_name, classes) или JSON (список записей в формате /add_user).
+    Возвращает отчет по каждой строке. Доступно только администратору (токен в заголовке Authorization).
+    """
+    # Тело запроса - данные импорта, которые читаются потоком, поэтому токен берется только из заголовка
+    auth = request.headers.get('Authorization', '')
+    if not auth.startswith('Bearer '):
+        return jsonify({"message": "Требуется токен сессии"}), 401
+    try:
+        session = verify_token(auth[len('Bearer '):])
+    except sq.Error as e:
+        print(f"Ошибка базы сессий: {e}")
+        return jsonify({"message": "Внутренняя ошибка сервера"}), 500
+    if not session:
+        return jsonify({"message": "Недействительный или истекший токен"}), 401
+    if session["role"] != "admin":
+        return jsonify({"message": "Импорт пользователей доступен только администратору"}), 403
 
+    try:
+        if 'csv' in (request.content_type or ''):
+            stream = io.TextIOWrapper(request.stream, encoding='utf-8-sig', newline='')
+        else:
+            stream = io.TextIOWrapper(request.stream, encoding='utf-8')
+        records = parse_users(stream, request.content_type or '')
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({"message": f"Не удалось разобрать данные: {e}"}), 400
+    if not isinstance(records, list) or not records:
+        return jsonify({"message": "Данные не предоставлены"}), 400
 
-@app.route('/process', methods=['POST'])
-def process():
-    """Обрабатывает вход пользователя и возвращает соответствующие файлы."""
-    data = request.json.get('message')
+    try:
+        started = time.perf_counter()
+        report = import_users(records, DATABASE, STUDENTS_DBS_DIR)
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    created = sum(r["ok"] for r in report)
+    print(f"Импорт пользователей: {created} из {len(report)} за {time.perf_counter() - started:.1f} с")
+    return jsonify({"created": created, "failed": len(report) - created, "report": report}), 200
+
+def authenticate_user(login, password):
+    """Проверяет логин и пароль. Возвращает (role, info) или None."""
+    with get_db_connection() as conn:
+        # Проверяем наличие пользователя в базе данных
+        user = conn.execute("SELECT password, role, info FROM users WHERE login = ?", (login,)).fetchone()
+    # Соединение уже возвращено в пул: bcrypt не держит его занятым
+    if user and check_password(password, user[0]):
+        return user[1], user[2]
+    return None
+
+def get_user_files(login, role, info):
+    """Возвращает список файлов баз, которые получает пользователь, или None для неизвестной роли."""
+    if role == "student":
+        return [
+            f"{STUDENTS_DBS_DIR}/{info}/{login}.db",
+            f"{STUDENTS_DBS_DIR}/{info}/home_works.db",
+            f"{STUDENTS_DBS_DIR}/{info}/time_table.db"
+        ]
+    elif role == "teacher":
+        return [f"{TEACHERS_DBS_DIR}/{login}.db"]
+    elif role == "admin":
+        return [f"{ADMINS_DBS_DIR}/{login}.db"]
+    return None
+
+def get_request_token():
+    """Возвращает токен сессии из заголовка Authorization или поля token тела запроса."""
+    auth = request.headers.get('Authorization', '')
+    if auth.startswith('Bearer '):
+        return auth[len('Bearer '):]
+    body = request.get_json(silent=True) or {}
+    return body.get('token')
+
+def get_request_user():
+    """
+    Определяет пользователя запроса: по токену сессии, а без него - по логину и паролю.
+
+    Returns:
+        tuple: (login, role, info); None, если проверка не пройдена; False, если данных для входа нет.
+    """
+    token = get_request_token()
+    if token:
+        session = verify_token(token)
+        return (session["login"], session["role"], session["info"]) if session else None
+    data = (request.get_json(silent=True) or {}).get('message')
+    if not data or len(data) != 2:
+        return False
+    user = authenticate_user(data[0], data[1])  # bcrypt: только для клиентов без токена
+    return (data[0],) + tuple(user) if user else None
+
+def get_request_compression():
+    """Возвращает способ сжатия архива из параметра compression ("stored" или "deflate") или None, если он неизвестен."""
+    body = request.get_json(silent=True) or {}
+    compression = request.args.get('compression') or body.get('compression') or DEFAULT_COMPRESSION
+    return compression if compression in COMPRESSION else None
+
+def busy_response():
+    """Ответ для файлов, журнал WAL которых сейчас не удалось перенести: клиент повторит запрос."""
+    response = jsonify({"message": "Файлы обновляются, повторите запрос позже"})
+    response.status_code = 503
+    response.headers["Retry-After"] = "1"
+    return response
+
+def archive_response(files, compression, download_name, extra=()):
+    """
+    Отдает ZIP-архив файлов, собирая его из кэша готовых частей.
+    Архив без служебных файлов получает ETag; если он совпадает с If-None-Match,
+    возвращается 304 без тела.
+    """
+    headers = attachment_headers(download_name)
+    if any(os.path.getsize(fp) > PART_MAX_BYTES for fp in files):
+        # Крупные файлы не держим в памяти: собираем архив потоком, как раньше
+        if not all(pool.checkpoint(file) for file in files):
+            return busy_response()
+        return Response(stream_zip(files, compression, extra), mimetype="application/zip", headers=headers)
+
+    keys = [archive_cache.part_key(fp, compression) for fp in files]
+    etag = None
+    if not extra:
+        etag = bundle_etag(keys)
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+    entries = [archive_cache.get_part(key) for key in keys]
+    if etag:
+        etag = bundle_etag([key for key, _ in entries])  # База могла измениться после проверки
+    parts = [part for _, part in entries]
+    parts += [part_from_bytes(name, content, compression) for name, content in extra]
+    response = Response(stream_parts(parts), mimetype="application/zip", headers=headers)
+    if etag:
+        response.set_etag(etag)
+    return response
+
+@app.route('/login', methods=['POST'])
+def login_route():
+    """Проверяет пароль один раз и выдает токен сессии для остальных запросов."""
+    data = (request.get_json(silent=True) or {}).get('message')
     if not data or len(data) != 2:
         return jsonify({"message": "Некорректный ввод"}), 400
+    try:
+        user = authenticate_user(data[0], data[1])
+        if not user:
+            return jsonify({"message": "Неверный логин или пароль"}), 401
+        token, ttl = issue_token(data[0], user[0], user[1])
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": "Внутренняя ошибка сервера"}), 500
+    return jsonify({"token": token, "expires_in": ttl, "role": user[0], "info": user[1]}), 200
+
+@app.route('/logout', methods=['POST'])
+def logout_route():
+    """Отзывает токен сессии."""
+    try:
+        revoke_token(get_request_token())
+    except sq.Error as e:
+        print(f"Ошибка базы сессий: {e}")
+        return jsonify({"message": "Внутренняя ошибка сервера"}), 500
+    return jsonify({"message": "Сеанс завершен."}), 200
 
-    print(f"Получено от клиента: {data}")
+@app.route('/process', methods=['POST'])
+def process():
+    """
+    Возвращает файлы пользователя.
+    Принимает токен сессии (заголовок Authorization: Bearer или поле token)
+    либо, для старых клиентов, {"message": [login, password]}.
+    """
+    compression = get_request_compression()
+    if compression is None:
+        return jsonify({"message": "Неизвестный способ сжатия"}), 400
 
-    conn = None
-    cur = None
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        # Проверяем наличие пользователя в базе данных
-        cur.execute("SELECT password FROM users WHERE login = ?", (data[0],))
-        user = cur.fetchone()
-
-        if user:
-           # Верифицируем пароль
-           hashed_password = user[0]
-           if check_password(data[1], hashed_password):
-            # Получаем роль и информацию о пользователе
-            cur.execute("SELECT role, info FROM users WHERE login = ?", (data[0],))
-            inf = cur.fetchone()
-            role, goto = inf
-
-            # Определяем путь к базе данных в зависимости от роли
-            if role == "student":
-                way = "students_dbs"
-                file_paths = [
-                    f"{way}/{goto}/{data[0]}.db",
-                    f"{way}/{goto}/home_works.db",
-                    f"{way}/{goto}/time_table.db"
-                ]
-            elif role == "teacher":
-                way = "teachers_dbs"
-                file_paths = [
-                    f"{way}/{data[0]}.db",
-                ]
-
-            elif role == "admin":
-                way = "admins_dbs"
-                file_paths = [
-                    f"{way}/{data[0]}.db",
-                ]
-            else:
-                return jsonify({"message": "Неизвестная роль"}), 400
-
-            # Проверяем, существуют ли файлы
-            existing_files = [fp for fp in file_paths if os.path.exists(fp)]
-            if not existing_files:
-                return jsonify({"message": "Файлы не найдены"}), 404
-
-            # Создаём архив в памяти
-            memory_file = BytesIO()
-            with zipfile.ZipFile(memory_file, 'w') as zipf:
-                for file in existing_files:
-                    zipf.write(file, os.path.basename(file))
-
-            # Перемещаем указатель в начало файла
-            memory_file.seek(0)
-
-            # Отправляем архив клиенту
-            return send_file(
-                memory_file,
-                as_attachment=True,
-                download_name=f"{data[0]}_files.zip",
-                mimetype="application/zip"
-            )
-           else:
-               return jsonify({"message": "Неверный логин или пароль"}), 401
-        else:
+        user = get_request_user()
+        if user is False:
+            return jsonify({"message": "Некорректный ввод"}), 400
+        if not user:
             return jsonify({"message": "Неверный логин или пароль"}), 401
+        login = user[0]
+        print(f"Запрос файлов: {login}")
+
+        # Определяем файлы в зависимости от роли
+        file_paths = get_user_files(*user)
+        if file_paths is None:
+            return jsonify({"message": "Неизвестная роль"}), 400
+
+        # Проверяем, существуют ли файлы
+        existing_files = [fp for fp in file_paths if os.path.exists(fp)]
+        if not existing_files:
+            return jsonify({"message": "Файлы не найдены"}), 404
+
+        # Отправляем архив из готовых частей; при совпадении ETag - 304 без тела
+        return archive_response(existing_files, compression, f"{login}_files.zip")
 
     except Exception as e:
         print(f"Ошибка: {e}")
         return jsonify({"message": "Внутренняя ошибка сервера"}), 500
 
-    finally:
-        # Закрываем соединение с базой данных
-        if cur:
-            cur.close()
-        if conn:
-            conn.close()
+@app.route('/sync', methods=['POST'])
+def sync():
+    """
+    Отдает только изменившиеся файлы.
+    Клиент передает токен сессии (или {"message": [login, password]}) и {"versions": {имя файла: версия}},
+    полученные при прошлой синхронизации. Если ничего не изменилось, архив не передается.
+    """
+    body = request.get_json(silent=True) or {}
+    client_versions = body.get('versions') or {}
+    if not isinstance(client_versions, dict):
+        return jsonify({"message": "Некорректный ввод"}), 400
+    compression = get_request_compression()
+    if compression is None:
+        return jsonify({"message": "Неизвестный способ сжатия"}), 400
 
-# Функция для загрузки классов из файла
-def load_classes():
     try:
-        with open(CLASSES_FILE, 'r') as f:
-            return [line.strip() for line in f.readlines()]
-    except FileNotFoundError:
+        user = get_request_user()
+        if user is False:
+            return jsonify({"message": "Некорректный ввод"}), 400
+        if not user:
+            return jsonify({"message": "Неверный логин или пароль"}), 401
+        login = user[0]
+
+        file_paths = get_user_files(*user)
+        if file_paths is None:
+            return jsonify({"message": "Неизвестная роль"}), 400
+        existing_files = [fp for fp in file_paths if os.path.exists(fp)]
+        if not existing_files:
+            return jsonify({"message": "Файлы не найдены"}), 404
+
+        # Текущие версии всех файлов пользователя
+        # Отдаваемые файлы снимаются не раньше этих меток, поэтому метка не новее содержимого
+        versions = {os.path.basename(fp): file_version(fp) for fp in existing_files}
+        changed = [fp for fp in existing_files if client_versions.get(os.path.basename(fp)) != versions[os.path.basename(fp)]]
+        if not changed:
+            return jsonify({"message": "Данные не изменились", "versions": versions}), 200
+
+        # Версии передаются в архиве для следующей синхронизации
+        return archive_response(changed, compression, f"{login}_sync.zip",
+                                extra=[("versions.json", json.dumps(versions).encode("utf-8"))])
+
+    except Exception as e:
+        print(f"Ошибка синхронизации: {e}")
+        return jsonify({"message": "Внутренняя ошибка сервера"}), 500
+
+def get_teacher_classes(login):
+    """Возвращает список классов учителя из его базы."""
+    db_path = os.path.join(TEACHERS_DBS_DIR, f"{login}.db")
+    if not os.path.exists(db_path):
         return []
+    with pool.connection(db_path) as conn:
+        return [row[0] for row in conn.execute("SELECT class_name FROM classes")]
+
+def check_class_access(*class_names, students=False):
+    """
+    Проверяет, что пользователь запроса может работать с оценками классов (учитель этих классов или администратор).
+    С students=True доступ есть и у учеников этих классов (для общих данных класса, например заданий).
+
+    Returns:
+        tuple: (пользователь, None) или (None, ответ с ошибкой).
+    """
+    user = get_request_user()
+    if user is False:
+        return None, (jsonify({"message": "Требуется токен сессии"}), 401)
+    if not user:
+        return None, (jsonify({"message": "Неверный логин или пароль"}), 401)
+    login, role, _ = user
+    if role == "admin":
+        return user, None
+    if role == "teacher":
+        teacher_classes = set(get_teacher_classes(login))
+        if all(class_name in teacher_classes for class_name in class_names):
+            return user, None
+    if role == "student" and students and all(class_name == user[2] for class_name in class_names):
+        return user, None
+    return None, (jsonify({"message": "Нет доступа к данным класса"}), 403)
+
+@app.route('/gradebook', methods=['GET'])
+def gradebook_route():
+    """
+    Журнал учителя по одному предмету.
+    Без параметра lesson возвращает список учеников и предметов класса:
+    {"students": [{login, name}], "lessons": [...]}.
+    С параметрами lesson, start и end (YYYY-MM-DD) возвращает оценки за это окно дат:
+    {"marks": {login: {date: оценка}}}.
+    """
+    class_name = request.args.get('class_name')
+    if not class_name:
+        return jsonify({"message": "Отсутствует название класса"}), 400
+    class_dir = os.path.join(STUDENTS_DBS_DIR, class_name)
+    if not os.path.isdir(class_dir):
+        return jsonify({"message": f"Класс {class_name} не существует."}), 404
+    lesson = request.args.get('lesson')
 
-# Функция для сохранения классов в файл
-def save_classes(classes):
     try:
-        with open(CLASSES_FILE, 'w') as f:
-            for cls in classes:
-                f.write(f"{cls}\n")
-    except Exception as e:
-        print(f"Ошибка при сохранении классов в файл: {e}")
+        user, error = check_class_access(class_name)
+        if error:
+            return error
+
+        if not lesson:
+            with pool.connection(os.path.join(class_dir, "class_list.db")) as conn:
+                students = [{"login": login, "name": " ".join(part for part in (surname, name, patronymic) if part)}
+                            for name, surname, patronymic, login in conn.execute(
+                                "SELECT Name, Surname, Patronymic, Login FROM class_list ORDER BY Surname, Name")]
+            return jsonify({"students": students, "lessons": class_lessons(class_name)}), 200
+
+        start, end, error = parse_date_range()
+        if error:
+            return error
+        marks = marks_store.get_lesson_marks(class_name, lesson, start, end)
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    return jsonify({"marks": marks}), 200
+
+def parse_date_range(max_days=366, required=True):
+    """
+    Читает start и end (YYYY-MM-DD) из параметров запроса.
+
+    Returns:
+        tuple: (start, end, None) или (None, None, ответ с ошибкой). Без required
+        отсутствующие даты возвращаются как None.
+    """
+    start = request.args.get('start')
+    end = request.args.get('end')
+    if not required and not start and not end:
+        return None, None, None
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.strptime(end, "%Y-%m-%d").date()
+    except (TypeError, ValueError):
+        return None, None, (jsonify({"message": "start и end должны быть датами YYYY-MM-DD"}), 400)
+    if end_date < start_date or (end_date - start_date).days > max_days:
+        return None, None, (jsonify({"message": "Некорректное окно дат"}), 400)
+    return start, end, None
+
+@app.route('/homework', methods=['GET'])
+def homework_route():
+    """
+    Задания класса за диапазон дат start..end (YYYY-MM-DD), при необходимости по предмету lesson:
+    {"homework": [{date, lesson, text}]}.
+    """
+    class_name = request.args.get('class_name')
+    if not class_name:
+        return jsonify({"message": "Отсутствует название класса"}), 400
+    start, end, error = parse_date_range()
+    if error:
+        return error
+    try:
+        user, error = check_class_access(class_name, students=True)
+        if error:
+            return error
+        homework = homework_store.get_homework(class_name, start, end, request.args.get('lesson'))
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    return jsonify({"homework": homework}), 200
+
+@app.route('/homework/search', methods=['GET'])
+def homework_search_route():
+    """
+    Полнотекстовый поиск по заданиям класса: параметр q - слова запроса, необязательные
+    start/end и lesson сужают поиск. Возвращает {"results": [{date, lesson, text, snippet}]}.
+    """
+    class_name = request.args.get('class_name')
+    text = request.args.get('q', '').strip()
+    if not class_name or not text:
+        return jsonify({"message": "Отсутствуют class_name или q"}), 400
+    try:
+        limit = min(int(request.args.get('limit', homework_store.MAX_RESULTS)), homework_store.MAX_RESULTS)
+    except ValueError:
+        return jsonify({"message": "limit должен быть числом"}), 400
+    start, end, error = parse_date_range(max_days=3660, required=False)
+    if error:
+        return error
+    try:
+        user, error = check_class_access(class_name, students=True)
+        if error:
+            return error
+        results = homework_store.search_homework(class_name, text, start, end, request.args.get('lesson'), limit)
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    return jsonify({"results": results}), 200
+
+@app.route('/stats', methods=['GET'])
+def stats_route():
+    """
+    Статистика оценок (количество, сумма, среднее, распределение 2-5), уже посчитанная при записи:
+    с student и class_name - ученика, с class_name - класса, без них - всей школы (только администратор).
+    Параметр lesson сужает статистику до одного предмета.
+    """
+    class_name = request.args.get('class_name')
+    student = request.args.get('student')
+    lesson = request.args.get('lesson')
+    if student and not class_name:
+        return jsonify({"message": "Для статистики ученика укажите class_name"}), 400
 
-# Загружаем существующие классы при запуске приложения
-if not os.path.exists(CLASSES_FILE):
-    with open(CLASSES_FILE, 'w') as f:
-        f.write("")  # Создаем пустой файл
-    existing_classes = []
-else:
-    existing_classes = load_classes()
+    try:
+        if class_name:
+            # Ученик видит только свою статистику, учитель - статистику своих классов
+            user, error = check_class_access(class_name, students=bool(student))
+            if error:
+                return error
+            if user[1] == "student" and student != user[0]:
+                return jsonify({"message": "Нет доступа к данным класса"}), 403
+        else:
+            user, error = check_class_access()
+            if error:
+                return error
+            if user[1] != "admin":
+                return jsonify({"message": "Статистика школы доступна только администратору"}), 403
+        stats = marks_store.get_stats(class_name, student, lesson)
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    return jsonify(stats), 200
+
+MAX_MARKS_BATCH = 1000  # Наибольшее число оценок в одном запросе /marks/batch
+
+@app.route('/marks/batch', methods=['POST'])
+def marks_batch_route():
+    """
+    Записывает несколько оценок за один запрос.
+    Принимает {"class_name": ..., "entries": [{student, date, lesson, value}]}; класс можно
+    указать и в самой записи. Пустое value удаляет оценку.
+    Возвращает {"results": [{ok, message}], "written": число записанных} в порядке записей.
+    """
+    data = request.get_json(silent=True) or {}
+    entries = data.get('entries')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({"message": "Отсутствует список entries"}), 400
+    if len(entries) > MAX_MARKS_BATCH:
+        return jsonify({"message": f"Не более {MAX_MARKS_BATCH} оценок за запрос"}), 400
+
+    parsed = []
+    for entry in entries:
+        if not isinstance(entry, dict):
+            return jsonify({"message": "Каждая запись должна быть объектом"}), 400
+        class_name = entry.get('class_name') or data.get('class_name')
+        student, date_str, lesson = entry.get('student'), entry.get('date'), entry.get('lesson')
+        if not all([class_name, student, date_str, lesson]):
+            return jsonify({"message": "Каждая запись требует class_name, student, date и lesson"}), 400
+        if any(sep in name for name in (class_name, student) for sep in ('/', '\\', '..')):
+            return jsonify({"message": "Некорректное имя класса или ученика"}), 400
+        try:
+            datetime.strptime(date_str, "%Y-%m-%d")
+        except (TypeError, ValueError):
+            return jsonify({"message": f"Некорректная дата: {date_str}"}), 400
+        value = entry.get('value')
+        parsed.append((student, class_name, date_str, lesson, "" if value is None else str(value)))
+
+    try:
+        user, error = check_class_access(*{e[1] for e in parsed})
+        if error:
+            return error
+        errors = marks_store.write_marks_batch(parsed)
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    results = [{"ok": err is None, "message": err or "Оценка записана"} for err in errors]
+    return jsonify({"results": results, "written": sum(r["ok"] for r in results)}), 200
+
+@app.route('/class_marks', methods=['GET'])
+def class_marks_route():
+    """
+    Возвращает оценки всего класса за день одним запросом к общей базе оценок:
+    {"marks": {login: {урок: оценка}}}.
+    """
+    class_name = request.args.get('class_name')
+    date_str = request.args.get('date')
+    if not class_name or not date_str:
+        return jsonify({"message": "Отсутствуют class_name или date"}), 400
+
+    try:
+        user, error = check_class_access(class_name)
+        if error:
+            return error
+        marks = marks_store.get_class_marks(class_name, date_str)
+    except sq.Error as e:
+        print(f"Ошибка базы данных: {e}")
+        return jsonify({"message": f"Ошибка базы данных: {e}"}), 500
+    return jsonify({"marks": marks}), 200
 
 @app.after_request
 def after_request(response):
@@ -646,16 +766,15 @@ def send_data_to_server(file_path, file_content):
         print(f"Ошибка запроса: {e}")
         return None
 
-if __name__ == '__main__':
+def init_storage():
+    """Создает папки баз, таблицу пользователей и общую базу оценок, если их нет."""
     # Создаем необходимые директории, если они не существуют
     os.makedirs(STUDENTS_DBS_DIR, exist_ok=True)
     os.makedirs(ADMINS_DBS_DIR, exist_ok=True)
     os.makedirs(TEACHERS_DBS_DIR, exist_ok=True)
 
     # Создаем базу данных logins.db, если она не существует, и добавляем таблицу users
-    conn = get_db_connection()
-    cur = conn.cursor()
-    cur.execute("""
+    execute_query("""
         CREATE TABLE IF NOT EXISTS users (
             login TEXT UNIQUE,
             password TEXT,
@@ -663,15 +782,22 @@ if __name__ == '__main__':
             info TEXT
         )
     """)
-    conn.commit()
-    cur.close()
-    conn.close()
-
-    # Загружаем существующие классы
-    if not os.path.exists(CLASSES_FILE):
-        with open(CLASSES_FILE, 'w') as f:
-            f.write("")  # Создаем пустой файл
-        existing_classes = []
-    else:
-        existing_classes = load_classes()
+
+    # Создаем общую базу оценок, если она не существует
+    with marks_store.marks_connection():
+        pass
+
+    # Создаем общую базу заданий с полнотекстовым индексом
+    with homework_store.homework_connection():
+        pass
+
+    # Создаем базу сессий: общий для процессов ключ подписи и отозванные токены
+    with sessions_connection():
+        pass
+
+    # Создаем реестр классов (при первом запуске в него переносится classes.txt)
+    registry_version()
+
+if __name__ == '__main__':
+    init_storage()
     app.run(debug=True)
\ No newline at end of file
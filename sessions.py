@@ -0,0 +1,167 @@
+import os
+import hmac
+import json
+import time
+import base64
+import hashlib
+import secrets
+import threading
+from contextlib import contextmanager
+from db_pool import pool
+from write_queue import write_queue
+
+SESSIONS_DB = 'sessions.db'  # Общий для всех процессов сервера ключ подписи и отозванные токены
+SESSION_TTL = 30 * 60  # Время жизни токена в секундах
+MAX_SESSIONS = 10000  # После этого числа сессий истекшие удаляются при выдаче нового токена
+
+_lock = threading.Lock()
+_sessions = {}  # {токен: сессия}: проверенные токены, чтобы не разбирать их повторно
+_keys = {}  # {путь к базе сессий: ключ подписи}
+_initialized = set()  # Базы, в которых таблицы уже проверены этим процессом
+
+def init_sessions_store(conn):
+    """Создает таблицы ключа подписи и отозванных токенов, если их нет."""
+    cur = conn.cursor()
+    # Одна строка с ключом: его создает первый запущенный процесс, остальные читают
+    cur.execute("""CREATE TABLE IF NOT EXISTS secret(
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        key BLOB NOT NULL)
+        """)
+    # Отозванные до истечения токены; строки удаляются после истечения срока токена
+    cur.execute("""CREATE TABLE IF NOT EXISTS revoked(
+        jti TEXT PRIMARY KEY,
+        exp INTEGER NOT NULL)
+        """)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_revoked_exp ON revoked(exp)")
+    conn.commit()
+    cur.close()
+
+@contextmanager
+def sessions_connection(db_path=SESSIONS_DB):
+    """Выдает соединение с базой сессий из пула."""
+    path = os.path.abspath(db_path)
+    with pool.connection(db_path) as conn:
+        if path not in _initialized:
+            init_sessions_store(conn)
+            _initialized.add(path)
+        yield conn
+
+def _store_key(conn, key):
+    """Изменение для очереди записи: сохраняет ключ, если его еще нет."""
+    conn.execute("INSERT OR IGNORE INTO secret (id, key) VALUES (1, ?)", (key,))
+
+def _secret_key(db_path=SESSIONS_DB):
+    """
+    Ключ подписи: из переменной окружения DIARY_SECRET_KEY, а если она не задана -
+    общий ключ из базы сессий, чтобы токен одного процесса принимали остальные.
+    """
+    env_key = os.environ.get('DIARY_SECRET_KEY', '').encode('utf-8')
+    if env_key:
+        return env_key
+    path = os.path.abspath(db_path)
+    key = _keys.get(path)
+    if key is not None:
+        return key
+    with _lock:
+        if path not in _keys:
+            with sessions_connection(db_path):
+                pass
+            write_queue.write(db_path, _store_key, secrets.token_bytes(32))
+            with sessions_connection(db_path) as conn:
+                _keys[path] = conn.execute("SELECT key FROM secret WHERE id = 1").fetchone()[0]
+        return _keys[path]
+
+def _sign(body):
+    return hmac.new(_secret_key(), body, hashlib.sha256).digest()
+
+def _b64(raw):
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+def _unb64(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _is_revoked(jti):
+    with sessions_connection() as conn:
+        return conn.execute("SELECT 1 FROM revoked WHERE jti = ?", (jti,)).fetchone() is not None
+
+def issue_token(login, role, info, ttl=SESSION_TTL):
+    """
+    Выдает подписанный токен сессии.
+
+    Returns:
+        tuple: (токен, время жизни в секундах).
+    """
+    if len(_sessions) > MAX_SESSIONS:
+        purge_expired()
+    session = {"login": login, "role": role, "info": info, "exp": int(time.time()) + ttl,
+               "jti": secrets.token_urlsafe(12)}
+    body = json.dumps(session, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    token = f"{_b64(body)}.{_b64(_sign(body))}"
+    with _lock:
+        _sessions[token] = session
+    return token, ttl
+
+def verify_token(token):
+    """
+    Проверяет токен сессии.
+
+    Returns:
+        dict: {login, role, info, exp, jti} или None, если токен недействителен, истек или отозван.
+    """
+    if not token:
+        return None
+    now = time.time()
+    with _lock:
+        session = _sessions.get(token)
+    if session is None:
+        # Токен выдан другим процессом или до перезапуска: проверяем подпись
+        try:
+            body_part, sig_part = token.split('.', 1)
+            body = _unb64(body_part)
+            if not hmac.compare_digest(_sign(body), _unb64(sig_part)):
+                return None
+            session = json.loads(body)
+        except (ValueError, TypeError):
+            return None
+        if "jti" not in session:
+            return None
+        if session.get("exp", 0) > now:
+            with _lock:
+                _sessions[token] = session
+    if session["exp"] <= now:
+        with _lock:
+            _sessions.pop(token, None)
+        return None
+    # Токен мог отозвать другой процесс, поэтому отзыв проверяется по базе при каждом запросе
+    if _is_revoked(session["jti"]):
+        with _lock:
+            _sessions.pop(token, None)
+        return None
+    return session
+
+def _revoke(conn, jti, exp):
+    """Изменение для очереди записи: отзыв токена."""
+    conn.execute("INSERT OR IGNORE INTO revoked (jti, exp) VALUES (?, ?)", (jti, exp))
+
+def _purge_revoked(conn, now):
+    """Изменение для очереди записи: удаляет отзывы истекших токенов."""
+    conn.execute("DELETE FROM revoked WHERE exp <= ?", (now,))
+
+def revoke_token(token):
+    """Отзывает токен до истечения его срока во всех процессах сервера."""
+    session = verify_token(token)
+    if session is None:
+        return
+    write_queue.write(SESSIONS_DB, _revoke, session["jti"], session["exp"])
+    with _lock:
+        _sessions.pop(token, None)
+
+def purge_expired():
+    """Удаляет из памяти истекшие сессии, а из базы - отзывы истекших токенов."""
+    now = time.time()
+    with _lock:
+        for token in [t for t, s in _sessions.items() if s["exp"] <= now]:
+            del _sessions[token]
+    with sessions_connection():
+        pass
+    write_queue.write(SESSIONS_DB, _purge_revoked, int(now))
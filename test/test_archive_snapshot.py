@@ -0,0 +1,67 @@
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from db_pool import pool
+from db_versions import bump_version, read_version
+from archive_cache import ArchiveCache
+
+class ArchiveSnapshotTest(unittest.TestCase):
+    """Метка версии элемента архива всегда описывает байты, которые в нем лежат."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "stud1.db")
+        with pool.transaction(self.path) as conn:
+            bump_version(conn)
+        self.cache = ArchiveCache()
+
+    def tearDown(self):
+        pool.close_all()
+        self._tmp.cleanup()
+
+    def _write(self):
+        """Запись другим соединением, как из другого процесса сервера."""
+        conn = sqlite3.connect(self.path)
+        try:
+            with conn:
+                bump_version(conn)
+        finally:
+            conn.close()
+
+    def _shipped_version(self, part):
+        """Версия из байтов элемента (без сжатия данные - хвост элемента)."""
+        copy_path = os.path.join(self._tmp.name, "shipped.db")
+        with open(copy_path, "wb") as f:
+            f.write(part.body[len(part.body) - part.file_size:])
+        conn = sqlite3.connect(copy_path)
+        try:
+            return f"v{read_version(conn)}"
+        finally:
+            conn.close()
+
+    def test_write_between_checkpoint_and_read(self):
+        pool.checkpoint(self.path)
+        # Читатель держит журнал WAL, поэтому запись после контрольной точки остается в -wal
+        reader = sqlite3.connect(self.path)
+        reader.execute("BEGIN")
+        reader.execute("SELECT * FROM version").fetchall()
+        try:
+            self._write()
+            key = self.cache.part_key(self.path, "stored")
+            self.assertEqual(key[1], "v2")
+            self._write()  # Запись между получением ключа и чтением байтов
+            key, part = self.cache.get_part(key)
+        finally:
+            reader.rollback()
+            reader.close()
+        self.assertEqual(key[1], "v3")
+        self.assertEqual(self._shipped_version(part), key[1])
+
+if __name__ == '__main__':
+    unittest.main()
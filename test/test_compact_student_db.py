@@ -0,0 +1,43 @@
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import marks_store
+
+class CompactStudentDbTest(unittest.TestCase):
+    """Сжатие файла ученика не теряет оценки из повторных строк за одну дату."""
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmp.name, "stud1.db")
+        conn = sqlite3.connect(self.path)
+        conn.execute('CREATE TABLE marks(Дата TEXT, Математика TEXT, "Русский язык" TEXT)')
+        conn.executemany("INSERT INTO marks VALUES (?, ?, ?)", [
+            ("2025-01-07", "5", None),
+            ("2025-01-07", None, "4"),  # Оценка есть только в повторной строке
+            ("2025-01-07", "3", ""),  # Первая строка даты главнее: ее оценка сохраняется
+            ("2025-01-08", None, None),
+            ("2025-01-09", "2", None),
+        ])
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_duplicates_are_merged(self):
+        self.assertEqual(marks_store.compact_student_db(self.path), 3)
+        conn = sqlite3.connect(self.path)
+        try:
+            rows = conn.execute('SELECT Дата, Математика, "Русский язык" FROM marks ORDER BY Дата').fetchall()
+        finally:
+            conn.close()
+        self.assertEqual(rows, [("2025-01-07", "5", "4"), ("2025-01-09", "2", None)])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+# Модули сервера лежат в корне репозитория и открывают базы относительно текущей папки
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import homework_store
+from db_pool import pool
+
+CLASS_NAME = "1А"
+
+# Схема общей базы заданий до появления явного id
+OLD_SCHEMA = [
+    """CREATE TABLE homework(class TEXT NOT NULL, date TEXT NOT NULL, lesson TEXT NOT NULL, text TEXT NOT NULL,
+       PRIMARY KEY (class, date, lesson))""",
+    "CREATE INDEX idx_homework_class_lesson_date ON homework(class, lesson, date)",
+    """CREATE VIRTUAL TABLE homework_fts USING fts5(text, lesson, content='homework', content_rowid='rowid',
+       tokenize='unicode61 remove_diacritics 2')""",
+    """CREATE TRIGGER homework_ai AFTER INSERT ON homework BEGIN
+       INSERT INTO homework_fts(rowid, text, lesson) VALUES (new.rowid, new.text, new.lesson); END""",
+]
+
+class HomeworkStoreTest(unittest.TestCase):
+    """Полнотекстовый поиск ссылается на явный id заданий, старые базы переносятся в новую схему."""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self.db_path = os.path.join(self._tmp.name, "homework.db")
+
+    def tearDown(self):
+        pool.close_all()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _search(self, text):
+        return [r["text"] for r in homework_store.search_homework(CLASS_NAME, text, db_path=self.db_path)]
+
+    def test_old_database_is_migrated(self):
+        conn = sqlite3.connect(self.db_path)
+        for statement in OLD_SCHEMA:
+            conn.execute(statement)
+        conn.executemany("INSERT INTO homework (class, date, lesson, text) VALUES (?, ?, ?, ?)",
+                         [(CLASS_NAME, "2025-01-07", "Математика", "Дроби, упр. 12"),
+                          (CLASS_NAME, "2025-01-08", "Русский язык", "Падежи, упр. 3")])
+        conn.commit()
+        conn.close()
+
+        self.assertEqual(self._search("дроби"), ["Дроби, упр. 12"])
+        with pool.connection(self.db_path) as conn:
+            columns = [col[1] for col in conn.execute("PRAGMA table_info(homework)")]
+            self.assertEqual(columns[0], "id")
+            self.assertIsNone(conn.execute(
+                "SELECT name FROM sqlite_master WHERE name = 'homework_old'").fetchone())
+        # После переноса индекс поддерживается новыми триггерами
+        homework_store.set_homework([(CLASS_NAME, "2025-01-08", "Русский язык", "Суффиксы, упр. 5")],
+                                    db_path=self.db_path)
+        self.assertEqual(self._search("падежи"), [])
+        self.assertEqual(self._search("суффиксы"), ["Суффиксы, упр. 5"])
+        with pool.connection(self.db_path) as conn:
+            conn.execute("INSERT INTO homework_fts(homework_fts) VALUES ('integrity-check')")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+
+# Модули сервера лежат в корне репозитория и открывают базы относительно текущей папки
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import accounts
+import marks_store
+import provisioning
+import schema_migrations
+import server
+from write_queue import write_queue
+
+CLASS_NAME = "1А"
+LESSON = "Русский язык"  # Название из нескольких слов: столбец должен экранироваться
+
+class LessonColumnsTest(unittest.TestCase):
+    """Предметы с пробелом в названии проходят весь путь: миграция, новый ученик, оценка, задание."""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        conn = sqlite3.connect("logins.db")
+        conn.execute("CREATE TABLE users (login TEXT UNIQUE, password TEXT, role TEXT, info TEXT)")
+        conn.commit()
+        conn.close()
+        provisioning.provision_class(os.path.join("students_dbs", CLASS_NAME))
+
+    def tearDown(self):
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _columns(self, path, table):
+        conn = sqlite3.connect(path)
+        try:
+            return {col[1]: col[2] for col in conn.execute(f"PRAGMA table_info({table})")}
+        finally:
+            conn.close()
+
+    def test_multi_word_lesson(self):
+        schema_migrations.add_lesson(CLASS_NAME, LESSON)
+        class_dir = os.path.join("students_dbs", CLASS_NAME)
+        self.assertEqual(self._columns(os.path.join(class_dir, "home_works.db"), "home_work").get(LESSON), "TEXT")
+
+        report = accounts.import_users([{"role": "student", "login": "stud1", "password": "p",
+                                         "name": "Семён", "surname": "Глухов", "patronymic": "Андреевич",
+                                         "class_name": CLASS_NAME}])
+        self.assertTrue(report[0]["ok"], report)
+        student_db = os.path.join(class_dir, "stud1.db")
+        self.assertEqual(self._columns(student_db, "marks").get(LESSON), "TEXT")
+
+        results = marks_store.write_marks_batch([("stud1", CLASS_NAME, "2025-01-07", LESSON, "5")])
+        self.assertEqual(results, [None])
+        self.assertEqual(marks_store.compact_student_db(student_db), 0)
+
+        write_queue.write(os.path.join(class_dir, "home_works.db"), server.write_home_work,
+                          "2025-01-07", LESSON, "Упр. 12")
+        conn = sqlite3.connect(os.path.join(class_dir, "home_works.db"))
+        try:
+            text = conn.execute(f'SELECT "{LESSON}" FROM home_work WHERE Date = ?', ("2025-01-07",)).fetchone()[0]
+        finally:
+            conn.close()
+        self.assertEqual(text, "Упр. 12")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Модули сервера лежат в корне репозитория и открывают базы относительно текущей папки
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import sessions
+from db_pool import pool
+
+class SessionsTest(unittest.TestCase):
+    """Токен, выданный одним процессом, принимается и отзывается в другом."""
+
+    def setUp(self):
+        self._cwd = os.getcwd()
+        self._tmp = tempfile.TemporaryDirectory()
+        os.chdir(self._tmp.name)
+        self._env_key = os.environ.pop('DIARY_SECRET_KEY', None)
+
+    def tearDown(self):
+        if self._env_key is not None:
+            os.environ['DIARY_SECRET_KEY'] = self._env_key
+        pool.close_all()
+        os.chdir(self._cwd)
+        self._tmp.cleanup()
+
+    def _restart(self):
+        """Имитирует другой процесс сервера: память модуля пуста, база общая."""
+        sessions._sessions.clear()
+        sessions._keys.clear()
+
+    def test_token_shared_between_processes(self):
+        token, _ = sessions.issue_token("t1", "teacher", "Иванов")
+        self._restart()
+        session = sessions.verify_token(token)
+        self.assertIsNotNone(session)
+        self.assertEqual(session["login"], "t1")
+
+        sessions.revoke_token(token)
+        self._restart()
+        self.assertIsNone(sessions.verify_token(token))
+
+    def test_revoked_token_rejected_by_process_that_cached_it(self):
+        token, _ = sessions.issue_token("t1", "teacher", "Иванов")
+        self.assertIsNotNone(sessions.verify_token(token))  # Токен в памяти этого процесса
+        with sessions.sessions_connection() as conn:  # Отзыв записан другим процессом
+            conn.execute("INSERT INTO revoked (jti, exp) VALUES (?, ?)",
+                         (sessions._sessions[token]["jti"], sessions._sessions[token]["exp"]))
+            conn.commit()
+        self.assertIsNone(sessions.verify_token(token))
+
+    def test_purge_removes_expired_revocations(self):
+        token, _ = sessions.issue_token("t1", "teacher", "Иванов", ttl=-1)
+        self.assertIsNone(sessions.verify_token(token))
+        with sessions.sessions_connection() as conn:
+            conn.execute("INSERT INTO revoked (jti, exp) VALUES ('old', 0)")
+            conn.commit()
+        sessions.purge_expired()
+        with sessions.sessions_connection() as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM revoked").fetchone()[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,146 @@
+import os
+import queue
+import threading
+import sqlite3 as sq
+from concurrent.futures import Future
+from db_pool import BUSY_TIMEOUT
+
+MAX_BATCH = 256  # Сколько изменений одного файла фиксируется одной транзакцией
+IDLE_TIMEOUT = 5.0  # Через сколько секунд без работы поток записи файла завершается
+
+class _Writer(threading.Thread):
+    """
+    Единственный писатель одного файла: берет изменения из очереди, выполняет
+    накопившиеся одной транзакцией (у каждого изменения своя точка сохранения)
+    и завершает их futures после фиксации.
+    """
+    def __init__(self, owner, key):
+        super().__init__(name=f"writer:{os.path.basename(key)}", daemon=True)
+        self.owner = owner
+        self.key = key
+        self.jobs = queue.Queue()
+
+    def _open(self):
+        # Транзакцией управляем сами: BEGIN IMMEDIATE ... COMMIT на весь пакет
+        conn = sq.connect(self.key, timeout=BUSY_TIMEOUT, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        conn.execute(f"PRAGMA busy_timeout = {int(BUSY_TIMEOUT * 1000)}")
+        return conn
+
+    def run(self):
+        try:
+            conn = self._open()
+        except sq.Error as e:
+            print(f"Ошибка открытия {self.key}: {e}")
+            self.owner._fail(self, e)
+            return
+        try:
+            while True:
+                try:
+                    first = self.jobs.get(timeout=self.owner.idle_timeout)
+                except queue.Empty:
+                    if self.owner._retire(self):
+                        return
+                    continue
+                batch = [first]
+                while len(batch) < self.owner.max_batch:
+                    try:
+                        batch.append(self.jobs.get_nowait())
+                    except queue.Empty:
+                        break
+                self._commit(conn, batch)
+        finally:
+            conn.close()
+
+    def _commit(self, conn, batch):
+        """Выполняет пакет изменений одной транзакцией."""
+        batch = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+        outcomes = []
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            for future, fn, args, kwargs in batch:
+                # Ошибка одного изменения откатывает только его
+                conn.execute("SAVEPOINT job")
+                try:
+                    result = fn(conn, *args, **kwargs)
+                except Exception as e:
+                    conn.execute("ROLLBACK TO job")
+                    outcomes.append((future, None, e))
+                else:
+                    outcomes.append((future, result, None))
+                conn.execute("RELEASE job")
+            conn.execute("COMMIT")
+        except sq.Error as e:
+            print(f"Ошибка записи в {self.key}: {e}")
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            for future, *_ in batch:
+                future.set_exception(e)
+            return
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+class WriteQueue:
+    """
+    Координатор записи в файлы SQLite: у каждого файла один поток-писатель,
+    поэтому запросы не соревнуются за блокировку файла, а изменения, пришедшие
+    одновременно, фиксируются вместе (групповая фиксация).
+
+    Функция изменения получает соединение писателя и не должна сама фиксировать
+    транзакцию или ждать другие записи в тот же файл.
+    """
+    def __init__(self, max_batch=MAX_BATCH, idle_timeout=IDLE_TIMEOUT):
+        self.max_batch = max_batch
+        self.idle_timeout = idle_timeout
+        self._lock = threading.Lock()
+        self._writers = {}  # {путь: поток-писатель}
+
+    def submit(self, db_path, fn, *args, **kwargs):
+        """
+        Ставит изменение в очередь файла.
+
+        Returns:
+            Future: Результат fn(conn, *args, **kwargs) после фиксации транзакции.
+        """
+        key = os.path.abspath(db_path)
+        future = Future()
+        with self._lock:
+            writer = self._writers.get(key)
+            if writer is None:
+                writer = _Writer(self, key)
+                self._writers[key] = writer
+                writer.start()
+            writer.jobs.put((future, fn, args, kwargs))
+        return future
+
+    def write(self, db_path, fn, *args, **kwargs):
+        """Выполняет изменение через очередь файла и дожидается его фиксации."""
+        return self.submit(db_path, fn, *args, **kwargs).result()
+
+    def _retire(self, writer):
+        """Снимает простаивающего писателя, если в его очередь ничего не пришло."""
+        with self._lock:
+            if not writer.jobs.empty():
+                return False
+            del self._writers[writer.key]
+            return True
+
+    def _fail(self, writer, error):
+        """Снимает писателя, который не смог открыть файл, и завершает его изменения ошибкой."""
+        with self._lock:
+            self._writers.pop(writer.key, None)
+        while True:
+            try:
+                future = writer.jobs.get_nowait()[0]
+            except queue.Empty:
+                return
+            if future.set_running_or_notify_cancel():
+                future.set_exception(error)
+
+write_queue = WriteQueue()  # Общий координатор записи процесса
@@ -0,0 +1,74 @@
+import os
+import zipfile
+import unicodedata
+from urllib.parse import quote
+
+CHUNK_SIZE = 64 * 1024  # Размер куска чтения файла
+COMPRESSION = {
+    "stored": zipfile.ZIP_STORED,  # Без сжатия: минимум работы процессора
+    "deflate": zipfile.ZIP_DEFLATED,  # Со сжатием: меньше трафика
+}
+DEFAULT_COMPRESSION = "stored"  # Как и раньше, архив по умолчанию не сжимается
+
+class _ChunkSink:
+    """
+    Файлоподобный приемник без перемотки: zipfile пишет в него, а генератор
+    забирает накопленные байты. Без tell/seek zipfile сам переходит в потоковый
+    режим и пишет размеры файлов после их данных.
+    """
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        """Забирает все накопленные байты."""
+        chunks, self._chunks = self._chunks, []
+        return b"".join(chunks)
+
+def stream_zip(files, compression=DEFAULT_COMPRESSION, extra=()):
+    """
+    Генератор, отдающий ZIP-архив кусками по мере сборки.
+    В памяти одновременно находится не больше одного куска каждого файла.
+
+    Args:
+        files: Список путей к файлам; в архиве они лежат под своими именами.
+        compression (str): "stored" или "deflate".
+        extra: Список пар (имя в архиве, bytes) для небольших служебных файлов.
+    """
+    compress_type = COMPRESSION[compression]
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=compress_type) as zipf:
+        for path in files:
+            info = zipfile.ZipInfo.from_file(path, os.path.basename(path))
+            info.compress_type = compress_type
+            with open(path, 'rb') as src, zipf.open(info, 'w') as dst:
+                while True:
+                    chunk = src.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    data = sink.take()
+                    if data:
+                        yield data
+            data = sink.take()
+            if data:
+                yield data
+        for arcname, content in extra:
+            zipf.writestr(arcname, content)
+    yield sink.take()  # Оглавление архива пишется при закрытии
+
+def attachment_headers(download_name):
+    """Заголовки для скачивания файла с именем, допускающим кириллицу."""
+    try:
+        download_name.encode("ascii")
+        value = f'attachment; filename="{download_name}"'
+    except UnicodeEncodeError:
+        simple = unicodedata.normalize("NFKD", download_name).encode("ascii", "ignore").decode("ascii")
+        value = f'attachment; filename="{simple}"; filename*=UTF-8\'\'{quote(download_name)}'
+    return {"Content-Disposition": value}